@@ -0,0 +1,142 @@
+# ------------------------ FORMATOS DOS CRIATIVOS ------------------------
+# Tamanhos de anúncio de imagem e a regra da logo em cada um. O template é
+# decodificado uma vez e dele saem todos os tamanhos pedidos (ver
+# `redimensionar_tamanhos`).
+
+TOLERANCIA_PROPORCAO = 0.01  # Diferença relativa de proporção tratada como igual (sem corte, reaproveita reduções)
+
+# Fração (horizontal, vertical) do espaço livre antes da logo: 0 = início, 1 = fim
+ANCORAS = {
+    "inferior_direito": (1, 1),
+    "inferior_esquerdo": (0, 1),
+    "superior_direito": (1, 0),
+    "superior_esquerdo": (0, 0),
+    "inferior_centro": (0.5, 1),
+    "direita_centro": (1, 0.5),
+}
+
+REGRA_PADRAO = {"logo_size": (45, 14), "ancora": "inferior_direito", "margem": 10}
+
+# Regras da logo para os formatos do Google Ads: tamanho da logo, onde ela fica e a margem (px)
+FORMATOS = {
+    (336, 280): {"logo_size": (45, 14), "ancora": "inferior_direito", "margem": 10},
+    (300, 250): {"logo_size": (40, 12), "ancora": "inferior_direito", "margem": 9},
+    (250, 250): {"logo_size": (34, 11), "ancora": "inferior_direito", "margem": 8},
+    (200, 200): {"logo_size": (30, 9), "ancora": "inferior_direito", "margem": 6},
+    (300, 600): {"logo_size": (60, 19), "ancora": "inferior_direito", "margem": 12},
+    (160, 600): {"logo_size": (45, 14), "ancora": "inferior_centro", "margem": 12},
+    (120, 600): {"logo_size": (40, 12), "ancora": "inferior_centro", "margem": 10},
+    (728, 90): {"logo_size": (58, 18), "ancora": "direita_centro", "margem": 12},
+    (970, 90): {"logo_size": (58, 18), "ancora": "direita_centro", "margem": 14},
+    (468, 60): {"logo_size": (38, 12), "ancora": "direita_centro", "margem": 8},
+    (320, 50): {"logo_size": (32, 10), "ancora": "direita_centro", "margem": 6},
+}
+
+
+def ler_dimensoes(texto):
+    """Converte "728x90" em (728, 90)."""
+    largura, _, altura = texto.strip().lower().partition("x")
+    try:
+        dimensoes = (int(largura), int(altura))
+    except ValueError:
+        raise ValueError(f"Tamanho inválido: {texto!r} (use LARGURAxALTURA, ex.: 728x90)") from None
+    if min(dimensoes) <= 0:
+        raise ValueError(f"Tamanho inválido: {texto!r}")
+    return dimensoes
+
+
+def normalizar_tamanho(item):
+    """Converte "728x90", (728, 90) ou um dicionário com "dimensoes" em um tamanho completo.
+
+    O tamanho é um dicionário com dimensoes, logo_size, ancora e margem; o que
+    não vier no item é preenchido pela regra do formato em FORMATOS (ou por
+    REGRA_PADRAO). Levanta ValueError se a âncora não existir ou se a logo,
+    com a margem, não couber no criativo.
+    """
+    if isinstance(item, str):
+        regra = {"dimensoes": ler_dimensoes(item)}
+    elif isinstance(item, dict):
+        regra = item
+    else:
+        regra = {"dimensoes": item}
+    dimensoes = tuple(int(valor) for valor in regra["dimensoes"])
+    base = FORMATOS.get(dimensoes, REGRA_PADRAO)
+    tamanho = {
+        "dimensoes": dimensoes,
+        "logo_size": tuple(int(valor) for valor in regra.get("logo_size", base["logo_size"])),
+        "ancora": regra.get("ancora", base["ancora"]),
+        "margem": int(regra.get("margem", base["margem"])),
+    }
+    if tamanho["ancora"] not in ANCORAS:
+        raise ValueError(f"Âncora inválida: {tamanho['ancora']!r} (opções: {', '.join(ANCORAS)})")
+    if any(logo + 2 * tamanho["margem"] > lado for logo, lado in zip(tamanho["logo_size"], dimensoes)):
+        raise ValueError(f"A logo {tamanho['logo_size']} com margem {tamanho['margem']} não cabe em {dimensoes}")
+    return tamanho
+
+
+def normalizar_tamanhos(itens):
+    """Normaliza uma lista de tamanhos (ou "336x280,728x90"), sem repetir dimensões."""
+    if isinstance(itens, str):
+        itens = [item for item in itens.split(",") if item.strip()]
+    tamanhos = {}
+    for item in itens:
+        tamanho = normalizar_tamanho(item)
+        tamanhos.setdefault(tamanho["dimensoes"], tamanho)
+    return list(tamanhos.values())
+
+
+def rotulo(dimensoes):
+    return f"{dimensoes[0]}x{dimensoes[1]}"
+
+
+# ------------------------ REDIMENSIONAMENTO ------------------------
+def mesma_proporcao(origem, dimensoes):
+    return abs((origem[0] * dimensoes[1]) / (origem[1] * dimensoes[0]) - 1) <= TOLERANCIA_PROPORCAO
+
+
+def caixa_corte(origem, dimensoes):
+    """Região central de `origem` com a proporção de `dimensoes` (None se a proporção já for a mesma).
+
+    O template é ajustado ao formato cobrindo-o por inteiro: o que sobra na
+    largura ou na altura é cortado igualmente dos dois lados, sem distorcer.
+    """
+    if mesma_proporcao(origem, dimensoes):
+        return None
+    largura, altura = origem
+    if largura * dimensoes[1] > altura * dimensoes[0]:
+        nova_largura = altura * dimensoes[0] / dimensoes[1]
+        x = (largura - nova_largura) / 2
+        return (x, 0, x + nova_largura, altura)
+    nova_altura = largura * dimensoes[1] / dimensoes[0]
+    y = (altura - nova_altura) / 2
+    return (0, y, largura, y + nova_altura)
+
+
+def redimensionar_tamanhos(imagem, lista_dimensoes):
+    """Gera a imagem em cada uma das dimensões a partir de uma única decodificação.
+
+    Os tamanhos são gerados do maior para o menor. Quando um tamanho já gerado
+    tem a mesma proporção do próximo e é pelo menos do tamanho dele (336x280 e
+    300x250, por exemplo), o próximo sai dessa redução intermediária em vez do
+    original, que pode ser bem maior. Retorna {dimensoes: imagem}; a imagem de
+    um tamanho igual ao do original é o próprio original. Nada é alterado nas
+    imagens devolvidas, então quem for desenhar sobre elas deve fazê-lo só
+    depois desta função.
+    """
+    resultado = {}
+    geradas = []
+    for dimensoes in sorted({tuple(d) for d in lista_dimensoes}, key=lambda d: d[0] * d[1], reverse=True):
+        if tuple(imagem.size) == dimensoes:
+            resultado[dimensoes] = imagem
+            geradas.append(imagem)
+            continue
+        intermediarias = [gerada for gerada in geradas
+                          if gerada.size[0] >= dimensoes[0] and gerada.size[1] >= dimensoes[1]
+                          and mesma_proporcao(gerada.size, dimensoes)]
+        if intermediarias:
+            origem = min(intermediarias, key=lambda gerada: gerada.size[0] * gerada.size[1])
+            resultado[dimensoes] = origem.resize(dimensoes)
+        else:
+            resultado[dimensoes] = imagem.resize(dimensoes, box=caixa_corte(imagem.size, dimensoes))
+        geradas.append(resultado[dimensoes])
+    return resultado
@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+# ------------------------ CONFIGURAÇÕES DO PREFETCH ------------------------
+PREFETCH_MAX_GRUPOS_POR_CONSULTA = 1000  # Grupos de anúncios por cláusula IN (mantém a consulta GAQL pequena)
+
+
+def _executar_direto(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def resumo_vazio():
+    return {"final_url": None, "anuncios_imagem": 0, "nomes": [], "imagens": {}}
+
+
+def _consulta(grupos):
+    ad_groups = ", ".join(f"'{grupo}'" for grupo in grupos)
+    return f"""
+        SELECT ad_group_ad.ad_group, ad_group_ad.resource_name, ad_group_ad.ad.type,
+            ad_group_ad.ad.name, ad_group_ad.ad.final_urls, ad_group_ad.ad.image_ad.image_url
+        FROM ad_group_ad
+        WHERE ad_group_ad.ad_group IN ({ad_groups})
+        AND ad_group_ad.status = 'ENABLED'
+    """
+
+
+def prefetch_grupos(client, pares, executar=_executar_direto):
+    """Busca, com um search_stream por conta, o resumo dos anúncios ativos de vários grupos.
+
+    `pares` é uma lista de (account_id, ad_group_id). Retorna
+    {(account_id, ad_group_id): resumo}, em que o resumo traz a primeira URL
+    final, a quantidade de anúncios de imagem ativos, os nomes dos anúncios e
+    {resource_name: image_url} das imagens. Grupos sem anúncios ativos recebem
+    um resumo vazio. Contas cuja consulta falhar ficam fora do resultado.
+    """
+    google_ads_service = client.get_service("GoogleAdsService")
+    image_ad = client.enums.AdTypeEnum.IMAGE_AD
+    grupos_por_conta = defaultdict(list)
+    for account_id, ad_group_id in dict.fromkeys(pares):
+        grupos_por_conta[account_id].append(f"customers/{account_id}/adGroups/{ad_group_id}")
+
+    def consultar(customer_id, query):
+        # O stream é consumido aqui dentro para que falhas no meio dele também sejam refeitas
+        return [row for batch in google_ads_service.search_stream(customer_id=customer_id, query=query)
+                for row in batch.results]
+
+    resumos = {}
+    for account_id, grupos in grupos_por_conta.items():
+        for inicio in range(0, len(grupos), PREFETCH_MAX_GRUPOS_POR_CONSULTA):
+            lote = grupos[inicio:inicio + PREFETCH_MAX_GRUPOS_POR_CONSULTA]
+            linhas = executar(consultar, customer_id=account_id, query=_consulta(lote))
+            if linhas is None:
+                continue
+            parciais = {grupo: resumo_vazio() for grupo in lote}
+            for row in linhas:
+                resumo = parciais.setdefault(row.ad_group_ad.ad_group, resumo_vazio())
+                ad = row.ad_group_ad.ad
+                if ad.final_urls and resumo["final_url"] is None:
+                    resumo["final_url"] = ad.final_urls[0]
+                if ad.name:
+                    resumo["nomes"].append(ad.name)
+                if ad.type_ == image_ad:
+                    resumo["anuncios_imagem"] += 1
+                if ad.image_ad.image_url:
+                    resumo["imagens"][row.ad_group_ad.resource_name] = ad.image_ad.image_url
+            for grupo, resumo in parciais.items():
+                resumos[(account_id, grupo.rsplit("/", 1)[-1])] = resumo
+    return resumos
@@ -0,0 +1,188 @@
+import os
+import time
+
+# ------------------------ CONFIGURAÇÕES DE UPLOAD ------------------------
+ADS_MAX_OPERACOES_POR_MUTATE = 1000         # Operações por chamada mutate_ad_group_ads
+ADS_MAX_BYTES_POR_MUTATE = 20 * 1024 ** 2   # Limite de bytes de imagem por chamada mutate
+ADS_BATCH_JOB_LIMIAR = 500                  # A partir de quantos criativos por conta usar o BatchJobService
+ADS_BATCH_JOB_TIMEOUT = 1800                # Tempo máximo (s) aguardando um batch job terminar
+ADS_BATCH_JOB_POLL_INICIAL = 5              # Intervalo inicial (s) entre consultas ao batch job
+ADS_BATCH_JOB_POLL_MAXIMO = 60              # Intervalo máximo (s) entre consultas ao batch job
+
+
+def _executar_direto(func, *args, idempotente=True, **kwargs):
+    return func(*args, **kwargs)
+
+
+def montar_operacao(client, account_id, ad_group_id, creative_path, final_url):
+    """Monta a AdGroupAdOperation de um criativo de imagem."""
+    with open(creative_path, "rb") as f:
+        image_data = f.read()
+    ad_operation = client.get_type("AdGroupAdOperation")
+    ad = ad_operation.create
+    ad.ad_group = f"customers/{account_id}/adGroups/{ad_group_id}"
+    ad.status = client.enums.AdGroupAdStatusEnum.ENABLED
+    image_ad = ad.ad.image_ad
+    image_ad.data = image_data
+    ext = os.path.splitext(creative_path)[1].lower()
+    if ext == ".gif":
+        image_ad.mime_type = client.enums.MimeTypeEnum.IMAGE_GIF
+    elif ext in (".jpg", ".jpeg"):
+        image_ad.mime_type = client.enums.MimeTypeEnum.IMAGE_JPEG
+    else:
+        image_ad.mime_type = client.enums.MimeTypeEnum.IMAGE_PNG
+    ad.ad.final_urls.append(final_url)
+    ad.ad.display_url = final_url.split("://")[-1]
+    ad.ad.name = os.path.splitext(os.path.basename(creative_path))[0]
+    return ad_operation, len(image_data)
+
+
+def _dividir(operacoes):
+    """Agrupa as operações respeitando os limites de quantidade e de bytes por mutate."""
+    lote, bytes_lote = [], 0
+    for caminho, operacao, tamanho in operacoes:
+        if lote and (len(lote) >= ADS_MAX_OPERACOES_POR_MUTATE or bytes_lote + tamanho > ADS_MAX_BYTES_POR_MUTATE):
+            yield lote
+            lote, bytes_lote = [], 0
+        lote.append((caminho, operacao, tamanho))
+        bytes_lote += tamanho
+    if lote:
+        yield lote
+
+
+def _falhas(client, status):
+    """Lê os GoogleAdsFailure de um google.rpc.Status: [(posição da operação ou None, mensagem)]."""
+    google_ads_failure = type(client.get_type("GoogleAdsFailure"))
+    falhas = []
+    for detalhe in status.details:
+        falha = google_ads_failure.deserialize(detalhe.value)
+        for erro in falha.errors:
+            indice = erro.location.field_path_elements[0].index if erro.location.field_path_elements else None
+            falhas.append((indice, erro.message))
+    return falhas
+
+
+def _erros_parciais(client, response):
+    """Extrai os erros de partial failure, indexados pela posição da operação."""
+    erros = {}
+    status = getattr(response, "partial_failure_error", None)
+    if not status or not status.code:
+        return erros
+    for indice, mensagem in _falhas(client, status):
+        erros.setdefault(indice, []).append(mensagem)
+    return erros
+
+
+def _listar_resultados(batch_job_service, resource_name):
+    # Lê todas as páginas aqui dentro, para que uma falha no meio da paginação seja refeita
+    return list(batch_job_service.list_batch_job_results(resource_name=resource_name))
+
+
+def _enviar_mutate(client, account_id, lote, executar):
+    ad_group_ad_service = client.get_service("AdGroupAdService")
+    request = client.get_type("MutateAdGroupAdsRequest")
+    request.customer_id = account_id
+    request.partial_failure = True
+    request.operations.extend(operacao for _, operacao, _ in lote)
+    response = executar(ad_group_ad_service.mutate_ad_group_ads, request=request, idempotente=False)
+    if response is None:
+        return {caminho: {"erro": "falha na chamada mutate_ad_group_ads"} for caminho, _, _ in lote}
+
+    erros = _erros_parciais(client, response)
+    resultados = {}
+    for indice, (caminho, _, _) in enumerate(lote):
+        resource_name = response.results[indice].resource_name if indice < len(response.results) else ""
+        if indice in erros or not resource_name:
+            resultados[caminho] = {"erro": "; ".join(erros.get(indice, erros.get(None, ["erro desconhecido"])))}
+        else:
+            resultados[caminho] = {"resource_name": resource_name}
+    return resultados
+
+
+def _enviar_batch_job(client, account_id, operacoes, executar):
+    """Envia as operações pelo BatchJobService e aguarda o resultado consultando o job."""
+    batch_job_service = client.get_service("BatchJobService")
+    batch_job_operation = client.get_type("BatchJobOperation")
+    client.copy_from(batch_job_operation.create, client.get_type("BatchJob"))
+    response = executar(batch_job_service.mutate_batch_job, customer_id=account_id, operation=batch_job_operation,
+                        idempotente=False)
+    if response is None:
+        return {caminho: {"erro": "falha ao criar o batch job"} for caminho, _, _ in operacoes}
+    resource_name = response.result.resource_name
+
+    adicionadas, sequence_token = 0, None
+    for lote in _dividir(operacoes):
+        mutate_operations = []
+        for _, operacao, _ in lote:
+            mutate_operation = client.get_type("MutateOperation")
+            client.copy_from(mutate_operation.ad_group_ad_operation, operacao)
+            mutate_operations.append(mutate_operation)
+        resposta = executar(batch_job_service.add_batch_job_operations, resource_name=resource_name,
+                            sequence_token=sequence_token, mutate_operations=mutate_operations, idempotente=False)
+        adicionadas += len(lote)
+        if resposta is None or resposta.total_operations != adicionadas:
+            # Um job com parte das operações não é executado: nada é enviado e todos os criativos falham
+            erro = ("falha ao adicionar as operações ao batch job" if resposta is None else
+                    f"batch job {resource_name} recebeu {resposta.total_operations} de {adicionadas} operações")
+            return {caminho: {"erro": erro} for caminho, _, _ in operacoes}
+        # Cada envio de operações precisa do token devolvido pelo anterior
+        sequence_token = resposta.next_sequence_token
+
+    operacao_longa = executar(batch_job_service.run_batch_job, resource_name=resource_name, idempotente=False)
+    if operacao_longa is None:
+        return {caminho: {"erro": "falha ao iniciar o batch job"} for caminho, _, _ in operacoes}
+    print(f"⏳ Batch job {resource_name} iniciado com {len(operacoes)} criativos.")
+
+    intervalo = ADS_BATCH_JOB_POLL_INICIAL
+    limite = time.time() + ADS_BATCH_JOB_TIMEOUT
+    while not operacao_longa.done():
+        if time.time() > limite:
+            return {caminho: {"erro": f"batch job {resource_name} não terminou a tempo"} for caminho, _, _ in operacoes}
+        time.sleep(intervalo)
+        intervalo = min(intervalo * 2, ADS_BATCH_JOB_POLL_MAXIMO)
+
+    resultados = {caminho: {"erro": "sem resultado no batch job"} for caminho, _, _ in operacoes}
+    caminhos = [caminho for caminho, _, _ in operacoes]
+    resposta = executar(_listar_resultados, batch_job_service, resource_name=resource_name)
+    if resposta is None:
+        return {caminho: {"erro": f"falha ao ler os resultados do batch job {resource_name}"} for caminho in caminhos}
+    for resultado in resposta:
+        if not 0 <= resultado.operation_index < len(caminhos):
+            continue
+        caminho = caminhos[resultado.operation_index]
+        resource_name_anuncio = resultado.mutate_operation_response.ad_group_ad_result.resource_name
+        if resultado.status.code or not resource_name_anuncio:
+            # Falha parcial da operação: as mensagens vêm nos GoogleAdsFailure do status
+            mensagens = [mensagem for _, mensagem in _falhas(client, resultado.status)]
+            resultados[caminho] = {"erro": "; ".join(mensagens) or resultado.status.message or "erro desconhecido"}
+        else:
+            resultados[caminho] = {"resource_name": resource_name_anuncio}
+    return resultados
+
+
+def enviar_criativos(client, account_id, itens, executar=_executar_direto):
+    """Envia vários criativos de uma conta, agrupando-os em poucas chamadas.
+
+    `itens` é uma lista de (ad_group_id, creative_path, final_url). Até
+    ADS_BATCH_JOB_LIMIAR criativos são enviados em mutates com várias
+    operações e partial_failure ligado; acima disso é usado o
+    BatchJobService. `executar(func, *args, idempotente=True, **kwargs)`
+    envolve cada chamada; as escritas passam `idempotente=False`, para não
+    serem refeitas após erros em que o servidor pode tê-las aplicado.
+    Retorna {creative_path: {"resource_name" ou "erro"}}.
+    """
+    resultados = {}
+    operacoes = []
+    for ad_group_id, creative_path, final_url in itens:
+        try:
+            operacao, tamanho = montar_operacao(client, account_id, ad_group_id, creative_path, final_url)
+            operacoes.append((creative_path, operacao, tamanho))
+        except Exception as ex:
+            resultados[creative_path] = {"erro": str(ex)}
+
+    if len(operacoes) > ADS_BATCH_JOB_LIMIAR:
+        resultados.update(_enviar_batch_job(client, account_id, operacoes, executar))
+    else:
+        for lote in _dividir(operacoes):
+            resultados.update(_enviar_mutate(client, account_id, lote, executar))
+    return resultados
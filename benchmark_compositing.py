@@ -0,0 +1,78 @@
+import argparse
+import time
+import numpy as np
+from PIL import Image, ImageDraw
+from compositing import compor_logo_lote, compor_logo_pillow, empilhar, logo_para_array
+from render import DIMENSOES, LOGO_SIZE, posicao_logo
+
+# ------------------------ MICROBENCHMARK DE COMPOSIÇÃO ------------------------
+# Compara o paste da logo quadro a quadro (Pillow) com a composição em lote
+# (NumPy) em GIFs sintéticos com 100+ quadros e confere que o resultado é
+# idêntico byte a byte. O motor de GIF só usa o caminho NumPy com
+# gif_engine.COMPOSICAO_EM_LOTE ligado, se ele se mostrar mais rápido aqui.
+
+
+def gerar_quadros(quantidade, dimensoes):
+    """Gera quadros RGBA sintéticos (fundo em gradiente com um círculo em movimento)."""
+    fundo = Image.linear_gradient("L").resize(dimensoes).convert("RGBA")
+    quadros = []
+    for i in range(quantidade):
+        quadro = fundo.copy()
+        x = (i * 7) % dimensoes[0]
+        ImageDraw.Draw(quadro).ellipse((x, 40, x + 60, 100), fill=(255, 40, 40, 255))
+        quadros.append(quadro)
+    return quadros
+
+
+def gerar_logo(logo_size):
+    logo = Image.new("RGBA", logo_size, (0, 0, 0, 0))
+    ImageDraw.Draw(logo).rounded_rectangle((0, 0, logo_size[0] - 1, logo_size[1] - 1), 4, fill=(20, 60, 200, 220))
+    return logo
+
+
+def medir(funcao, repeticoes):
+    """Retorna o menor tempo (s) entre as repetições."""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a composição da logo via Pillow e via NumPy.")
+    parser.add_argument("--quadros", type=int, nargs="+", default=[100, 250, 500], help="Quantidades de quadros testadas")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Repetições por medição (vale a menor)")
+    args = parser.parse_args()
+
+    posicao = posicao_logo(DIMENSOES, LOGO_SIZE)
+    logo = gerar_logo(LOGO_SIZE)
+    logo_array = logo_para_array(logo)
+
+    print(f"{'quadros':>8} {'pillow (ms)':>12} {'numpy (ms)':>11} {'ganho':>7}  idêntico")
+    for quantidade in args.quadros:
+        quadros = gerar_quadros(quantidade, DIMENSOES)
+        base = empilhar(quadros)
+
+        # As medições compõem repetidamente sobre os mesmos quadros (sem cópias);
+        # o resultado só é conferido depois, a partir de cópias limpas
+        trabalho = [q.copy() for q in quadros]
+        t_pillow = medir(lambda: compor_logo_pillow(trabalho, logo, posicao), args.repeticoes)
+        trabalho_array = base.copy()
+        t_numpy = medir(lambda: compor_logo_lote(trabalho_array, logo_array, posicao), args.repeticoes)
+
+        referencia = empilhar(compor_logo_pillow([q.copy() for q in quadros], logo, posicao))
+        resultado = compor_logo_lote(base.copy(), logo_array, posicao)
+        identico = np.array_equal(referencia, resultado)
+
+        ms_pillow = t_pillow * 1000
+        ms_numpy = t_numpy * 1000
+        ganho = ms_pillow / ms_numpy if ms_numpy else float("inf")
+        print(f"{quantidade:>8} {ms_pillow:>12.2f} {ms_numpy:>11.2f} {ganho:>6.1f}x  {'sim' if identico else 'NÃO'}")
+        if not identico:
+            raise SystemExit("❌ A composição em lote divergiu do Pillow.")
+
+
+if __name__ == "__main__":
+    main()
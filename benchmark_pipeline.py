@@ -0,0 +1,348 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import contextlib
+from types import SimpleNamespace
+from PIL import Image, ImageDraw
+from fake_services import FakeDrive, FakeSheets, FakeGoogleAds
+
+# ------------------------ BENCHMARK DO PIPELINE ------------------------
+# Gera templates PNG/GIF e logos sintéticos, roda o código real de download,
+# renderização e upload contra Drive, Sheets e Google Ads falsos (com latência
+# configurável) e compara criativos/s, latência por estágio e pico de memória
+# com o baseline salvo. Uma regressão acima da tolerância encerra com erro.
+
+BASELINE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+TOLERANCIA_PADRAO = 0.25    # Piora máxima aceita em relação ao baseline (25%)
+FOLGA_LATENCIA = 0.005      # Folga absoluta (s) somada ao limite de cada estágio (ruído em estágios curtos)
+TAMANHOS_PNG = ((336, 280), (600, 500), (1200, 1000))       # Tamanhos dos templates estáticos, em rodízio
+TAMANHOS_GIF = ((336, 280, 10), (336, 280, 40), (600, 500, 80))  # (largura, altura, quadros) dos GIFs, em rodízio
+PAISES = ("BR", "MX")
+ESTAGIOS_COMPARADOS = ("download_file", "renderizar_criativo", "salvar_sem_metadados", "render_cache", "gerar_criativos",
+                       "get_existing_creatives", "upload_creatives", "fazer_requisicao_liberada")
+
+
+# ------------------------ DADOS SINTÉTICOS ------------------------
+def _png(imagem):
+    buffer = io.BytesIO()
+    imagem.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _fundo(rng, tamanho):
+    """Fundo com formas aleatórias (cada template fica perceptualmente diferente)."""
+    imagem = Image.new("RGB", tamanho, tuple(rng.randrange(256) for _ in range(3)))
+    desenho = ImageDraw.Draw(imagem)
+    for _ in range(12):
+        x, y = rng.randrange(tamanho[0]), rng.randrange(tamanho[1])
+        w, h = rng.randrange(20, tamanho[0] // 2), rng.randrange(20, tamanho[1] // 2)
+        cor = tuple(rng.randrange(256) for _ in range(3))
+        if rng.random() < 0.5:
+            desenho.rectangle((x, y, x + w, y + h), fill=cor)
+        else:
+            desenho.ellipse((x, y, x + w, y + h), fill=cor)
+    return imagem
+
+
+def gerar_template_png(rng, tamanho):
+    return _png(_fundo(rng, tamanho))
+
+
+def gerar_template_gif(rng, tamanho, quadros):
+    fundo = _fundo(rng, tamanho)
+    lado = max(20, tamanho[1] // 5)
+    imagens = []
+    for i in range(quadros):
+        quadro = fundo.copy()
+        x = (i * 9) % max(1, tamanho[0] - lado)
+        ImageDraw.Draw(quadro).ellipse((x, lado, x + lado, 2 * lado), fill=(255, 255, 255))
+        imagens.append(quadro)
+    buffer = io.BytesIO()
+    imagens[0].save(buffer, format="GIF", save_all=True, append_images=imagens[1:], duration=40, loop=0)
+    return buffer.getvalue()
+
+
+def gerar_logo(rng):
+    logo = Image.new("RGBA", (90, 28), (0, 0, 0, 0))
+    cor = tuple(rng.randrange(256) for _ in range(3)) + (230,)
+    ImageDraw.Draw(logo).rounded_rectangle((0, 0, 89, 27), 6, fill=cor)
+    return _png(logo)
+
+
+def imagem_anuncio_ativo(url):
+    """Imagem do anúncio ativo de um grupo (servida pelo Ads falso no lugar da CDN)."""
+    return _png(_fundo(random.Random(url), (336, 280)))
+
+
+def montar_cenario(args):
+    """Monta o Drive (templates e logos), a planilha e o Ads falsos do cenário."""
+    from main import IDIOMAS_POR_PAIS
+    rng = random.Random(args.semente)
+    drive = FakeDrive(args.latencia_drive)
+    raiz_templates = drive.criar_pasta("templates")
+    raiz_logos = drive.criar_pasta("logos")
+    for pais in PAISES:
+        pasta = drive.criar_pasta(IDIOMAS_POR_PAIS[pais], raiz_templates)
+        for i in range(args.templates_png):
+            tamanho = TAMANHOS_PNG[i % len(TAMANHOS_PNG)]
+            drive.criar_arquivo(f"png_{i}.png", gerar_template_png(rng, tamanho), "image/png", pasta)
+        for i in range(args.templates_gif):
+            largura, altura, quadros = TAMANHOS_GIF[i % len(TAMANHOS_GIF)]
+            drive.criar_arquivo(f"gif_{i}.gif", gerar_template_gif(rng, (largura, altura), quadros), "image/gif", pasta)
+
+    linhas = [["País", "Campanha", "Site", "ID da Conta", "ID do Grupo de Anúncios"]]
+    grupo = 5000
+    for s in range(args.sites):
+        site = f"site{s}"
+        drive.criar_arquivo(f"{site}.png", gerar_logo(rng), "image/png", raiz_logos)
+        for g in range(args.grupos_por_site):
+            grupo += 1
+            conta = 1000000000 + (grupo % args.contas)
+            linhas.append([PAISES[s % len(PAISES)], f"Campanha {site} [ - T1 - ]", site, str(conta), str(grupo)])
+
+    sheets = FakeSheets(linhas, args.latencia_sheets)
+    ads = FakeGoogleAds(args.latencia_ads, imagem_anuncio_ativo)
+    return SimpleNamespace(drive=drive, sheets=sheets, ads=ads, linhas=linhas,
+                           raiz_templates=raiz_templates, raiz_logos=raiz_logos)
+
+
+# ------------------------ EXECUÇÃO ------------------------
+def preparar_main(cenario, args):
+    """Importa o main.py (no diretório de trabalho atual) ligado aos serviços falsos."""
+    import main
+    import rate_limiter
+    main.drive = cenario.drive
+    main.drive_planilha = cenario.drive
+    main.TEMPLATES_DRIVE_FOLDER_ID = cenario.raiz_templates
+    main.LOGOS_DRIVE_FOLDER_ID = cenario.raiz_logos
+    main.SPREADSHEET_ID = "planilha-benchmark"
+    main.get_sheets_service = lambda: cenario.sheets
+    main.carregar_cliente_ads = lambda: cenario.ads
+    main.baixar_imagem = cenario.ads.baixar_imagem
+    main.RENDER_WORKERS = args.workers
+    main.TAMANHOS = args.tamanhos.split(",")
+    if args.sem_cache_render:
+        main.render_cache.max_bytes = 0
+    main.metricas.guardar_amostras = True
+    if not args.limites_reais:
+        # Sem os limites de quota, o benchmark mede o código e não o rate limiter
+        for api in ("ads", "drive", "sheets"):
+            rate_limiter.configurar(api, 1e6, 1e6)
+        rate_limiter.configurar("ads", 1e6, 1e6, por_conta=True)
+    return main
+
+
+def rodar_pipeline(main, cenario, args):
+    """Modo interativo (pipeline sobreposto), com as respostas do usuário roteirizadas."""
+    respostas = iter(["all", "all", "s", "a", str(args.quantidade)])
+    main.input = lambda *_: next(respostas)
+    main.main_interativo()
+
+
+def rodar_cli(main, cenario, args):
+    """Modo de linha de comando, um grupo por vez, como o wrapper do cron."""
+    for pais, _, site, conta, grupo in cenario.linhas[1:]:
+        with main.metricas.grupo(f"{conta}/{grupo}"):
+            logo_path = main.buscar_logo_por_site(site)
+            criativos = main.gerar_criativos(site, main.buscar_idioma_por_pais(pais), args.quantidade, logo_path)
+            main.prefetch_anuncios(cenario.ads, [(conta, grupo)])
+            final_url = main.get_existing_creatives(cenario.ads, conta, grupo)
+            main.upload_creatives(cenario.ads, conta, grupo, criativos, final_url)
+
+
+def _rss_mb(ru_maxrss):
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss: bytes no macOS, KB no Linux
+    return round(ru_maxrss / divisor, 1)
+
+
+def pico_rss_mb():
+    """Pico de memória residente (MB) do processo."""
+    return _rss_mb(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def _rss_worker(_):
+    """Roda dentro de um worker: o pico de RSS dele (a pausa espalha as chamadas pelo pool)."""
+    time.sleep(0.05)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def pico_rss_workers(render, workers):
+    """Maior pico de RSS (MB) entre os workers de renderização, perguntado a cada um.
+
+    Os workers não são filhos deste processo (nascem do forkserver), então o
+    RUSAGE_CHILDREN não os enxerga.
+    """
+    if workers <= 1:
+        return 0.0
+    return _rss_mb(max(render.obter_pool(workers).map(_rss_worker, range(workers * 4))))
+
+
+def executar(args):
+    diretorio = tempfile.mkdtemp(prefix="benchmark_criativos_")
+    anterior = os.getcwd()
+    try:
+        # O main.py cria caches e bancos SQLite no diretório atual ao ser importado
+        os.chdir(diretorio)
+        cenario = montar_cenario(args)
+        main = preparar_main(cenario, args)
+        import render
+        if args.workers > 1:
+            render.obter_pool(args.workers)  # Como o main.py: antes de qualquer thread
+        random.seed(args.semente)
+        saida = contextlib.nullcontext() if args.verboso else contextlib.redirect_stdout(io.StringIO())
+        inicio = time.perf_counter()
+        with saida:
+            (rodar_pipeline if args.modo == "pipeline" else rodar_cli)(main, cenario, args)
+        duracao = time.perf_counter() - inicio
+        rss_workers = pico_rss_workers(render, args.workers)
+        render.encerrar_pool()
+        relatorio = main.metricas.relatorio()
+    finally:
+        os.chdir(anterior)
+        if not args.manter:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+    # Criativos reaproveitados do cache de renderização também contam como gerados
+    renderizados = sum(relatorio["estagios"].get(nome, {}).get("contagem", 0)
+                       for nome in ("renderizar_criativo", "render_cache"))
+    rss = pico_rss_mb()
+    return {
+        "cenario": cenario_chave(args),
+        "duracao_segundos": round(duracao, 3),
+        "criativos": renderizados,
+        "enviados": cenario.ads.operacoes,
+        "criativos_por_segundo": round(renderizados / duracao, 3) if duracao else 0.0,
+        "rss_pico_mb": rss,
+        "rss_pico_workers_mb": rss_workers,
+        "requisicoes": {"drive": cenario.drive.requisicoes, "sheets": cenario.sheets.requisicoes,
+                        "ads": cenario.ads.requisicoes},
+        "estagios": {
+            nome: {"contagem": dados["contagem"], "p50": dados["p50"], "p95": dados["p95"]}
+            for nome, dados in relatorio["estagios"].items()
+        },
+        "diretorio": diretorio if args.manter else None,
+    }
+
+
+# ------------------------ BASELINE ------------------------
+def cenario_chave(args):
+    """Parâmetros que definem o cenário; só resultados do mesmo cenário são comparáveis."""
+    return {
+        "modo": args.modo, "sites": args.sites, "grupos_por_site": args.grupos_por_site, "contas": args.contas,
+        "templates_png": args.templates_png, "templates_gif": args.templates_gif, "quantidade": str(args.quantidade),
+        "workers": args.workers, "latencia_drive": args.latencia_drive, "latencia_sheets": args.latencia_sheets,
+        "latencia_ads": args.latencia_ads, "limites_reais": args.limites_reais, "semente": args.semente,
+        "tamanhos": args.tamanhos, "cache_render": not args.sem_cache_render,
+    }
+
+
+def comparar(resultado, baseline, tolerancia):
+    """Lista as regressões do resultado em relação ao baseline.
+
+    Os estágios são comparados pela mediana, que varia bem menos entre
+    execuções do que o p95 (este só é exibido).
+    """
+    regressoes = []
+    if resultado["enviados"] != baseline["enviados"]:
+        # Com os mesmos dados sintéticos, um número diferente de envios é erro, não ruído
+        regressoes.append(f"{resultado['enviados']} criativos enviados (baseline {baseline['enviados']})")
+    minimo = baseline["criativos_por_segundo"] * (1 - tolerancia)
+    if resultado["criativos_por_segundo"] < minimo:
+        regressoes.append(f"criativos/s {resultado['criativos_por_segundo']:.2f} < {minimo:.2f} "
+                          f"(baseline {baseline['criativos_por_segundo']:.2f})")
+    for chave in ("rss_pico_mb", "rss_pico_workers_mb"):
+        maximo = baseline[chave] * (1 + tolerancia)
+        if resultado[chave] > maximo:
+            regressoes.append(f"{chave} {resultado[chave]:.1f} > {maximo:.1f} (baseline {baseline[chave]:.1f})")
+    for nome in ESTAGIOS_COMPARADOS:
+        antes, agora = baseline["estagios"].get(nome), resultado["estagios"].get(nome)
+        if not antes or not agora:
+            continue
+        maximo = antes["p50"] * (1 + tolerancia) + FOLGA_LATENCIA
+        if agora["p50"] > maximo:
+            regressoes.append(f"p50 de {nome} {agora['p50'] * 1000:.1f} ms > {maximo * 1000:.1f} ms "
+                              f"(baseline {antes['p50'] * 1000:.1f} ms)")
+    return regressoes
+
+
+def imprimir(resultado):
+    print(f"⏱️ {resultado['criativos']} criativos ({resultado['enviados']} enviados) em "
+          f"{resultado['duracao_segundos']:.2f}s: {resultado['criativos_por_segundo']:.2f} criativos/s")
+    print(f"🧠 Pico de RSS: {resultado['rss_pico_mb']:.1f} MB (processo), "
+          f"{resultado['rss_pico_workers_mb']:.1f} MB (maior worker)")
+    requisicoes = resultado["requisicoes"]
+    print(f"🌐 Requisições: Drive {requisicoes['drive']}, Sheets {requisicoes['sheets']}, Ads {requisicoes['ads']}")
+    print(f"{'estágio':<28} {'chamadas':>8} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for nome, dados in sorted(resultado["estagios"].items()):
+        print(f"{nome:<28} {dados['contagem']:>8} {dados['p50'] * 1000:>9.1f} {dados['p95'] * 1000:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do download, renderização e upload com serviços falsos.")
+    parser.add_argument("--modo", choices=["pipeline", "cli"], default="pipeline", help="Fluxo medido: modo interativo (pipeline) ou um grupo por vez (cli)")
+    parser.add_argument("--sites", type=int, default=4, help="Sites (cada um com a sua logo)")
+    parser.add_argument("--grupos-por-site", type=int, default=3, help="Grupos de anúncios por site")
+    parser.add_argument("--contas", type=int, default=3, help="Contas do Google Ads entre as quais os grupos são distribuídos")
+    parser.add_argument("--templates-png", type=int, default=6, help="Templates PNG por idioma")
+    parser.add_argument("--templates-gif", type=int, default=3, help="Templates GIF por idioma")
+    parser.add_argument("--quantidade", default="all", help="Criativos por grupo (número ou 'all')")
+    parser.add_argument("--workers", type=int, default=2, help="Processos de renderização")
+    parser.add_argument("--tamanhos", default="336x280", help="Formatos gerados de cada template (ex.: 336x280,300x250,728x90)")
+    parser.add_argument("--sem-cache-render", action="store_true", help="Renderiza todos os criativos, sem o cache de renderização")
+    parser.add_argument("--latencia-drive", type=float, default=0.02, help="Latência (s) de cada requisição ao Drive")
+    parser.add_argument("--latencia-sheets", type=float, default=0.05, help="Latência (s) de cada requisição ao Sheets")
+    parser.add_argument("--latencia-ads", type=float, default=0.05, help="Latência (s) de cada requisição ao Google Ads")
+    parser.add_argument("--limites-reais", action="store_true", help="Mantém os limites de quota do rate_limiter")
+    parser.add_argument("--semente", type=int, default=42, help="Semente dos dados sintéticos e dos sorteios")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO, help="Arquivo com os baselines (um por modo)")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava o resultado como o novo baseline do modo")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO, help="Piora máxima aceita (0.25 = 25%%)")
+    parser.add_argument("--saida", help="Grava o resultado em JSON neste arquivo")
+    parser.add_argument("--manter", action="store_true", help="Mantém o diretório temporário com os criativos gerados")
+    parser.add_argument("--verboso", action="store_true", help="Mostra a saída do main.py durante a execução")
+    args = parser.parse_args()
+    if args.sites * args.grupos_por_site < 2:
+        parser.error("o cenário precisa de pelo menos 2 grupos de anúncios")
+
+    resultado = executar(args)
+    imprimir(resultado)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    if args.salvar_baseline:
+        resultado.pop("diretorio", None)
+        baselines[args.modo] = resultado
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2)
+        print(f"✅ Baseline do modo {args.modo} salvo em {args.baseline}")
+        return
+
+    baseline = baselines.get(args.modo)
+    if baseline is None:
+        print(f"⚠️ Nenhum baseline para o modo {args.modo}; rode com --salvar-baseline para criá-lo.")
+        return
+    if baseline["cenario"] != resultado["cenario"]:
+        print("⚠️ O cenário é diferente do baseline; comparação ignorada.")
+        return
+    regressoes = comparar(resultado, baseline, args.tolerancia)
+    if regressoes:
+        for regressao in regressoes:
+            print(f"❌ Regressão: {regressao}")
+        raise SystemExit(1)
+    print(f"✅ Sem regressões em relação ao baseline (tolerância de {args.tolerancia:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
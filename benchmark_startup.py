@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+# ------------------------ BENCHMARK DA INICIALIZAÇÃO ------------------------
+# Mede quanto o main.py leva para subir: o tempo de `import main` (pelo
+# `python -X importtime`) e o tempo total de `python main.py --help`. O cron
+# roda o modo de linha de comando uma vez por grupo de anúncios, então esse
+# custo se repete centenas de vezes por noite. Acima do orçamento, ou se uma
+# dependência pesada voltar a ser importada no topo do main.py, encerra com erro;
+# também falha se o import ou o --help criarem arquivos (bancos SQLite, pastas).
+
+DIRETORIO_REPO = os.path.dirname(os.path.abspath(__file__))
+ORCAMENTO_IMPORT_SEGUNDOS = 0.15  # Tempo máximo de `import main` (cumulativo, medido pelo -X importtime)
+ORCAMENTO_HELP_SEGUNDOS = 0.5     # Tempo máximo (s) de `python main.py --help`, com o interpretador
+EXECUCOES_PADRAO = 5              # Execuções de cada medição (vale a melhor, a menos afetada por ruído)
+# Módulos que só podem ser carregados pelos caminhos que os usam, nunca pelo `import main`
+MODULOS_PESADOS = ("pandas", "numpy", "PIL", "google.ads.googleads", "grpc",
+                   "googleapiclient.discovery", "httplib2", "requests")
+
+
+def _rodar(comando, diretorio):
+    """Roda o comando em um diretório temporário (os bancos SQLite do main.py ficam no diretório atual)."""
+    ambiente = dict(os.environ, PYTHONPATH=DIRETORIO_REPO)
+    inicio = time.perf_counter()
+    resultado = subprocess.run(comando, cwd=diretorio, env=ambiente, capture_output=True, text=True)
+    duracao = time.perf_counter() - inicio
+    if resultado.returncode != 0:
+        raise RuntimeError(f"{' '.join(comando)} falhou:\n{resultado.stderr[-2000:]}")
+    return duracao, resultado
+
+
+def ler_importtime(saida):
+    """Converte a saída do -X importtime em [(modulo, proprio_us, cumulativo_us, nivel)]."""
+    linhas = []
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, cumulativo, nome = linha[len("import time:"):].split("|")
+        nivel = (len(nome) - len(nome.lstrip())) // 2
+        linhas.append((nome.strip(), int(proprio), int(cumulativo), nivel))
+    return linhas
+
+
+def medir_import(diretorio):
+    """Uma execução de `import main`: (segundos, módulos importados com os seus tempos)."""
+    _, resultado = _rodar([sys.executable, "-X", "importtime", "-c", "import main"], diretorio)
+    modulos = ler_importtime(resultado.stderr)
+    total = next(cumulativo for nome, _, cumulativo, nivel in modulos if nome == "main" and nivel == 0)
+    return total / 1e6, modulos
+
+
+def imports_do_main(modulos):
+    """Imports feitos diretamente pelo main.py (no -X importtime os filhos vêm antes do pai)."""
+    filhos = []
+    for nome, proprio, cumulativo, nivel in modulos:
+        if nivel == 0:
+            if nome == "main":
+                return filhos
+            filhos = []
+        elif nivel == 1:
+            filhos.append((nome, proprio, cumulativo, nivel))
+    return filhos
+
+
+def medir_help(diretorio):
+    duracao, _ = _rodar([sys.executable, os.path.join(DIRETORIO_REPO, "main.py"), "--help"], diretorio)
+    return duracao
+
+
+def modulos_pesados(modulos):
+    """Módulos de MODULOS_PESADOS (ou submódulos deles) presentes na lista."""
+    encontrados = set()
+    for nome, _, _, _ in modulos:
+        for pesado in MODULOS_PESADOS:
+            if nome == pesado or nome.startswith(pesado + "."):
+                encontrados.add(pesado)
+    return sorted(encontrados)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de inicialização do main.py.")
+    parser.add_argument("--execucoes", type=int, default=EXECUCOES_PADRAO, help="Execuções de cada medição (vale a melhor)")
+    parser.add_argument("--orcamento-import", type=float, default=ORCAMENTO_IMPORT_SEGUNDOS, help="Tempo máximo (s) de `import main`")
+    parser.add_argument("--orcamento-help", type=float, default=ORCAMENTO_HELP_SEGUNDOS, help="Tempo máximo (s) de `main.py --help`")
+    parser.add_argument("--top", type=int, default=10, help="Quantos imports mais lentos listar")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="benchmark-startup-") as diretorio:
+        # Primeira execução só aquece o cache do SO e os .pyc
+        _rodar([sys.executable, "-c", "import main"], diretorio)
+        medicoes = [medir_import(diretorio) for _ in range(max(1, args.execucoes))]
+        tempo_import, modulos = min(medicoes, key=lambda medicao: medicao[0])
+        tempo_help = min(medir_help(diretorio) for _ in range(max(1, args.execucoes)))
+        criados = sorted(os.listdir(diretorio))
+
+    print(f"⏱️ import main: {tempo_import * 1000:.1f} ms (orçamento {args.orcamento_import * 1000:.0f} ms)")
+    print(f"⏱️ main.py --help: {tempo_help * 1000:.1f} ms (orçamento {args.orcamento_help * 1000:.0f} ms)")
+    print(f"{'módulo':<40} {'cumulativo (ms)':>16}")
+    for nome, _, cumulativo, _ in sorted(imports_do_main(modulos), key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"{nome:<40} {cumulativo / 1000:>16.1f}")
+
+    falhas = []
+    if tempo_import > args.orcamento_import:
+        falhas.append(f"import main levou {tempo_import * 1000:.1f} ms (orçamento {args.orcamento_import * 1000:.0f} ms)")
+    if tempo_help > args.orcamento_help:
+        falhas.append(f"main.py --help levou {tempo_help * 1000:.1f} ms (orçamento {args.orcamento_help * 1000:.0f} ms)")
+    pesados = modulos_pesados(modulos)
+    if pesados:
+        falhas.append(f"import main carrega dependências pesadas: {', '.join(pesados)}")
+    if criados:
+        falhas.append(f"import main/--help criaram arquivos: {', '.join(criados)}")
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+    print("✅ Inicialização dentro do orçamento.")
+
+
+if __name__ == "__main__":
+    main()
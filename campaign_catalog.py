@@ -0,0 +1,92 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# ------------------------ CONFIGURAÇÕES DO CATÁLOGO ------------------------
+PADRAO_TAG = r"\[ - (.+?) - \]"   # Tag de tier no nome da campanha, ex.: "[ - T1 - ]"
+
+
+class CatalogoCampanhas:
+    """Linhas da planilha de campanhas com índices por país, campanha e tag.
+
+    Os índices mapeiam cada valor (normalizado em maiúsculas) para as posições
+    das linhas no DataFrame, então uma seleção como "BR,MX" ou "all T2" vira
+    algumas consultas a dicionários e uma união de arrays, sem percorrer a
+    planilha a cada item.
+    """
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        vazio = pd.Series([""] * len(self.df), dtype=object)
+        paises = self.df["País"].fillna("").astype(str).str.strip().str.upper() if "País" in self.df else vazio
+        campanhas = self.df["Campanha"].fillna("").astype(str) if "Campanha" in self.df else vazio
+        self._paises = pd.Series(np.arange(len(self.df))).groupby(paises.values).indices
+        self._campanhas = pd.Series(np.arange(len(self.df))).groupby(campanhas.values).indices
+        # explode mantém a posição da linha no índice, uma entrada por tag encontrada
+        tags = campanhas.str.findall(PADRAO_TAG).explode().dropna().str.strip().str.upper()
+        self._tags = {tag: np.unique(grupo.index.values) for tag, grupo in tags.groupby(tags.values)}
+
+    def __len__(self):
+        return len(self.df)
+
+    def todas(self):
+        return np.arange(len(self.df))
+
+    def linhas_pais(self, pais):
+        """Linhas cujo país contém `pais` (sem diferenciar maiúsculas), como o filtro antigo."""
+        pais = pais.strip().upper()
+        encontradas = [linhas for valor, linhas in self._paises.items() if pais in valor]
+        return np.unique(np.concatenate(encontradas)) if encontradas else np.array([], dtype=int)
+
+    def linhas_campanha(self, campanha):
+        return self._campanhas.get(campanha, np.array([], dtype=int))
+
+    def linhas_tag(self, tag):
+        return self._tags.get(tag.strip().upper(), np.array([], dtype=int))
+
+    def unir(self, *conjuntos, dentro_de=None):
+        """Une os conjuntos de linhas, opcionalmente restritos a `dentro_de`, em ordem de planilha."""
+        linhas = np.unique(np.concatenate(conjuntos)) if conjuntos else np.array([], dtype=int)
+        if dentro_de is not None:
+            linhas = np.intersect1d(linhas, dentro_de)
+        return linhas
+
+    def selecionar(self, *conjuntos, dentro_de=None):
+        """Como `unir`, mas retorna as linhas do DataFrame."""
+        return self.df.iloc[self.unir(*conjuntos, dentro_de=dentro_de)]
+
+
+def carregar_valores(caminho_cache, revisao, ler_valores):
+    """Retorna os valores da planilha, lendo-os da API só quando a revisão mudou.
+
+    `revisao` identifica a versão atual da planilha (o `version` do Drive);
+    com `revisao` None o cache é ignorado. `ler_valores()` busca a faixa na
+    API do Sheets e retorna a lista de linhas.
+    """
+    if revisao is not None and os.path.exists(caminho_cache):
+        try:
+            with open(caminho_cache, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            if cache.get("revisao") == revisao:
+                return cache["valores"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    valores = ler_valores()
+    if revisao is not None and valores:
+        temporario = caminho_cache + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"revisao": revisao, "valores": valores}, f, ensure_ascii=False)
+        os.replace(temporario, caminho_cache)
+    return valores
+
+
+def montar_dataframe(valores):
+    """Converte as linhas do Sheets (primeira linha = cabeçalho) em DataFrame."""
+    if not valores:
+        return None
+    cabecalho = valores[0]
+    # O Sheets omite células vazias no fim da linha; completa para o tamanho do cabeçalho
+    linhas = [linha + [None] * (len(cabecalho) - len(linha)) for linha in valores[1:]]
+    return pd.DataFrame(linhas, columns=cabecalho)
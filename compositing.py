@@ -0,0 +1,67 @@
+import numpy as np
+
+
+def logo_para_array(logo):
+    """Converte a logo (imagem RGBA) em array uint16 pronto para a mistura."""
+    return np.asarray(logo.convert("RGBA"), dtype=np.uint16)
+
+
+def empilhar(quadros):
+    """Empilha imagens RGBA de mesmo tamanho em um array (N, altura, largura, 4)."""
+    return np.stack([np.asarray(quadro, dtype=np.uint8) for quadro in quadros])
+
+
+def compor_logo_pillow(quadros, logo, posicao):
+    """Caminho de referência: `paste` da logo em cada quadro, um a um."""
+    for quadro in quadros:
+        quadro.paste(logo, posicao, logo)
+    return quadros
+
+
+def compor_logo_lote(quadros, logo_array, posicao):
+    """Aplica a logo em todos os quadros de uma vez, alterando o array no lugar.
+
+    `quadros` é um array uint8 (N, altura, largura, 4) e `logo_array` vem de
+    `logo_para_array`. Só o retângulo da logo é lido e escrito. A mistura usa a
+    mesma aritmética inteira do `Image.paste(logo, posicao, logo)` do Pillow
+    (alfa da logo como máscara nos quatro canais, arredondamento de /255 por
+    ((t >> 8) + t) >> 8), então o resultado é idêntico byte a byte.
+    """
+    x, y = posicao
+    altura, largura = logo_array.shape[:2]
+    regiao = quadros[:, y:y + altura, x:x + largura]
+    mascara = logo_array[..., 3:4]
+    # Cabe em uint16: no máximo 255 * 255 + 128 + 254
+    tmp = regiao * (255 - mascara) + logo_array * mascara + 128
+    regiao[...] = ((tmp >> 8) + tmp) >> 8
+    return quadros
+
+
+def compor_logo_lote_alterados(quadros, logo_array, posicao, regiao_anterior=None, patch_anterior=None):
+    """Como `compor_logo_lote`, mas só mistura os quadros cuja região sob a logo mudou.
+
+    Quadros com a mesma região do quadro anterior recebem o patch já composto
+    dele. Retorna (regiao_original_do_ultimo, patch_do_ultimo) para encadear o
+    próximo lote.
+    """
+    x, y = posicao
+    altura, largura = logo_array.shape[:2]
+    regioes = quadros[:, y:y + altura, x:x + largura]
+    originais = regioes.copy()
+    anteriores = np.concatenate([
+        originais[:1] if regiao_anterior is None else regiao_anterior[None], originais[:-1]
+    ])
+    alterados = np.any(originais != anteriores, axis=(1, 2, 3))
+    if regiao_anterior is None:
+        alterados[0] = True
+    indices = np.flatnonzero(alterados)
+    if indices.size == len(quadros):
+        compor_logo_lote(quadros, logo_array, posicao)
+    elif indices.size:
+        # quadros[indices] é uma cópia: devolve as regiões compostas ao array original
+        sub = quadros[indices]
+        compor_logo_lote(sub, logo_array, posicao)
+        regioes[indices] = sub[:, y:y + altura, x:x + largura]
+    for i in np.flatnonzero(~alterados):
+        regioes[i] = patch_anterior if i == 0 else regioes[i - 1]
+    return originais[-1], regioes[-1].copy()
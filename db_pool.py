@@ -0,0 +1,107 @@
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+import pymysql
+import pymysql.cursors
+
+# ------------------------ CONFIGURAÇÕES DO BANCO ------------------------
+DB_POOL_TAMANHO = 4        # Conexões mantidas abertas e reaproveitadas
+DB_TAMANHO_LOTE = 1000     # Linhas lidas do servidor por vez nos cursores de streaming
+
+
+class ConnectionPool:
+    """Pool de conexões pymysql reaproveitadas entre consultas e threads.
+
+    As conexões são criadas sob demanda até `tamanho` e devolvidas ao pool
+    depois de cada uso; antes de reaproveitar uma conexão ela é testada com
+    `ping(reconnect=True)`. `fabrica` permite trocar o `pymysql.connect` por
+    outra função (um servidor local de teste, por exemplo).
+    """
+
+    def __init__(self, tamanho=DB_POOL_TAMANHO, fabrica=None, **config):
+        self.tamanho = tamanho
+        self._fabrica = fabrica or (lambda: pymysql.connect(**config))
+        self._livres = queue.LifoQueue()
+        self._criadas = 0
+        self._lock = threading.Lock()
+        atexit.register(self.fechar)
+
+    def _obter(self):
+        while True:
+            try:
+                conexao = self._livres.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    criar = self._criadas < self.tamanho
+                    if criar:
+                        self._criadas += 1
+                if criar:
+                    try:
+                        return self._fabrica()
+                    except Exception:
+                        with self._lock:
+                            self._criadas -= 1
+                        raise
+                try:
+                    # Pool cheio: espera alguém devolver uma conexão. O timeout
+                    # cobre o caso de uma conexão ser descartada em vez de devolvida
+                    conexao = self._livres.get(timeout=1)
+                except queue.Empty:
+                    continue
+            conexao.ping(reconnect=True)
+            return conexao
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool (devolvida ao sair do bloco)."""
+        conexao = self._obter()
+        concluido = False
+        try:
+            yield conexao
+            concluido = True
+        finally:
+            if concluido:
+                self._livres.put(conexao)
+            else:
+                # Estado desconhecido (transação pela metade, cursor aberto): descarta a conexão
+                self._descartar(conexao)
+
+    def _descartar(self, conexao):
+        with self._lock:
+            self._criadas -= 1
+        try:
+            conexao.close()
+        except Exception:
+            pass
+
+    def fechar(self):
+        """Fecha as conexões livres do pool."""
+        while True:
+            try:
+                conexao = self._livres.get_nowait()
+            except queue.Empty:
+                return
+            self._descartar(conexao)
+
+
+def ler_em_lotes(pool, sql, params=None, tamanho_lote=DB_TAMANHO_LOTE):
+    """Executa uma consulta parametrizada e gera as linhas em lotes (listas).
+
+    Usa um cursor do lado do servidor (SSCursor), então as linhas chegam aos
+    poucos e quem consome o gerador já pode trabalhar nos primeiros lotes
+    enquanto o restante ainda está sendo lido. A conexão fica emprestada até
+    o gerador terminar (ou ser fechado).
+    """
+    with pool.conexao() as conexao:
+        cursor = conexao.cursor(pymysql.cursors.SSCursor)
+        try:
+            cursor.execute(sql, params)
+            while True:
+                lote = cursor.fetchmany(tamanho_lote)
+                if not lote:
+                    break
+                yield lote
+        finally:
+            # Em um SSCursor o close descarta as linhas que não foram lidas
+            cursor.close()
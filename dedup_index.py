@@ -0,0 +1,159 @@
+import io
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# ------------------------ CONFIGURAÇÕES DE DEDUPLICAÇÃO ------------------------
+HASH_LADO = 8               # dHash de 8x8 = 64 bits
+LIMIAR_HAMMING_PADRAO = 6   # Distância máxima (bits) para considerar dois criativos iguais
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    escopo TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    origem TEXT NOT NULL,
+    atualizado REAL NOT NULL,
+    dimensoes TEXT,
+    PRIMARY KEY (escopo, chave)
+);
+"""
+
+
+@contextmanager
+def _abrir(imagem):
+    """Abre caminhos e bytes, fechando o arquivo ao sair; imagens já abertas são usadas como estão."""
+    from PIL import Image
+    if isinstance(imagem, Image.Image):
+        yield imagem
+        return
+    with Image.open(io.BytesIO(imagem) if isinstance(imagem, (bytes, bytearray)) else imagem) as aberta:
+        yield aberta
+
+
+def hash_perceptual(imagem):
+    """Calcula o dHash (64 bits) de uma imagem, caminho ou bytes.
+
+    Para GIFs é usado o primeiro quadro. A imagem é reduzida para escala de
+    cinza 9x8 e cada bit indica se um pixel é mais claro que o vizinho da
+    direita, o que sobrevive a recompressão, paleta e pequenos ajustes.
+    """
+    from PIL import Image
+    with _abrir(imagem) as imagem:
+        cinza = imagem.convert("L").resize((HASH_LADO + 1, HASH_LADO), Image.Resampling.LANCZOS)
+    pixels = cinza.tobytes()
+    valor = 0
+    for linha in range(HASH_LADO):
+        inicio = linha * (HASH_LADO + 1)
+        for coluna in range(HASH_LADO):
+            valor = (valor << 1) | (pixels[inicio + coluna] > pixels[inicio + coluna + 1])
+    return valor
+
+
+def assinatura(imagem):
+    """Retorna (hash perceptual, "LARGURAxALTURA") de uma imagem, caminho ou bytes."""
+    with _abrir(imagem) as imagem:
+        return hash_perceptual(imagem), f"{imagem.size[0]}x{imagem.size[1]}"
+
+
+def distancia(hash_a, hash_b):
+    """Distância de Hamming entre dois hashes."""
+    return bin(hash_a ^ hash_b).count("1")
+
+
+class DedupIndex:
+    """Índice local (SQLite) de hashes perceptuais por grupo de anúncios.
+
+    Cada escopo (um grupo de anúncios) guarda os hashes dos anúncios de imagem
+    ativos e dos criativos enviados, chaveados pelo resource name do anúncio.
+    O índice persiste entre execuções: anúncios ativos só são baixados para
+    calcular o hash na primeira vez em que aparecem. Cada hash guarda as
+    dimensões da imagem, e só criativos do mesmo tamanho são comparados: o
+    mesmo template em 336x280 e 300x250 são anúncios diferentes.
+    """
+
+    def __init__(self, caminho_db, limiar=LIMIAR_HAMMING_PADRAO):
+        self.limiar = limiar
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(caminho_db, check_same_thread=False)
+        self._db.executescript(ESQUEMA)
+        colunas = {linha[1] for linha in self._db.execute("PRAGMA table_info(hashes)")}
+        if "dimensoes" not in colunas:
+            # Índice criado antes das dimensões: os hashes antigos valem para qualquer tamanho
+            with self._db:
+                self._db.execute("ALTER TABLE hashes ADD COLUMN dimensoes TEXT")
+
+    def hashes(self, escopo):
+        """Retorna {chave: hash} do escopo."""
+        with self._lock:
+            rows = self._db.execute("SELECT chave, hash FROM hashes WHERE escopo = ?", (escopo,)).fetchall()
+        return {chave: int(valor, 16) for chave, valor in rows}
+
+    def _entradas(self, escopo):
+        """Retorna [(chave, hash, dimensoes)] do escopo."""
+        with self._lock:
+            rows = self._db.execute("SELECT chave, hash, dimensoes FROM hashes WHERE escopo = ?", (escopo,)).fetchall()
+        return [(chave, int(valor, 16), dimensoes) for chave, valor, dimensoes in rows]
+
+    def registrar(self, escopo, chave, valor, origem, dimensoes=None):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO hashes (escopo, chave, hash, origem, atualizado, dimensoes) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (escopo, chave, format(valor, "016x"), origem, time.time(), dimensoes)
+            )
+
+    def sincronizar_ativos(self, escopo, ativos, baixar):
+        """Alinha o escopo com os anúncios de imagem ativos.
+
+        `ativos` é {resource_name: url_da_imagem}. Anúncios que deixaram de
+        estar ativos saem do índice; os novos são baixados com `baixar(url)`
+        (que retorna bytes) e têm o hash calculado. Anúncios registrados antes
+        das dimensões serem guardadas são baixados de novo uma vez, para
+        ganharem as dimensões. Retorna quantos foram baixados.
+        """
+        entradas = self._entradas(escopo)
+        with self._lock, self._db:
+            for chave in {chave for chave, _, _ in entradas} - set(ativos):
+                self._db.execute("DELETE FROM hashes WHERE escopo = ? AND chave = ?", (escopo, chave))
+        conhecidos = {chave for chave, _, dimensoes in entradas if dimensoes is not None}
+        baixados = 0
+        for chave, url in ativos.items():
+            if chave in conhecidos or not url:
+                continue
+            try:
+                valor, dimensoes = assinatura(baixar(url))
+                self.registrar(escopo, chave, valor, "ativo", dimensoes)
+                baixados += 1
+            except Exception as ex:
+                print(f"⚠️ Não foi possível calcular o hash do anúncio {chave}: {ex}")
+        return baixados
+
+    def filtrar(self, escopo, caminhos):
+        """Separa os criativos novos dos quase duplicados.
+
+        Compara cada criativo com o índice do escopo e com os criativos já
+        aceitos na mesma chamada, do mesmo tamanho (hashes antigos, sem
+        dimensões, valem para todos). Retorna (novos, duplicados), em que
+        `novos` é [(caminho, hash, dimensoes)] e `duplicados` é
+        [(caminho, chave_parecida, distancia)]. Nada é gravado: os hashes só
+        entram no índice via `registrar` depois que o envio dá certo.
+        """
+        existentes = self._entradas(escopo)
+        novos, duplicados = [], []
+        for caminho in caminhos:
+            valor, dimensoes = assinatura(caminho)
+            parecido = None
+            for chave, outro, outras_dimensoes in existentes:
+                if outras_dimensoes is not None and outras_dimensoes != dimensoes:
+                    continue
+                d = distancia(valor, outro)
+                if d <= self.limiar and (parecido is None or d < parecido[1]):
+                    parecido = (chave, d)
+            if parecido is not None:
+                duplicados.append((caminho, parecido[0], parecido[1]))
+            else:
+                novos.append((caminho, valor, dimensoes))
+                existentes.append((caminho, valor, dimensoes))
+        return novos, duplicados
@@ -0,0 +1,239 @@
+import os
+import hashlib
+import threading
+import rate_limiter
+
+# ------------------------ CONFIGURAÇÕES DO CLIENTE ------------------------
+DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
+DRIVE_PAGE_SIZE = 1000      # Máximo permitido pelo Drive em files().list
+DRIVE_BATCH_SIZE = 100      # Máximo de chamadas por requisição batch do Drive
+DRIVE_HTTP_TIMEOUT = 60     # Timeout (s) das conexões HTTP com o Drive
+DRIVE_CHUNK_BYTES = 8 * 1024 * 1024  # Bytes pedidos por requisição (cabeçalho Range) nos downloads
+
+
+class DownloadDivergente(Exception):
+    """O arquivo baixado não confere com o esperado (checksum ou tamanho)."""
+
+
+class DriveClient:
+    """Cliente de longa duração para o Google Drive.
+
+    O serviço de discovery é construído uma única vez e reaproveitado por
+    todas as chamadas. Como o httplib2 não é thread-safe, cada thread recebe a
+    sua própria conexão autorizada (reutilizada entre as requisições daquela
+    thread), o que permite usar o mesmo cliente em pools de threads.
+
+    O googleapiclient e o httplib2 só são importados na primeira chamada, e o
+    documento de discovery do Drive vem da cópia empacotada com a biblioteca
+    (static_discovery), sem consulta à rede.
+    """
+
+    def __init__(self, credenciais_path, scopes=None):
+        self.credenciais_path = credenciais_path
+        self.scopes = scopes or DRIVE_SCOPES
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._credenciais = None
+        self._service = None
+
+    # ------------------------ CONEXÃO ------------------------
+    def http(self):
+        """Retorna a conexão autorizada da thread atual."""
+        http = getattr(self._local, "http", None)
+        if http is None:
+            import httplib2
+            import google_auth_httplib2
+            http = google_auth_httplib2.AuthorizedHttp(
+                self._credenciais, http=httplib2.Http(timeout=DRIVE_HTTP_TIMEOUT)
+            )
+            self._local.http = http
+        return http
+
+    def _request_builder(self, _http, *args, **kwargs):
+        # Ignora a conexão do build() e usa a conexão da thread que executa a chamada
+        from googleapiclient.http import HttpRequest
+        return HttpRequest(self.http(), *args, **kwargs)
+
+    @property
+    def service(self):
+        """Serviço do Drive, construído na primeira utilização."""
+        if self._service is None:
+            with self._lock:
+                if self._service is None:
+                    from google.oauth2 import service_account
+                    from googleapiclient.discovery import build
+                    self._credenciais = service_account.Credentials.from_service_account_file(
+                        self.credenciais_path, scopes=self.scopes
+                    )
+                    self._service = build(
+                        'drive', 'v3',
+                        http=self.http(),
+                        requestBuilder=self._request_builder,
+                        static_discovery=True,
+                        cache_discovery=False
+                    )
+        return self._service
+
+    @staticmethod
+    def executar(request):
+        """Executa uma requisição respeitando o limite do Drive e refazendo erros temporários."""
+        return rate_limiter.executar(request.execute, api="drive")
+
+    # ------------------------ CONSULTAS ------------------------
+    def listar(self, q, fields="id, name, mimeType", page_size=DRIVE_PAGE_SIZE, limite=None):
+        """Lista arquivos que atendem à query, percorrendo todas as páginas (nextPageToken)."""
+        page_token = None
+        encontrados = 0
+        while True:
+            tamanho = page_size if limite is None else min(page_size, limite - encontrados)
+            response = self.executar(self.service.files().list(
+                q=q,
+                fields=f"nextPageToken, files({fields})",
+                pageSize=tamanho,
+                pageToken=page_token
+            ))
+            for arquivo in response.get('files', []):
+                yield arquivo
+                encontrados += 1
+            page_token = response.get('nextPageToken')
+            if not page_token or (limite is not None and encontrados >= limite):
+                return
+
+    def obter_metadados(self, file_ids, fields="id, name, mimeType, md5Checksum, modifiedTime"):
+        """Obtém metadados de vários arquivos agrupando as chamadas em requisições batch.
+
+        Retorna um dicionário {file_id: metadados}; arquivos com erro (removidos,
+        sem permissão) ficam de fora do resultado.
+        """
+        file_ids = list(dict.fromkeys(file_ids))
+        metadados = {}
+
+        def callback(request_id, response, exception):
+            if exception is None:
+                metadados[request_id] = response
+            else:
+                print(f"⚠️ Erro ao obter metadados do arquivo {request_id}: {exception}")
+
+        for inicio in range(0, len(file_ids), DRIVE_BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for file_id in file_ids[inicio:inicio + DRIVE_BATCH_SIZE]:
+                batch.add(self.service.files().get(fileId=file_id, fields=fields), request_id=file_id)
+            rate_limiter.executar(batch.execute, api="drive", http=self.http())
+        return metadados
+
+    def listar_filhos(self, folder_id, fields="id, name, mimeType"):
+        """Lista todos os itens (não excluídos) de uma pasta do Drive."""
+        return self.listar(f"'{folder_id}' in parents and trashed = false", fields=fields)
+
+    # ------------------------ FEED DE MUDANÇAS ------------------------
+    def token_inicial_mudancas(self):
+        """Retorna o token a partir do qual o feed changes.list deve ser lido."""
+        return self.executar(self.service.changes().getStartPageToken())['startPageToken']
+
+    def listar_mudancas(self, page_token, fields="id, name, mimeType"):
+        """Lê o feed changes.list a partir de `page_token`.
+
+        Retorna (mudancas, novo_token), onde `novo_token` deve ser guardado para
+        a próxima sincronização.
+        """
+        mudancas = []
+        while True:
+            response = self.executar(self.service.changes().list(
+                pageToken=page_token,
+                fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({fields}))",
+                pageSize=DRIVE_PAGE_SIZE,
+                includeRemoved=True,
+                spaces='drive'
+            ))
+            mudancas.extend(response.get('changes', []))
+            if 'newStartPageToken' in response:
+                return mudancas, response['newStartPageToken']
+            page_token = response['nextPageToken']
+
+
+# ------------------------ DOWNLOAD DE MÍDIA ------------------------
+def _executar_direto(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def _requisitar_faixa(request, headers):
+    resp, conteudo = request.http.request(request.uri, "GET", headers=dict(headers))
+    if resp.status not in (200, 206, 416):
+        # Vira exceção aqui para que `executar` possa refazer 429/5xx
+        from googleapiclient.errors import HttpError
+        raise HttpError(resp, conteudo, uri=request.uri)
+    return resp, conteudo
+
+
+def baixar_midia(request, destino, chunk=DRIVE_CHUNK_BYTES, inicio=0, md5=None, executar=_executar_direto):
+    """Baixa a mídia de um files().get_media em `destino`, um pedaço por vez.
+
+    `destino` é qualquer objeto com write (arquivo aberto, BytesIO, buffer do
+    chamador); cada pedaço de até `chunk` bytes (cabeçalho Range) é escrito
+    assim que chega, sem acumular o arquivo em memória. Com `inicio`, o
+    download continua desse byte, e `md5` deve trazer o hash do que já está
+    em `destino`. `executar(func, *args)` envolve cada requisição (rate
+    limiter e retentativas). Retorna (md5, tamanho, recebidos, requisicoes),
+    em que `recebidos` são os bytes trazidos nesta chamada.
+    """
+    md5 = md5 or hashlib.md5()
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in ("accept", "accept-encoding", "user-agent")}
+    posicao, total, recebidos, requisicoes = inicio, None, 0, 0
+    while total is None or posicao < total:
+        headers["range"] = f"bytes={posicao}-{posicao + chunk - 1}"
+        resp, conteudo = executar(_requisitar_faixa, request, headers)
+        requisicoes += 1
+        if resp.status == 416:
+            # Faixa além do fim: o que já foi baixado precisa ter exatamente o tamanho do arquivo
+            total = int(resp["content-range"].rsplit("/", 1)[1])
+            if total != posicao:
+                raise DownloadDivergente(f"download parcial com {posicao} bytes, mas o arquivo tem {total}")
+            break
+        if resp.status == 200 and posicao:
+            # O servidor ignorou o Range e mandou o arquivo inteiro: recomeça do zero
+            destino.seek(0)
+            destino.truncate()
+            md5 = hashlib.md5()
+            posicao = 0
+        destino.write(conteudo)
+        md5.update(conteudo)
+        posicao += len(conteudo)
+        recebidos += len(conteudo)
+        if resp.status == 206 and "content-range" in resp:
+            total = int(resp["content-range"].rsplit("/", 1)[1])
+        elif resp.status == 200 or not conteudo:
+            total = posicao
+    return md5, posicao, recebidos, requisicoes
+
+
+def baixar_arquivo(request, caminho, md5_esperado=None, chunk=DRIVE_CHUNK_BYTES, executar=_executar_direto):
+    """Baixa a mídia para `caminho` de forma atômica e retomável.
+
+    Os pedaços são gravados em `caminho`.part, que só é renomeado para
+    `caminho` depois de completo (e conferido com `md5_esperado`, quando
+    informado). Um .part deixado por um download interrompido é retomado com
+    Range a partir do tamanho dele; se a parte retomada não conferir (o
+    arquivo mudou no Drive), o download recomeça do zero. Retorna
+    (md5, bytes baixados nesta chamada, requisicoes).
+    """
+    parcial = f"{caminho}.part"
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    while True:
+        inicio = os.path.getsize(parcial) if os.path.exists(parcial) else 0
+        md5 = hashlib.md5()
+        try:
+            with open(parcial, "r+b" if inicio else "w+b") as f:
+                for bloco in iter(lambda: f.read(1024 * 1024), b""):
+                    md5.update(bloco)
+                md5, _, recebidos, requisicoes = baixar_midia(request, f, chunk, inicio, md5, executar)
+            if md5_esperado and md5.hexdigest() != md5_esperado:
+                raise DownloadDivergente(f"checksum {md5.hexdigest()} diferente do esperado {md5_esperado}")
+        except DownloadDivergente:
+            os.remove(parcial)
+            if not inicio:
+                raise
+            continue
+        os.replace(parcial, caminho)
+        return md5.hexdigest(), recebidos, requisicoes
@@ -0,0 +1,167 @@
+import sqlite3
+import threading
+from collections import deque
+
+# ------------------------ CONFIGURAÇÕES DO MANIFESTO ------------------------
+MIME_PASTA = "application/vnd.google-apps.folder"
+CAMPOS_ARQUIVO = "id, name, mimeType, md5Checksum, modifiedTime, size, parents, trashed"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS arquivos (
+    id TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    mime_type TEXT NOT NULL,
+    pai TEXT NOT NULL,
+    md5 TEXT,
+    modificado TEXT,
+    tamanho INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_arquivos_pai_nome ON arquivos (pai, nome);
+CREATE INDEX IF NOT EXISTS idx_arquivos_pai_mime ON arquivos (pai, mime_type);
+CREATE TABLE IF NOT EXISTS estado (
+    chave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+
+class DriveManifest:
+    """Espelho local (SQLite) das árvores de pastas do Drive usadas pelo projeto.
+
+    O manifesto é montado uma única vez percorrendo as pastas raiz e depois é
+    mantido atualizado pelo feed `changes.list`, guardando o page token entre
+    execuções. Assim a resolução de pastas de idioma/tag e a listagem de
+    templates viram consultas locais.
+
+    `drive` precisa oferecer apenas `listar_filhos(folder_id, fields)`,
+    `token_inicial_mudancas()` e `listar_mudancas(page_token, fields)` (como o
+    DriveClient), o que permite usar um Drive falso em memória nos testes.
+    """
+
+    def __init__(self, caminho_db, drive, raizes):
+        self.drive = drive
+        self.raizes = [r for r in raizes if r]
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(caminho_db, check_same_thread=False)
+        self._db.executescript(ESQUEMA)
+
+    # ------------------------ ESTADO ------------------------
+    def _estado(self, chave):
+        row = self._db.execute("SELECT valor FROM estado WHERE chave = ?", (chave,)).fetchone()
+        return row[0] if row else None
+
+    def _gravar_estado(self, chave, valor):
+        self._db.execute("INSERT OR REPLACE INTO estado (chave, valor) VALUES (?, ?)", (chave, valor))
+
+    # ------------------------ CONSTRUÇÃO ------------------------
+    def _gravar_arquivo(self, arquivo, pai):
+        self._db.execute(
+            "INSERT OR REPLACE INTO arquivos (id, nome, mime_type, pai, md5, modificado, tamanho) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (arquivo['id'], arquivo['name'], arquivo['mimeType'], pai, arquivo.get('md5Checksum'),
+             arquivo.get('modifiedTime'), int(arquivo['size']) if arquivo.get('size') else None)
+        )
+
+    def _percorrer(self, pastas):
+        """Lista recursivamente as pastas informadas, gravando tudo no manifesto."""
+        fila = deque(pastas)
+        while fila:
+            pasta_id = fila.popleft()
+            for arquivo in self.drive.listar_filhos(pasta_id, fields=CAMPOS_ARQUIVO):
+                self._gravar_arquivo(arquivo, pasta_id)
+                if arquivo['mimeType'] == MIME_PASTA:
+                    fila.append(arquivo['id'])
+
+    def construir(self):
+        """Reconstrói o manifesto do zero a partir das pastas raiz."""
+        with self._lock, self._db:
+            # O token é obtido antes da varredura para não perder mudanças feitas durante ela
+            token = self.drive.token_inicial_mudancas()
+            self._db.execute("DELETE FROM arquivos")
+            self._percorrer(self.raizes)
+            self._gravar_estado("page_token", token)
+            self._gravar_estado("raizes", ",".join(self.raizes))
+
+    def _remover_recursivo(self, file_id):
+        pendentes = [file_id]
+        while pendentes:
+            atual = pendentes.pop()
+            pendentes.extend(r[0] for r in self._db.execute("SELECT id FROM arquivos WHERE pai = ?", (atual,)))
+            self._db.execute("DELETE FROM arquivos WHERE id = ?", (atual,))
+
+    def _pasta_conhecida(self, pasta_id):
+        if pasta_id in self.raizes:
+            return True
+        row = self._db.execute(
+            "SELECT 1 FROM arquivos WHERE id = ? AND mime_type = ?", (pasta_id, MIME_PASTA)
+        ).fetchone()
+        return row is not None
+
+    def sincronizar(self):
+        """Aplica as mudanças do Drive desde a última sincronização.
+
+        Retorna a quantidade de mudanças aplicadas, ou None se o manifesto
+        precisou ser reconstruído.
+        """
+        token = self._estado("page_token")
+        if not token or self._estado("raizes") != ",".join(self.raizes):
+            self.construir()
+            return None
+
+        mudancas, novo_token = self.drive.listar_mudancas(token, fields=CAMPOS_ARQUIVO)
+        with self._lock, self._db:
+            for mudanca in mudancas:
+                arquivo = mudanca.get('file')
+                file_id = mudanca['fileId']
+                conhecido = self._db.execute("SELECT mime_type FROM arquivos WHERE id = ?", (file_id,)).fetchone()
+                if mudanca.get('removed') or not arquivo or arquivo.get('trashed'):
+                    self._remover_recursivo(file_id)
+                    continue
+                pai = next((p for p in arquivo.get('parents', []) if self._pasta_conhecida(p)), None)
+                if pai is None:
+                    # Saiu (ou nunca fez parte) das árvores acompanhadas
+                    self._remover_recursivo(file_id)
+                    continue
+                self._gravar_arquivo(arquivo, pai)
+                if arquivo['mimeType'] == MIME_PASTA and conhecido is None:
+                    # Pasta movida para dentro da árvore: o feed não traz o conteúdo dela
+                    self._percorrer([file_id])
+            self._gravar_estado("page_token", novo_token)
+        return len(mudancas)
+
+    # ------------------------ CONSULTAS ------------------------
+    def buscar_pasta(self, pai, nome):
+        """Retorna o ID da subpasta `nome` de `pai`, ou None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id FROM arquivos WHERE pai = ? AND nome = ? AND mime_type = ? ORDER BY id LIMIT 1",
+                (pai, nome, MIME_PASTA)
+            ).fetchone()
+        return row[0] if row else None
+
+    def listar_arquivos(self, pai, mime_types=None, nome=None):
+        """Lista os arquivos de uma pasta no mesmo formato devolvido pelo Drive.
+
+        `nome`, quando informado, é comparado sem diferenciar maiúsculas.
+        """
+        query = "SELECT id, nome, mime_type, md5, modificado, tamanho FROM arquivos WHERE pai = ?"
+        params = [pai]
+        if mime_types:
+            query += f" AND mime_type IN ({', '.join('?' for _ in mime_types)})"
+            params.extend(mime_types)
+        if nome is not None:
+            query += " AND nome = ? COLLATE NOCASE"
+            params.append(nome)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY nome, id", params).fetchall()
+        arquivos = []
+        for file_id, nome_arquivo, mime_type, md5, modificado, tamanho in rows:
+            arquivo = {"id": file_id, "name": nome_arquivo, "mimeType": mime_type}
+            if md5:
+                arquivo["md5Checksum"] = md5
+            if modificado:
+                arquivo["modifiedTime"] = modificado
+            if tamanho is not None:
+                arquivo["size"] = str(tamanho)
+            arquivos.append(arquivo)
+        return arquivos
@@ -0,0 +1,93 @@
+import io
+import os
+import json
+from PIL import Image
+
+# ------------------------ CONFIGURAÇÕES DO ENCODER ------------------------
+ADS_LIMITE_BYTES = 150 * 1024   # Tamanho máximo aceito pelo Google Ads para anúncios de imagem
+PRESET_PADRAO = "equilibrado"
+REGISTRO_ARQUIVO = "codificacao.jsonl"  # Configuração escolhida para cada criativo, por pasta
+
+# Escadas de tentativas, da mais barata para a mais agressiva. A primeira que
+# couber no orçamento é usada. "cores" quantiza para paleta; "qualidade" é JPEG.
+PRESETS = {
+    "rapido": [
+        {"formato": "PNG", "compress_level": 1},
+        {"formato": "PNG", "compress_level": 1, "cores": 256},
+        {"formato": "JPEG", "qualidade": 85},
+        {"formato": "JPEG", "qualidade": 70},
+    ],
+    "equilibrado": [
+        {"formato": "PNG", "compress_level": 6},
+        {"formato": "PNG", "compress_level": 6, "cores": 256},
+        {"formato": "PNG", "compress_level": 9, "cores": 128},
+        {"formato": "JPEG", "qualidade": 90},
+        {"formato": "JPEG", "qualidade": 80},
+        {"formato": "JPEG", "qualidade": 70},
+    ],
+    "compacto": [
+        {"formato": "PNG", "compress_level": 9, "optimize": True},
+        {"formato": "PNG", "compress_level": 9, "optimize": True, "cores": 256},
+        {"formato": "PNG", "compress_level": 9, "optimize": True, "cores": 128},
+        {"formato": "PNG", "compress_level": 9, "optimize": True, "cores": 64},
+        {"formato": "JPEG", "qualidade": 85, "optimize": True},
+        {"formato": "JPEG", "qualidade": 75, "optimize": True},
+        {"formato": "JPEG", "qualidade": 65, "optimize": True},
+        {"formato": "JPEG", "qualidade": 55, "optimize": True},
+    ],
+}
+
+EXTENSOES = {"PNG": ".png", "JPEG": ".jpg"}
+
+
+def _codificar(image, tentativa):
+    buffer = io.BytesIO()
+    if tentativa["formato"] == "JPEG":
+        image.convert("RGB").save(
+            buffer, format="JPEG", quality=tentativa["qualidade"], optimize=tentativa.get("optimize", False)
+        )
+    else:
+        imagem = image.convert("RGB")
+        if tentativa.get("cores"):
+            imagem = imagem.quantize(colors=tentativa["cores"], method=Image.Quantize.FASTOCTREE)
+        imagem.save(
+            buffer, format="PNG", compress_level=tentativa["compress_level"], optimize=tentativa.get("optimize", False)
+        )
+    return buffer.getvalue()
+
+
+def codificar(image, orcamento=ADS_LIMITE_BYTES, preset=PRESET_PADRAO):
+    """Codifica a imagem com a configuração mais barata do preset que caiba no orçamento.
+
+    Retorna (dados, configuracao). Se nenhuma tentativa couber, devolve a menor
+    delas com `"dentro_do_orcamento": False`.
+    """
+    menor = None
+    for tentativa in PRESETS[preset]:
+        dados = _codificar(image, tentativa)
+        configuracao = dict(tentativa, bytes=len(dados), preset=preset)
+        if orcamento is None or len(dados) <= orcamento:
+            configuracao["dentro_do_orcamento"] = True
+            return dados, configuracao
+        if menor is None or len(dados) < len(menor[0]):
+            menor = (dados, configuracao)
+    menor[1]["dentro_do_orcamento"] = False
+    return menor
+
+
+def gravar(image, output_path, orcamento=ADS_LIMITE_BYTES, preset=PRESET_PADRAO):
+    """Codifica dentro do orçamento e grava o arquivo, ajustando a extensão ao formato escolhido.
+
+    A configuração usada é registrada em REGISTRO_ARQUIVO na pasta do criativo.
+    Retorna (caminho_final, configuracao).
+    """
+    dados, configuracao = codificar(image, orcamento, preset)
+    output_path = os.path.splitext(output_path)[0] + EXTENSOES[configuracao["formato"]]
+    with open(output_path, "wb") as f:
+        f.write(dados)
+    if not configuracao["dentro_do_orcamento"]:
+        print(f"⚠️ {os.path.basename(output_path)} ficou com {len(dados)} bytes, acima do limite de {orcamento}.")
+    registro = dict(configuracao, arquivo=os.path.basename(output_path))
+    with open(os.path.join(os.path.dirname(output_path) or ".", REGISTRO_ARQUIVO), "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro) + "\n")
+    return output_path, configuracao
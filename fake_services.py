@@ -0,0 +1,376 @@
+import re
+import time
+import hashlib
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+import httplib2
+
+# ------------------------ SERVIÇOS FALSOS (EM MEMÓRIA) ------------------------
+# Drive, Sheets e Google Ads falsos, com latência configurável, usados pelo
+# benchmark para exercitar o código real de download, renderização e upload
+# sem acessar os serviços do Google.
+
+MIME_PASTA = "application/vnd.google-apps.folder"
+
+
+def _pausa(segundos):
+    if segundos:
+        time.sleep(segundos)
+
+
+class FakeDrive:
+    """Drive em memória com a interface do DriveClient.
+
+    Serve também como o próprio `service` (files().get_media), e os downloads
+    passam pelo `baixar_midia`/`baixar_arquivo` de verdade: cada pedaço é uma
+    requisição HTTP falsa com cabeçalho Range (206 com Content-Range, 416 além
+    do fim), o que exercita a retomada do .part e a conferência do MD5.
+    `latencia` é a espera (s) de cada requisição.
+
+    Criar, mover e excluir itens alimenta o feed de mudanças: o page token é a
+    posição no histórico, e `listar_mudancas` devolve uma mudança por item
+    alterado desde ele, com o estado atual do item (como o changes.list).
+    """
+
+    def __init__(self, latencia=0.0):
+        self.latencia = latencia
+        self.arquivos = {}
+        self.conteudos = {}
+        self.filhos = defaultdict(list)
+        self.excluidos = set()
+        self.historico = []  # IDs alterados, em ordem; o page token é uma posição nesta lista
+        self.requisicoes = 0
+        self.bytes_servidos = 0
+        self._proximo_id = 0
+        self._lock = threading.Lock()
+
+    # ------------------------ MONTAGEM ------------------------
+    def _novo_id(self, prefixo):
+        self._proximo_id += 1
+        return f"{prefixo}{self._proximo_id:06d}"
+
+    def criar_pasta(self, nome, pai=None):
+        file_id = self._novo_id("pasta")
+        self.arquivos[file_id] = {"id": file_id, "name": nome, "mimeType": MIME_PASTA, "parents": [pai] if pai else []}
+        if pai:
+            self.filhos[pai].append(file_id)
+        self.historico.append(file_id)
+        return file_id
+
+    def criar_arquivo(self, nome, conteudo, mime_type, pai=None, **extras):
+        file_id = self._novo_id("arq")
+        self.arquivos[file_id] = {
+            "id": file_id,
+            "name": nome,
+            "mimeType": mime_type,
+            "md5Checksum": hashlib.md5(conteudo).hexdigest(),
+            "modifiedTime": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "size": str(len(conteudo)),
+            "parents": [pai] if pai else [],
+            **extras,
+        }
+        self.conteudos[file_id] = conteudo
+        if pai:
+            self.filhos[pai].append(file_id)
+        self.historico.append(file_id)
+        return file_id
+
+    def mover(self, file_id, novo_pai):
+        for pai in self.arquivos[file_id]["parents"]:
+            self.filhos[pai].remove(file_id)
+        self.arquivos[file_id]["parents"] = [novo_pai]
+        self.filhos[novo_pai].append(file_id)
+        self.historico.append(file_id)
+
+    def excluir(self, file_id):
+        for pai in self.arquivos[file_id]["parents"]:
+            self.filhos[pai].remove(file_id)
+        self.excluidos.add(file_id)
+        self.historico.append(file_id)
+
+    def _requisicao(self, tamanho=0):
+        with self._lock:
+            self.requisicoes += 1
+            self.bytes_servidos += tamanho
+        _pausa(self.latencia)
+
+    # ------------------------ INTERFACE DO DriveClient ------------------------
+    @property
+    def service(self):
+        return self
+
+    def http(self):
+        return _FakeHttp(self)
+
+    def files(self):
+        return _FakeFiles(self)
+
+    def listar(self, q, fields=None, page_size=None, limite=None):
+        pai = re.search(r"'([^']+)' in parents", q).group(1)
+        return self.listar_filhos(pai, fields)
+
+    def listar_filhos(self, folder_id, fields=None):
+        self._requisicao()
+        return [dict(self.arquivos[file_id]) for file_id in self.filhos.get(folder_id, [])]
+
+    def obter_metadados(self, file_ids, fields=None):
+        self._requisicao()
+        return {file_id: dict(self.arquivos[file_id]) for file_id in file_ids if file_id in self.arquivos}
+
+    def token_inicial_mudancas(self):
+        self._requisicao()
+        return str(len(self.historico))
+
+    def listar_mudancas(self, page_token, fields=None):
+        self._requisicao()
+        mudancas = []
+        for file_id in dict.fromkeys(reversed(self.historico[int(page_token):])):
+            if file_id in self.excluidos:
+                mudancas.append({"fileId": file_id, "removed": True})
+            else:
+                mudancas.append({"fileId": file_id, "removed": False, "file": dict(self.arquivos[file_id])})
+        return mudancas[::-1], str(len(self.historico))
+
+
+class _FakeFiles:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def get_media(self, fileId):
+        return _FakeRequisicaoMidia(self.drive, fileId)
+
+
+class _FakeRequisicaoMidia:
+    """Imita o HttpRequest devolvido por files().get_media (uri, headers, http)."""
+
+    def __init__(self, drive, file_id):
+        self.uri = f"https://www.googleapis.com/drive/v3/files/{file_id}?alt=media"
+        self.headers = {}
+        self.http = _FakeHttp(drive)
+
+
+class _FakeHttp:
+    """Conexão httplib2 falsa: responde pedidos de mídia respeitando o cabeçalho Range."""
+
+    def __init__(self, drive):
+        self.drive = drive
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        file_id = re.search(r"/files/([^?/]+)", uri).group(1)
+        conteudo = self.drive.conteudos.get(file_id)
+        if conteudo is None:
+            self.drive._requisicao()
+            return httplib2.Response({"status": "404"}), b'{"error": {"code": 404}}'
+        total = len(conteudo)
+        faixa = (headers or {}).get("range") or (headers or {}).get("Range")
+        if not faixa:
+            self.drive._requisicao(total)
+            return httplib2.Response({"status": "200", "content-length": str(total)}), conteudo
+        inicio, _, fim = faixa.split("=", 1)[1].partition("-")
+        inicio = int(inicio)
+        fim = min(int(fim) if fim else total - 1, total - 1)
+        if inicio >= total:
+            self.drive._requisicao()
+            return httplib2.Response({"status": "416", "content-range": f"bytes */{total}"}), b""
+        pedaco = conteudo[inicio:fim + 1]
+        self.drive._requisicao(len(pedaco))
+        return httplib2.Response({"status": "206", "content-range": f"bytes {inicio}-{fim}/{total}"}), pedaco
+
+
+class FakeSheets:
+    """Serviço do Sheets em memória: values().get devolve as linhas configuradas."""
+
+    def __init__(self, valores, latencia=0.0):
+        self.valores = valores
+        self.latencia = latencia
+        self.requisicoes = 0
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def get(self, spreadsheetId=None, range=None, **kwargs):
+        return _Execucao(self, lambda: {"values": [list(linha) for linha in self.valores]})
+
+    def batchUpdate(self, spreadsheetId=None, body=None):
+        return _Execucao(self, lambda: {"totalUpdatedRows": sum(len(d["values"]) for d in body.get("data", []))})
+
+
+class _Execucao:
+    def __init__(self, servico, resultado):
+        self.servico = servico
+        self.resultado = resultado
+
+    def execute(self):
+        self.servico.requisicoes += 1
+        _pausa(self.servico.latencia)
+        return self.resultado()
+
+
+class FakeGoogleAds:
+    """Cliente do Google Ads com serviços falsos e tipos reais.
+
+    `get_type`, `enums` e `copy_from` vêm de um GoogleAdsClient de verdade
+    (sem credenciais; nada sai da máquina), então as mensagens montadas pelo
+    código são as mesmas da produção. GoogleAdsService.search_stream devolve
+    um anúncio de imagem ativo por grupo e AdGroupAdService.mutate_ad_group_ads
+    aceita todas as operações. O BatchJobService confere o sequence_token de
+    cada envio de operações e, nos resultados, recusa as imagens vazias com um
+    GoogleAdsFailure, como uma falha parcial de verdade. `imagens` serve as
+    imagens dos anúncios ativos (a URL image_url de cada um), no lugar da CDN
+    do Google.
+    """
+
+    def __init__(self, latencia=0.0, imagens=None):
+        from google.ads.googleads.client import GoogleAdsClient
+        from google.auth.credentials import AnonymousCredentials
+        self._cliente = GoogleAdsClient(AnonymousCredentials(), developer_token="benchmark", use_proto_plus=True)
+        self.latencia = latencia
+        self.imagens = imagens or (lambda url: b"")
+        self.requisicoes = 0
+        self.operacoes = 0
+        self.bytes_recebidos = 0
+        self.batch_jobs = {}  # resource_name -> {"operacoes", "token", "executado"}
+        self._contador = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enums(self):
+        return self._cliente.enums
+
+    def get_type(self, nome):
+        return self._cliente.get_type(nome)
+
+    def copy_from(self, destino, origem):
+        return self._cliente.copy_from(destino, origem)
+
+    def get_service(self, nome):
+        if nome == "GoogleAdsService":
+            return _FakeGoogleAdsService(self)
+        if nome == "AdGroupAdService":
+            return _FakeAdGroupAdService(self)
+        if nome == "BatchJobService":
+            return _FakeBatchJobService(self)
+        raise NotImplementedError(f"Serviço {nome} não existe no Google Ads falso")
+
+    def baixar_imagem(self, url):
+        self._requisicao()
+        return self.imagens(url)
+
+    def _requisicao(self, operacoes=0, tamanho=0):
+        with self._lock:
+            self.requisicoes += 1
+            self.operacoes += operacoes
+            self.bytes_recebidos += tamanho
+        _pausa(self.latencia)
+
+    def _novo_anuncio(self, grupo):
+        with self._lock:
+            self._contador += 1
+            numero = self._contador
+        return f"{grupo.replace('/adGroups/', '/adGroupAds/')}~{1000 + numero}"
+
+
+class _FakeGoogleAdsService:
+    def __init__(self, ads):
+        self.ads = ads
+
+    def search_stream(self, customer_id, query):
+        self.ads._requisicao()
+        image_ad = self.ads.enums.AdTypeEnum.IMAGE_AD
+        linhas = []
+        for grupo in re.findall(r"customers/\d+/adGroups/\d+", query):
+            row = self.ads.get_type("GoogleAdsRow")
+            row.ad_group_ad.ad_group = grupo
+            row.ad_group_ad.resource_name = grupo.replace("/adGroups/", "/adGroupAds/") + "~1"
+            row.ad_group_ad.ad.type_ = image_ad
+            row.ad_group_ad.ad.name = "ativo"
+            row.ad_group_ad.ad.final_urls.append(f"https://exemplo.com/{grupo.rsplit('/', 1)[-1]}")
+            row.ad_group_ad.ad.image_ad.image_url = f"https://tpc.googlesyndication.com/simgad/{grupo.rsplit('/', 1)[-1]}"
+            linhas.append(row)
+        return iter([_Lote(linhas)])
+
+
+class _Lote:
+    def __init__(self, results):
+        self.results = results
+
+
+class _FakeAdGroupAdService:
+    def __init__(self, ads):
+        self.ads = ads
+
+    def mutate_ad_group_ads(self, request):
+        tamanho = sum(len(op.create.ad.image_ad.data) for op in request.operations)
+        self.ads._requisicao(len(request.operations), tamanho)
+        resposta = self.ads.get_type("MutateAdGroupAdsResponse")
+        for operacao in request.operations:
+            resultado = self.ads.get_type("MutateAdGroupAdResult")
+            resultado.resource_name = self.ads._novo_anuncio(operacao.create.ad_group)
+            resposta.results.append(resultado)
+        return resposta
+
+
+class _OperacaoLonga:
+    """Imita a operação longa devolvida por run_batch_job (o job termina na hora)."""
+
+    def done(self):
+        return True
+
+
+class _FakeBatchJobService:
+    def __init__(self, ads):
+        self.ads = ads
+
+    def mutate_batch_job(self, customer_id, operation):
+        self.ads._requisicao()
+        resource_name = f"customers/{customer_id}/batchJobs/{len(self.ads.batch_jobs) + 1}"
+        self.ads.batch_jobs[resource_name] = {"operacoes": [], "token": None, "executado": False}
+        resposta = self.ads.get_type("MutateBatchJobResponse")
+        resposta.result.resource_name = resource_name
+        return resposta
+
+    def add_batch_job_operations(self, resource_name, mutate_operations, sequence_token=None):
+        job = self.ads.batch_jobs[resource_name]
+        if sequence_token != job["token"]:
+            raise ValueError(f"sequence_token {sequence_token!r} inválido (esperado {job['token']!r})")
+        self.ads._requisicao()
+        job["operacoes"].extend(mutate_operations)
+        job["token"] = f"token-{len(job['operacoes'])}"
+        resposta = self.ads.get_type("AddBatchJobOperationsResponse")
+        resposta.total_operations = len(job["operacoes"])
+        resposta.next_sequence_token = job["token"]
+        return resposta
+
+    def run_batch_job(self, resource_name):
+        job = self.ads.batch_jobs[resource_name]
+        operacoes = [operacao.ad_group_ad_operation for operacao in job["operacoes"]]
+        self.ads._requisicao(len(operacoes), sum(len(op.create.ad.image_ad.data) for op in operacoes))
+        job["executado"] = True
+        return _OperacaoLonga()
+
+    def list_batch_job_results(self, resource_name):
+        from google.protobuf import any_pb2
+        from google.rpc import status_pb2
+        self.ads._requisicao()
+        falha_tipo = type(self.ads.get_type("GoogleAdsFailure"))
+        resultados = []
+        for indice, operacao in enumerate(self.ads.batch_jobs[resource_name]["operacoes"]):
+            resultado = self.ads.get_type("BatchJobResult")
+            resultado.operation_index = indice
+            criacao = operacao.ad_group_ad_operation.create
+            if criacao.ad.image_ad.data:
+                resultado.mutate_operation_response.ad_group_ad_result.resource_name = self.ads._novo_anuncio(criacao.ad_group)
+            else:
+                falha = self.ads.get_type("GoogleAdsFailure")
+                erro = self.ads.get_type("GoogleAdsError")
+                erro.message = "A imagem está vazia."
+                falha.errors.append(erro)
+                detalhe = any_pb2.Any(type_url="type.googleapis.com/google.ads.googleads.errors.GoogleAdsFailure",
+                                      value=falha_tipo.serialize(falha))
+                resultado.status = status_pb2.Status(code=3, message="Falha na operação.", details=[detalhe])
+            resultados.append(resultado)
+        return iter(resultados)
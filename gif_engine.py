@@ -0,0 +1,266 @@
+from contextlib import ExitStack
+from PIL import Image, ImageChops, ImageSequence, GifImagePlugin
+from ad_sizes import redimensionar_tamanhos
+from compositing import compor_logo_lote_alterados, empilhar, logo_para_array
+
+# ------------------------ CONFIGURAÇÕES DO GIF ------------------------
+DURACAO_PADRAO = 100        # Duração (ms) de quadros sem duração definida
+DISPOSAL_PADRAO = 2         # Disposal de quadros sem disposal definido
+LIMIAR_ALFA = 128           # Pixels com alfa abaixo disso viram o índice transparente
+INDICE_TRANSPARENTE = 255   # Índice transparente dos GIFs gerados, fora das cores de qualquer paleta
+COMPOSICAO_EM_LOTE = False  # Compõe a logo com NumPy em blocos (mais lento que o paste do Pillow para logos pequenas; ver benchmark_compositing.py)
+BLOCO_QUADROS = 16          # Quadros compostos de uma vez na composição em lote (limita a memória por GIF)
+
+
+def _indices(imagem_p):
+    """Reinterpreta os índices de uma imagem P como L, para comparações sem paleta."""
+    return Image.frombytes("L", imagem_p.size, imagem_p.tobytes())
+
+
+def _montar_paleta(paleta, logo, limite=256):
+    """Monta uma paleta com as cores de `paleta` e, nas posições livres até `limite`, as cores da logo.
+
+    A paleta global do GIF parte da paleta do primeiro quadro do template; as
+    paletas locais partem das cores do próprio quadro. Se o template não tiver
+    paleta, o primeiro quadro já com a logo aplicada é quantizado.
+    """
+    usadas = len(paleta) // 3
+    if usadas < limite:
+        cores_logo = logo.convert("RGB").quantize(colors=limite - usadas).getpalette()
+        paleta = paleta + cores_logo[:(limite - usadas) * 3]
+    # Completa até `limite`, para que o índice logo depois dele exista na tabela de cores gravada
+    paleta = paleta + [0, 0, 0] * (limite - len(paleta) // 3)
+    imagem_paleta = Image.new("P", (1, 1))
+    imagem_paleta.putpalette(paleta)
+    return imagem_paleta
+
+
+def _cores_paleta(paleta):
+    """Conjunto de cores RGB de uma paleta plana [r, g, b, r, g, b, ...]."""
+    return set(zip(paleta[0::3], paleta[1::3], paleta[2::3]))
+
+
+def _paleta_local(quadro, cores_globais, limite):
+    """Cores do quadro que não cabem na paleta global, ou None se todas cabem.
+
+    Quadros de GIFs com tabela de cores local chegam em RGB/RGBA com cores que
+    a paleta global não tem; quantizá-los nela junta cores distintas (e quadros
+    distintos). Devolve (chave, paleta plana com até `limite` cores): a chave é
+    a tupla de cores, para que quadros com a mesma tabela local compartilhem a
+    paleta, ou None quando o quadro tem cores demais e é quantizado sozinho.
+    """
+    cores = quadro.getcolors(1024)
+    opacas = None if cores is None else {cor[:3] for _, cor in cores if cor[3] >= LIMIAR_ALFA}
+    if opacas is not None and opacas <= cores_globais:
+        return None
+    if opacas is not None and len(opacas) <= limite:
+        chave = tuple(sorted(opacas))
+        return chave, [canal for cor in chave for canal in cor]
+    rgb = quadro.convert("RGB")
+    return None, rgb.quantize(colors=limite, method=Image.Quantize.MEDIANCUT).getpalette()
+
+
+class _Quadro:
+    """Quadro pronto para ser escrito: imagem P (ou recorte dela), posição, tempos e paleta."""
+
+    def __init__(self, imagem, offset, duracao, disposal, transparencia, local):
+        self.imagem = imagem
+        self.offset = offset
+        self.duracao = duracao
+        self.disposal = disposal
+        self.transparencia = transparencia
+        self.local = local
+
+
+class _SaidaGif:
+    """Um GIF em gravação: logo, paleta e quadro pendente de um dos tamanhos."""
+
+    def __init__(self, fp, logo, posicao, dimensoes, loop, transparencia):
+        self.fp = fp
+        self.logo = logo
+        self.dimensoes = tuple(dimensoes)
+        self.loop = loop
+        self.transparencia = transparencia
+        self.logo_array = logo_para_array(logo) if COMPOSICAO_EM_LOTE else None
+        self.regiao = (posicao[0], posicao[1], posicao[0] + logo.size[0], posicao[1] + logo.size[1])
+        self.bloco = []
+        self.paleta = None
+        self.paletas_locais = {}
+        self.paleta_anterior = None
+        self.regiao_anterior = None
+        self.patch = None
+        self.indices = None
+        self.pendente = None
+        self.numero = 0
+
+    def adicionar(self, quadro, duracao, disposal, local=None):
+        if not COMPOSICAO_EM_LOTE:
+            self.compor_logo(quadro)
+            self.gravar(quadro, duracao, disposal, local)
+            return
+        self.bloco.append((quadro, duracao, disposal, local))
+        if len(self.bloco) == BLOCO_QUADROS:
+            self.processar_bloco()
+
+    def compor_logo(self, quadro):
+        """Aplica a logo com o paste do Pillow, recompondo-a só quando a região embaixo dela muda."""
+        fundo = quadro.crop(self.regiao)
+        fundo_bytes = fundo.tobytes()
+        if fundo_bytes != self.regiao_anterior:
+            fundo.paste(self.logo, (0, 0), self.logo)
+            self.patch = fundo
+            self.regiao_anterior = fundo_bytes
+        quadro.paste(self.patch, self.regiao[:2])
+
+    def paleta_do_quadro(self, local):
+        """Paleta e índice transparente de um quadro: a global ou a local (com as cores da logo)."""
+        if local is None:
+            return self.paleta, self.transparencia
+        chave, cores = local
+        paleta = self.paletas_locais.get(chave) if chave is not None else None
+        if paleta is None:
+            # Com transparência, a última posição fica livre para o INDICE_TRANSPARENTE
+            paleta = _montar_paleta(cores, self.logo, 256 if self.transparencia is None else INDICE_TRANSPARENTE)
+            if chave is not None:
+                self.paletas_locais[chave] = paleta
+        return paleta, self.transparencia
+
+    def escrever(self, quadro):
+        params = {"duration": quadro.duracao, "disposal": quadro.disposal}
+        if quadro.transparencia is not None:
+            params["transparency"] = quadro.transparencia
+        if quadro.local:
+            params["include_color_table"] = True
+        for dado in GifImagePlugin.getdata(quadro.imagem, quadro.offset, **params):
+            self.fp.write(dado)
+
+    def processar_bloco(self):
+        bloco, self.bloco = self.bloco, []
+        if not bloco:
+            return
+        # Só o retângulo da logo de cada quadro é empilhado e composto em lote
+        regioes = empilhar([quadro.crop(self.regiao) for quadro, _, _, _ in bloco])
+        self.regiao_anterior, self.patch = compor_logo_lote_alterados(
+            regioes, self.logo_array, (0, 0), self.regiao_anterior, self.patch
+        )
+        for patch, (quadro, duracao, disposal, local) in zip(regioes, bloco):
+            quadro.paste(Image.fromarray(patch, "RGBA"), self.regiao[:2])
+            self.gravar(quadro, duracao, disposal, local)
+
+    def gravar(self, quadro, duracao, disposal, local):
+        """Quantiza o quadro já com a logo e o grava, descartando repetições e recortando o que mudou."""
+        if self.paleta is None:
+            self.paleta = quadro.convert("RGB").quantize(colors=256, method=Image.Quantize.MEDIANCUT)
+        paleta, transparencia = self.paleta_do_quadro(local)
+        quadro_p = quadro.convert("RGB").quantize(palette=paleta, dither=Image.Dither.NONE)
+        if transparencia is not None:
+            mascara = quadro.getchannel("A").point(lambda a: 255 if a < LIMIAR_ALFA else 0)
+            quadro_p.paste(transparencia, mask=mascara)
+
+        if self.numero == 0:
+            header, _ = GifImagePlugin.getheader(quadro_p, info={"loop": self.loop})
+            for dado in header:
+                self.fp.write(dado)
+        self.numero += 1
+
+        indices = _indices(quadro_p)
+        pendente = self.pendente
+        novo = (duracao, disposal, transparencia, paleta is not self.paleta)
+        if pendente is not None:
+            # Índices só são comparáveis entre quadros com a mesma paleta
+            mesma_paleta = paleta is self.paleta_anterior
+            caixa = ImageChops.difference(self.indices, indices).getbbox() if mesma_paleta else (0, 0) + quadro_p.size
+            if caixa is None:
+                # Quadro repetido: estende o anterior
+                pendente.duracao += duracao
+                pendente.disposal = disposal
+                return
+            self.escrever(pendente)
+            if pendente.disposal in (0, 1) and self.transparencia is None and mesma_paleta:
+                self.pendente = _Quadro(quadro_p.crop(caixa), caixa[:2], *novo)
+            else:
+                self.pendente = _Quadro(quadro_p, (0, 0), *novo)
+        else:
+            self.pendente = _Quadro(quadro_p, (0, 0), *novo)
+        self.indices = indices
+        self.paleta_anterior = paleta
+
+    def finalizar(self):
+        self.processar_bloco()
+        if self.pendente is not None:
+            self.escrever(self.pendente)
+        self.fp.write(b";")
+
+
+def renderizar_gif(template_path, output_file, logo, posicao, dimensoes):
+    """Aplica a logo em um GIF animado gravando os quadros à medida que são gerados.
+
+    - Os quadros são escritos à medida que são gerados; só o quadro anterior fica
+      em memória (ou BLOCO_QUADROS quadros, com COMPOSICAO_EM_LOTE).
+    - Os quadros usam uma única paleta global (a do template, quando existe),
+      sem reprocessar a paleta a cada quadro; quadros cujas cores não cabem
+      nela (tabela de cores local no template) ganham uma paleta local.
+    - A logo só é recomposta quando a região embaixo dela muda entre quadros.
+    - Quadros idênticos ao anterior são descartados e a duração é somada ao anterior.
+    - Disposal de cada quadro e loop do template são preservados; quadros que
+      seguem um quadro com disposal 0/1 gravam apenas o retângulo alterado.
+
+    `template_path` pode ser um caminho ou o template já aberto.
+    """
+    renderizar_gif_tamanhos(template_path, [(output_file, logo, posicao, dimensoes)])
+    return output_file
+
+
+def renderizar_gif_tamanhos(template_path, saidas):
+    """Grava o GIF em vários tamanhos decodificando cada quadro do template uma única vez.
+
+    `saidas` é uma lista de (output_file, logo, posicao, dimensoes), uma por
+    tamanho. Cada quadro é convertido para RGBA uma vez e redimensionado para
+    todos os tamanhos com `redimensionar_tamanhos`; cada GIF tem a sua paleta,
+    composição e deduplicação de quadros, como em `renderizar_gif`.
+    """
+    template = template_path if isinstance(template_path, Image.Image) else Image.open(template_path)
+    loop = template.info.get("loop", 0)
+    transparencia = template.info.get("transparency") if template.mode == "P" else None
+    if not isinstance(transparencia, int):
+        transparencia = None
+    # Os GIFs gerados usam sempre o INDICE_TRANSPARENTE, reservado em todas as paletas
+    transparencia_saida = None if transparencia is None else INDICE_TRANSPARENTE
+
+    with ExitStack() as pilha:
+        gifs = [_SaidaGif(pilha.enter_context(open(output_file, "wb")), logo, posicao, dimensoes, loop, transparencia_saida)
+                for output_file, logo, posicao, dimensoes in saidas]
+        lista_dimensoes = [gif.dimensoes for gif in gifs]
+        cores_globais = None
+        limite = 256 if transparencia is None else INDICE_TRANSPARENTE
+        for numero, frame in enumerate(ImageSequence.Iterator(template)):
+            duracao = frame.info.get("duration", DURACAO_PADRAO) or DURACAO_PADRAO
+            disposal = getattr(frame, "disposal_method", DISPOSAL_PADRAO)
+            local = None
+            if numero == 0:
+                if frame.mode == "P":
+                    paleta = frame.getpalette() or []
+                    if transparencia is not None:
+                        # A cor do índice transparente do template sai da paleta: um pixel opaco
+                        # (da logo, por exemplo) com essa cor não pode cair no índice transparente
+                        paleta = paleta[:transparencia * 3] + paleta[transparencia * 3 + 3:]
+                        paleta = paleta[:INDICE_TRANSPARENTE * 3]
+                    cores_globais = _cores_paleta(paleta)
+                    for gif in gifs:
+                        gif.paleta = _montar_paleta(paleta, gif.logo, limite)
+            quadro_rgba = frame.convert("RGBA")
+            if numero > 0 and cores_globais is not None:
+                local = _paleta_local(quadro_rgba, cores_globais, limite)
+            quadros = redimensionar_tamanhos(quadro_rgba, lista_dimensoes)
+            vistos = set()
+            for gif in gifs:
+                quadro = quadros[gif.dimensoes]
+                if gif.dimensoes in vistos:
+                    # Dois GIFs do mesmo tamanho: cada um desenha a logo na sua cópia
+                    quadro = quadro.copy()
+                vistos.add(gif.dimensoes)
+                gif.adicionar(quadro, duracao, disposal, local)
+        for gif in gifs:
+            gif.finalizar()
+
+    return [output_file for output_file, _, _, _ in saidas]
@@ -0,0 +1,93 @@
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from template_cache import calcular_md5
+
+# ------------------------ CONFIGURAÇÕES DO REGISTRO ------------------------
+LOGO_CACHE_MAX_ITENS = 256  # Logos decodificadas mantidas em memória (LRU)
+
+# Logo já decodificada e redimensionada: tamanho e bytes RGBA
+LogoBitmap = namedtuple("LogoBitmap", ["size", "rgba"])
+
+
+def carregar_bitmap(logo_path, logo_size):
+    """Decodifica e redimensiona uma logo para o tamanho usado nos criativos."""
+    from PIL import Image
+    with Image.open(logo_path) as logo:
+        logo = logo.convert("RGBA").resize(logo_size)
+    return LogoBitmap(tuple(logo_size), logo.tobytes())
+
+
+def bitmap_para_imagem(bitmap):
+    """Reconstrói a imagem RGBA da logo a partir do bitmap, sem decodificar PNG."""
+    from PIL import Image
+    return Image.frombytes("RGBA", bitmap.size, bitmap.rgba)
+
+
+class LogoRegistry:
+    """Registro das logos dos sites.
+
+    A pasta de logos do Drive é indexada de uma só vez (`listar_logos()`
+    retorna todos os arquivos dela) e cada logo local é revalidada pelo
+    md5Checksum do Drive antes de ser usada. As logos decodificadas e já
+    redimensionadas ficam em memória, limitadas por LRU, para que cada site
+    seja decodificado uma única vez por execução.
+    """
+
+    def __init__(self, diretorio, listar_logos, baixar, max_bitmaps=LOGO_CACHE_MAX_ITENS):
+        self.diretorio = diretorio
+        self.listar_logos = listar_logos
+        self.baixar = baixar
+        self.max_bitmaps = max_bitmaps
+        self._lock = threading.RLock()
+        self._indice = None
+        self._md5_local = {}
+        self._bitmaps = OrderedDict()
+
+    # ------------------------ ARQUIVOS ------------------------
+    def obter_arquivo(self, site):
+        """Retorna os metadados do Drive da logo `{site}.png`, ou None."""
+        with self._lock:
+            if self._indice is None:
+                self._indice = {arquivo['name'].lower(): arquivo for arquivo in self.listar_logos()}
+            return self._indice.get(f"{site.strip()}.png".lower())
+
+    def _md5(self, caminho):
+        estado = os.stat(caminho)
+        chave = (caminho, estado.st_mtime_ns, estado.st_size)
+        if chave not in self._md5_local:
+            self._md5_local[chave] = calcular_md5(caminho)
+        return self._md5_local[chave]
+
+    def caminho(self, site):
+        """Retorna o caminho local da logo do site, baixando-a se faltar ou estiver desatualizada."""
+        site = site.strip()
+        arquivo = self.obter_arquivo(site)
+        if not arquivo:
+            return None
+        logo_path = os.path.join(self.diretorio, f"{site}.png")
+        with self._lock:
+            md5_drive = arquivo.get('md5Checksum')
+            if os.path.exists(logo_path) and (not md5_drive or self._md5(logo_path) == md5_drive):
+                return logo_path
+            os.makedirs(self.diretorio, exist_ok=True)
+            tmp_path = f"{logo_path}.part"
+            self.baixar(arquivo['id'], tmp_path, md5_drive)
+            os.replace(tmp_path, logo_path)
+            return logo_path
+
+    # ------------------------ BITMAPS ------------------------
+    def bitmap(self, logo_path, logo_size):
+        """Retorna a logo decodificada e redimensionada, usando o cache em memória."""
+        estado = os.stat(logo_path)
+        chave = (os.path.abspath(logo_path), estado.st_mtime_ns, tuple(logo_size))
+        with self._lock:
+            if chave in self._bitmaps:
+                self._bitmaps.move_to_end(chave)
+                return self._bitmaps[chave]
+        bitmap = carregar_bitmap(logo_path, logo_size)
+        with self._lock:
+            self._bitmaps[chave] = bitmap
+            while len(self._bitmaps) > self.max_bitmaps:
+                self._bitmaps.popitem(last=False)
+        return bitmap
@@ -1,29 +1,61 @@
 import os
-import re
 import random
-from datetime import datetime
-import pandas as pd
-from google.ads.googleads.client import GoogleAdsClient
-from google.ads.googleads.errors import GoogleAdsException
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
-from googleapiclient.http import MediaIoBaseDownload
-import io
 import time
+from datetime import datetime
+import functools
+from collections import Counter, defaultdict
 import argparse
-from PIL import Image, ImageSequence, ImageDraw, ImageFont
-from tqdm import tqdm
+from template_cache import TemplateCache
+from drive_client import DriveClient, baixar_arquivo
+from drive_manifest import DriveManifest
+from logo_registry import LogoRegistry
+from pipeline import Pipeline, Estagio
+from ads_upload import enviar_criativos
+from dedup_index import DedupIndex
+from ads_prefetch import prefetch_grupos, resumo_vazio
+from run_journal import RunJournal, BAIXADO, RENDERIZADO, ENVIADO, DUPLICADO, ETAPAS_CONCLUIDAS
+from template_cache import calcular_md5
+from render_cache import RenderCache, chave_criativo
+import rate_limiter
+import threading
+import atexit
+from metrics import metricas
+from ad_sizes import normalizar_tamanhos, rotulo
+
+# Dependências pesadas (pandas, Pillow, cliente do Google Ads, googleapiclient.discovery,
+# requests) são importadas dentro das funções que as usam: `--help`, o --resume e
+# a execução de um único grupo só carregam o que o seu caminho realmente precisa.
 
 # ------------------------ CONFIGURAÇÕES GERAIS ------------------------
-MAX_REQUESTS = 3000
-request_count = 0  # Contador de requisições feitas
+MAX_REQUESTS = 3000  # Requisições por hora ao Google Ads (distribuídas pelo rate limiter)
 
 PASTA_OUTPUT = "output"
 TEMPLATES_DIR = "templates"
 LOGOS_DIR = "logos"
 DIMENSOES = (336, 280)      # Dimensões compatíveis com Google Ads
 LOGO_SIZE = (45, 14)        # Tamanho da logo
+# Formatos gerados de cada template, cada um enviado como um anúncio próprio. Aceita "LARGURAxALTURA"
+# (regra da logo em ad_sizes.FORMATOS) ou {"dimensoes", "logo_size", "ancora", "margem"}; também via --tamanhos
+TAMANHOS = ["336x280"]
 DEFAULT_CRIATIVOS_QUANTIDADE = 3  # Quantidade padrão para geração de criativos
+ENCODER_ORCAMENTO_BYTES = 150 * 1024  # Tamanho máximo de cada criativo (limite do Google Ads)
+ENCODER_PRESET = "equilibrado"  # rapido, equilibrado ou compacto (velocidade x tamanho)
+RENDER_WORKERS = os.cpu_count() or 1  # Processos usados na renderização (--workers 1 = modo serial)
+PIPELINE_DOWNLOAD_WORKERS = 4  # Grupos de anúncios baixando templates ao mesmo tempo
+PIPELINE_RENDER_WORKERS = 2    # Grupos de anúncios enviando jobs ao pool de renderização ao mesmo tempo
+PIPELINE_UPLOAD_WORKERS = 2    # Grupos de anúncios enviando criativos ao Google Ads ao mesmo tempo
+PIPELINE_CAPACIDADE = 4        # Grupos de anúncios aguardando entre um estágio e outro
+TEMPLATE_CACHE_MAX_BYTES = 2 * 1024 ** 3  # Tamanho máximo do cache local de templates (2 GB)
+TEMPLATE_CACHE_TTL = 6 * 3600  # Segundos em que um template é servido do disco sem consultar o Drive
+RENDER_CACHE_DIR = "renders"  # Criativos já renderizados, reaproveitados entre grupos de anúncios do mesmo site e idioma
+RENDER_CACHE_MAX_BYTES = 1024 ** 3  # Tamanho máximo do cache de criativos renderizados (1 GB; 0 = desativado)
+DOWNLOAD_CHUNK_BYTES = 8 * 1024 * 1024  # Bytes por requisição nos downloads do Drive (downloads interrompidos são retomados)
+DRIVE_MANIFEST_DB = "drive_manifest.sqlite3"  # Espelho local das pastas de templates e logos
+RUN_JOURNAL_DB = "run_journal.sqlite3"  # Diário das execuções, usado pelo --resume
+DEDUP_DB = "dedup_index.sqlite3"  # Hashes perceptuais dos criativos ativos e enviados por grupo de anúncios
+DEDUP_LIMIAR_HAMMING = 6  # Distância máxima (bits, de 64) para um criativo ser considerado duplicado
+RELATORIOS_DIR = "relatorios"  # Relatório JSON de cada execução (contagens, latências, bytes e quota por estágio)
+PROMETHEUS_TEXTFILE = ""  # Arquivo .prom para o textfile collector do node_exporter (vazio = desativado)
 
 # IDs das pastas no Google Drive (substitua pelos seus IDs)
 TEMPLATES_DRIVE_FOLDER_ID = "SEU_ID_DA_PASTA_DE_TEMPLATES"
@@ -90,16 +122,47 @@ IDIOMAS_POR_PAIS = {
 
 # Configurações da planilha
 SPREADSHEET_ID = ''  # Adicione o ID da sua planilha aqui
+CATALOGO_CACHE = "catalogo_planilha.json"  # Cópia local da planilha, reaproveitada enquanto a revisão não mudar
+
+rate_limiter.configurar("ads", MAX_REQUESTS / 3600, MAX_REQUESTS)
+
+# Cache persistente de templates, compartilhado por todos os grupos de anúncios da execução
+template_cache = TemplateCache(TEMPLATES_DIR, TEMPLATE_CACHE_MAX_BYTES, TEMPLATE_CACHE_TTL)
+# Criativos prontos por (template, logo, tamanho, encoder): cada site e idioma é renderizado uma vez
+render_cache = RenderCache(RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES)
 
 # ------------------------ FUNÇÕES DO GOOGLE DRIVE ------------------------
+drive = DriveClient("drive_credentials.json")
+# A versão da planilha é consultada pela mesma conta que a lê (a conta do Drive pode não ter acesso a ela)
+drive_planilha = DriveClient("sheets_credentials.json", ["https://www.googleapis.com/auth/drive.metadata.readonly"])
+manifesto = None
+_manifesto_lock = threading.Lock()
+
+def obter_manifesto():
+    """Retorna o manifesto local do Drive, sincronizado uma vez por execução.
+
+    Chamado pelas threads do pipeline: só a primeira sincroniza, as demais
+    esperam por ela.
+    """
+    global manifesto
+    if manifesto is not None:
+        return manifesto
+    with _manifesto_lock:
+        if manifesto is None:
+            get_drive_service()
+            novo = DriveManifest(DRIVE_MANIFEST_DB, drive, [TEMPLATES_DRIVE_FOLDER_ID, LOGOS_DRIVE_FOLDER_ID])
+            mudancas = novo.sincronizar()
+            if mudancas is None:
+                print("✅ Manifesto do Drive construído.")
+            elif mudancas:
+                print(f"✅ Manifesto do Drive atualizado ({mudancas} mudanças).")
+            manifesto = novo
+    return manifesto
+
 def get_drive_service():
-    """Inicializa e retorna o serviço do Google Drive."""
+    """Retorna o serviço do Google Drive compartilhado pela execução."""
     try:
-        SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
-        creds = service_account.Credentials.from_service_account_file("drive_credentials.json", scopes=SCOPES)
-        service = build('drive', 'v3', credentials=creds)
-        service.files().list(pageSize=1).execute()
-        return service
+        return drive.service
     except Exception as e:
         print(f"❌ Erro ao inicializar o serviço do Drive: {str(e)}")
         if "credentials" in str(e).lower():
@@ -111,52 +174,84 @@ def get_drive_service():
 
 def list_files_in_folder(folder_id):
     """Lista todos os arquivos em uma pasta do Google Drive."""
-    service = get_drive_service()
-    results = service.files().list(
-        q=f"'{folder_id}' in parents and trashed = false",
-        fields="files(id, name, mimeType)",
-        pageSize=1000
-    ).execute()
-    return results.get('files', [])
-
-def download_file(file_id, output_path):
-    """Baixa um arquivo do Google Drive para o caminho especificado."""
-    service = get_drive_service()
-    request = service.files().get_media(fileId=file_id)
-    fh = io.BytesIO()
-    downloader = MediaIoBaseDownload(fh, request)
-    done = False
-    while done is False:
-        status, done = downloader.next_chunk()
-    
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    with open(output_path, 'wb') as f:
-        f.write(fh.getvalue())
+    get_drive_service()
+    return list(drive.listar(f"'{folder_id}' in parents and trashed = false"))
+
+def download_file(file_id, output_path, md5=None):
+    """Baixa um arquivo do Google Drive para o caminho especificado.
+
+    O arquivo vai direto para o disco, em pedaços de DOWNLOAD_CHUNK_BYTES, e só
+    aparece em `output_path` depois de completo (e conferido com `md5`, se
+    informado); um download interrompido é retomado na próxima chamada.
+    Retorna o MD5 do arquivo.
+    """
+    with metricas.medir("download_file") as medida:
+        service = get_drive_service()
+        request = service.files().get_media(fileId=file_id)
+        md5_baixado, medida["bytes"], medida["quota"] = baixar_arquivo(
+            request, output_path, md5, DOWNLOAD_CHUNK_BYTES,
+            executar=functools.partial(rate_limiter.executar, api="drive")
+        )
+        return md5_baixado
+
+def obter_metadados_arquivos(file_ids):
+    """Obtém o md5Checksum e o modifiedTime de vários arquivos do Drive em requisições batch."""
+    get_drive_service()
+    return drive.obter_metadados(file_ids)
+
+def obter_metadados_arquivo(file_id):
+    """Obtém o md5Checksum e o modifiedTime de um arquivo do Google Drive."""
+    return obter_metadados_arquivos([file_id]).get(file_id)
+
+def baixar_template(template):
+    """Retorna o caminho local de um template, usando o cache em TEMPLATES_DIR."""
+    return template_cache.obter(
+        template['id'],
+        download_file,
+        metadados=template if template.get('md5Checksum') else None,
+        buscar_metadados=obter_metadados_arquivo
+    )
+
+dedup = None
+_dedup_lock = threading.Lock()
+
+def obter_dedup():
+    """Retorna o índice de deduplicação, aberto só quando um grupo é processado (o --help não cria o banco)."""
+    global dedup
+    if dedup is not None:
+        return dedup
+    with _dedup_lock:
+        if dedup is None:
+            dedup = DedupIndex(DEDUP_DB, DEDUP_LIMIAR_HAMMING)
+    return dedup
+
+# Esperas do rate limiter (limite e backoff) entram nas métricas como estágios espera_<api>_<motivo>
+rate_limiter.ao_esperar = lambda api, motivo, segundos: metricas.observar(f"espera_{api}_{motivo}", segundos)
+journal = None
+_journal_lock = threading.Lock()
+
+def obter_journal():
+    """Retorna o diário das execuções, aberto só quando há tarefas (o --help não cria o banco)."""
+    global journal
+    if journal is not None:
+        return journal
+    with _journal_lock:
+        if journal is None:
+            journal = RunJournal(RUN_JOURNAL_DB)
+    return journal
+logos = LogoRegistry(
+    LOGOS_DIR,
+    lambda: obter_manifesto().listar_arquivos(LOGOS_DRIVE_FOLDER_ID, ["image/png"]),
+    download_file
+)
 
 def buscar_logo_por_site(site):
     """Busca a logo do site no Google Drive."""
     try:
-        service = get_drive_service()
         site = site.strip()
         
-        query = f"name contains '{site}' and name contains '.png' and '{LOGOS_DRIVE_FOLDER_ID}' in parents and trashed = false"
-        
         try:
-            results = service.files().list(
-                q=query,
-                fields="files(id, name)",
-                pageSize=10
-            ).execute()
-            files = results.get('files', [])
-            
-            matching_file = None
-            for file in files:
-                if file['name'].lower() == f"{site}.png".lower():
-                    matching_file = file
-                    break
-            
-            if not matching_file:
+            if not logos.obter_arquivo(site):
                 print("❌ Nenhum arquivo correspondente encontrado")
                 print("⚠️ Verifique se:")
                 print(f"1. Existe um arquivo chamado '{site}.png' na pasta")
@@ -164,17 +259,11 @@ def buscar_logo_por_site(site):
                 print("3. A conta de serviço tem acesso à pasta")
                 return None
             
-            os.makedirs(LOGOS_DIR, exist_ok=True)
-            logo_path = os.path.join(LOGOS_DIR, f"{site}.png")
-            
-            if not os.path.exists(logo_path):
-                try:
-                    download_file(matching_file['id'], logo_path)
-                except Exception as e:
-                    print(f"❌ Erro ao baixar a logo: {str(e)}")
-                    return None
-            
-            return logo_path
+            try:
+                return logos.caminho(site)
+            except Exception as e:
+                print(f"❌ Erro ao baixar a logo: {str(e)}")
+                return None
             
         except Exception as e:
             print(f"❌ Erro ao buscar arquivos no Drive: {str(e)}")
@@ -184,67 +273,79 @@ def buscar_logo_por_site(site):
         print(f"❌ Erro geral ao buscar logo: {str(e)}")
         return None
 
-def get_templates_for_language(idioma, tag=None):
-    """Obtém a lista de templates para um idioma específico do Google Drive."""
-    service = get_drive_service()
-    
-    if tag:
-        tag_results = service.files().list(
-            q=f"name = '{tag}' and '{TEMPLATES_DRIVE_FOLDER_ID}' in parents and mimeType = 'application/vnd.google-apps.folder' and trashed = false",
-            fields="files(id, name)",
-            pageSize=1
-        ).execute()
-        tag_folders = tag_results.get('files', [])
-        
-        if tag_folders:
-            parent_id = tag_folders[0]['id']
-        else:
-            print(f"⚠️ Pasta {tag} não encontrada no Drive.")
-            return []
-    else:
-        results = service.files().list(
-            q=f"name = '{idioma}' and '{TEMPLATES_DRIVE_FOLDER_ID}' in parents and mimeType = 'application/vnd.google-apps.folder' and trashed = false",
-            fields="files(id, name)",
-            pageSize=1
-        ).execute()
-        folders = results.get('files', [])
-        
-        if not folders:
-            print(f"⚠️ Pasta {idioma} não encontrada no Drive.")
-            return []
-        
-        parent_id = folders[0]['id']
+def listar_templates(idioma, tag=None):
+    """Obtém os templates (com md5Checksum e modifiedTime) de um idioma no Google Drive."""
+    manifesto = obter_manifesto()
+    nome_pasta = tag if tag else idioma
+    parent_id = manifesto.buscar_pasta(TEMPLATES_DRIVE_FOLDER_ID, nome_pasta)
     
-    templates = service.files().list(
-        q=f"'{parent_id}' in parents and (mimeType = 'image/png' or mimeType = 'image/gif') and trashed = false",
-        fields="files(id, name, mimeType)",
-        pageSize=1000
-    ).execute().get('files', [])
+    if not parent_id:
+        print(f"⚠️ Pasta {nome_pasta} não encontrada no Drive.")
+        return []
     
-    return [template['id'] for template in templates]
+    return manifesto.listar_arquivos(parent_id, ["image/png", "image/gif"])
 
+def get_templates_for_language(idioma, tag=None):
+    """Obtém a lista de templates para um idioma específico do Google Drive."""
+    return [template['id'] for template in listar_templates(idioma, tag)]
+
+@functools.lru_cache(maxsize=None)
 def get_sheets_service():
-    """Inicializa e retorna o serviço do Google Sheets."""
+    """Inicializa e retorna o serviço do Google Sheets (construído uma vez por processo).
+
+    O documento de discovery vem da cópia empacotada com o googleapiclient
+    (static_discovery), sem buscá-lo na rede.
+    """
+    from google.oauth2 import service_account
+    from googleapiclient.discovery import build
     SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
     creds = service_account.Credentials.from_service_account_file(
         'sheets_credentials.json', scopes=SCOPES)
-    return build('sheets', 'v4', credentials=creds)
+    return build('sheets', 'v4', credentials=creds, static_discovery=True, cache_discovery=False)
+
+def carregar_cliente_ads():
+    """Carrega o cliente do Google Ads a partir de google-ads.yaml."""
+    from google.ads.googleads.client import GoogleAdsClient
+    return GoogleAdsClient.load_from_storage("google-ads.yaml")
+
+def revisao_planilha():
+    """Retorna a versão atual da planilha no Drive (None se não for possível consultá-la)."""
+    try:
+        metadados = drive_planilha.obter_metadados([SPREADSHEET_ID], fields="id, version").get(SPREADSHEET_ID)
+    except Exception as ex:
+        print(f"⚠️ Não foi possível obter a revisão da planilha: {ex}")
+        return None
+    return metadados.get("version") if metadados else None
 
 def ler_planilha():
-    """Lê a planilha do Google Sheets e retorna um DataFrame."""
-    service = get_sheets_service()
+    """Lê a planilha do Google Sheets e retorna um DataFrame.
+
+    A planilha só é baixada de novo quando a revisão dela mudou; caso contrário
+    é usada a cópia em CATALOGO_CACHE.
+    """
+    from campaign_catalog import carregar_valores, montar_dataframe
     RANGE_NAME = 'Página1!A:F'
     
-    result = service.spreadsheets().values().get(
-        spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME).execute()
-    values = result.get('values', [])
+    def ler_valores():
+        service = get_sheets_service()
+        result = rate_limiter.executar(service.spreadsheets().values().get(
+            spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME).execute, api="sheets")
+        return result.get('values', [])
     
+    values = carregar_valores(CATALOGO_CACHE, revisao_planilha(), ler_valores)
     if not values:
         print('Nenhum dado encontrado.')
         return None
     
-    df = pd.DataFrame(values[1:], columns=values[0])
-    return df
+    return montar_dataframe(values)
+
+def carregar_catalogo():
+    """Lê a planilha e monta o catálogo de campanhas indexado."""
+    from campaign_catalog import CatalogoCampanhas
+    df = ler_planilha()
+    if df is None or df.empty:
+        return None
+    return CatalogoCampanhas(df)
 
 def buscar_idioma_por_pais(pais):
     """Retorna o idioma correspondente ao país."""
@@ -265,172 +366,312 @@ def gerar_nomes_criativos(quantidade):
         nomes.append(f"{data_str}{sufixo}")
     return nomes
 
+@metricas.instrumentar("salvar_sem_metadados")
 def salvar_sem_metadados(image, output_path, file_format="PNG"):
     """Salva a imagem sem metadados para otimização."""
-    image = image.resize(DIMENSOES)
-    if file_format.upper() == "GIF":
-        image.save(output_path, format="GIF", optimize=True)
-    else:
-        image = image.convert("RGB")
-        image.save(output_path, format="PNG", optimize=True, compress_level=0)
+    from render import salvar_sem_metadados as salvar_imagem_sem_metadados
+    return salvar_imagem_sem_metadados(image, output_path, file_format, DIMENSOES, ENCODER_ORCAMENTO_BYTES, ENCODER_PRESET)
 
 def gerar_criativo(template_path, logo_path, texto, idioma):
     """Gera um criativo usando um template e logo."""
     # Implementação da geração de criativos
     pass
 
-def gerar_criativos(nome_site, idioma, quantidade, logo_path, templates_especificos=None, tag=None):
-    """Gera criativos usando templates do Google Drive."""
-    template_ids = get_templates_for_language(idioma, tag)
-    if not template_ids:
+def preparar_jobs(nome_site, idioma, quantidade, logo_path, templates_especificos=None, tag=None, subpasta=None,
+                  tamanhos=None):
+    """Sorteia e baixa os templates, retornando os jobs de renderização dos criativos.
+
+    Cada template gera um job por tamanho em `tamanhos` (padrão: TAMANHOS);
+    com mais de um tamanho, o nome do arquivo ganha o sufixo _LARGURAxALTURA.
+    """
+    tamanhos = normalizar_tamanhos(tamanhos or TAMANHOS)
+    templates = listar_templates(idioma, tag)
+    if not templates:
         print(f"⚠️ Nenhuma pasta encontrada para o idioma: {idioma}" + (f" e tag: {tag}" if tag else ""))
         return []
     
     pasta_destino = os.path.join(PASTA_OUTPUT, f"{idioma}_{nome_site}")
+    if subpasta:
+        pasta_destino = os.path.join(pasta_destino, subpasta)
     os.makedirs(pasta_destino, exist_ok=True)
     
     if quantidade == "all":
-        quantidade = len(template_ids)
+        quantidade = len(templates)
     else:
-        quantidade = min(len(template_ids), int(quantidade))
+        quantidade = min(len(templates), int(quantidade))
     
     nomes = gerar_nomes_criativos(quantidade)
-    criativos = []
     
-    for i, template_id in enumerate(random.sample(template_ids, quantidade)):
-        temp_template_path = os.path.join(pasta_destino, f"temp_template_{i}.png")
-        download_file(template_id, temp_template_path)
-        
-        ext = os.path.splitext(temp_template_path)[1].lower()
-        output_file = os.path.join(pasta_destino, f"{nomes[i]}{ext}")
-        logo = Image.open(logo_path).convert("RGBA").resize(LOGO_SIZE)
-        posicao = (DIMENSOES[0] - LOGO_SIZE[0] - 10, DIMENSOES[1] - LOGO_SIZE[1] - 10)
-        
-        if ext == ".gif":
-            template = Image.open(temp_template_path)
-            frames = []
-            durations = []
-            disposal = []
-            for frame in ImageSequence.Iterator(template):
-                frame_info = frame.info
-                frame = frame.convert("RGBA")
-                frame = frame.resize(DIMENSOES)
-                frame.paste(logo, posicao, logo)
-                frames.append(frame)
-                durations.append(frame_info.get("duration", 100))
-                disposal.append(frame_info.get("disposal", 2))
-            
-            frames[0].save(
-                output_file,
-                save_all=True,
-                append_images=frames[1:],
-                duration=durations,
-                disposal=disposal,
-                loop=template.info.get("loop", 0),
-                optimize=False
-            )
-        else:
-            template = Image.open(temp_template_path).resize(DIMENSOES)
-            template.paste(logo, posicao, logo)
-            salvar_sem_metadados(template, output_file, "PNG")
-        
-        os.remove(temp_template_path)
-        criativos.append(output_file)
+    amostra = random.sample(templates, quantidade)
+    # Revalida de uma vez (batch) os templates que vieram sem checksum na listagem
+    template_cache.revalidar(
+        [t['id'] for t in amostra if not t.get('md5Checksum')],
+        obter_metadados_arquivos
+    )
     
+    bitmaps = {tamanho["logo_size"]: logos.bitmap(logo_path, tamanho["logo_size"]) for tamanho in tamanhos}
+    varios = len(tamanhos) > 1
+    jobs = []
+    for i, template in enumerate(amostra):
+        template_path = baixar_template(template)
+        ext = os.path.splitext(template_path)[1].lower()
+        for tamanho in tamanhos:
+            sufixo = f"_{rotulo(tamanho['dimensoes'])}" if varios else ""
+            output_file = os.path.join(pasta_destino, f"{nomes[i]}{sufixo}{ext}")
+            jobs.append(montar_job(template['id'], template_path, logo_path, bitmaps[tamanho["logo_size"]],
+                                   output_file, tamanho, varios))
+    
+    return jobs
+
+def montar_job(template_id, template_path, logo_path, logo, output_file, tamanho=None, varios=False):
+    """Monta o job de renderização de um criativo em um tamanho.
+
+    "item" é a chave do criativo no diário da execução: o id do template ou,
+    quando a execução gera vários tamanhos, "template_id@LARGURAxALTURA".
+    """
+    tamanho = tamanho or {"dimensoes": DIMENSOES, "logo_size": LOGO_SIZE}
+    return {
+        "template_id": template_id,
+        "item": f"{template_id}@{rotulo(tamanho['dimensoes'])}" if varios else template_id,
+        "template_path": template_path,
+        "logo_path": logo_path,
+        "logo": logo,
+        "output_file": output_file,
+        "orcamento": ENCODER_ORCAMENTO_BYTES,
+        "preset": ENCODER_PRESET,
+        **tamanho,
+    }
+
+def retomar_jobs(tarefa, itens):
+    """Remonta o trabalho pendente de um grupo de anúncios a partir do diário.
+
+    Itens já enviados (ou pulados como duplicados) ficam de fora; criativos
+    renderizados cujo arquivo continua intacto são reaproveitados. Retorna
+    (jobs, prontos), em que `prontos` é {criativo: item}.
+    """
+    tamanhos = {tamanho["dimensoes"]: tamanho for tamanho in normalizar_tamanhos(tarefa.get("tamanhos") or TAMANHOS)}
+    jobs, prontos = [], {}
+    for chave, item in itens.items():
+        if item["etapa"] in ETAPAS_CONCLUIDAS:
+            continue
+        output_file = item["output_file"]
+        if item["etapa"] == RENDERIZADO and os.path.exists(output_file) and calcular_md5(output_file) == item["hash"]:
+            prontos[output_file] = chave
+            continue
+        template_id, _, dimensoes = chave.partition("@")
+        if dimensoes:
+            tamanho = normalizar_tamanhos([dimensoes])[0]
+            tamanho = tamanhos.get(tamanho["dimensoes"], tamanho)
+        else:
+            tamanho = next(iter(tamanhos.values()))
+        template_path = item["template_path"]
+        if not template_path or not os.path.exists(template_path):
+            template_path = baixar_template({"id": template_id})
+        logo = logos.bitmap(tarefa["logo_path"], tamanho["logo_size"])
+        jobs.append(montar_job(template_id, template_path, tarefa["logo_path"], logo, output_file, tamanho, bool(dimensoes)))
+    return jobs, prontos
+
+def renderizar_sem_cache(jobs):
+    """Renderiza os jobs no pool e registra nas métricas o tempo e o tamanho de cada criativo."""
+    from render import renderizar_lote
+    tempos = []
+    criativos = renderizar_lote(jobs, RENDER_WORKERS, tempos)
+    for tempo in tempos:
+        metricas.observar("renderizar_criativo", tempo["total"], bytes=tempo["bytes"])
+        if "codificacao" in tempo:
+            metricas.observar("salvar_sem_metadados", tempo["codificacao"], bytes=tempo["bytes"])
     return criativos
 
+def renderizar(jobs):
+    """Renderiza os jobs, reaproveitando os criativos já renderizados para outros grupos de anúncios.
+
+    Cada job é procurado no cache de renderização (mesmo template, logo,
+    tamanho e encoder); os encontrados são só copiados para o nome do grupo.
+    Os demais são reservados, renderizados em um único lote e guardados. Jobs
+    que outra thread está renderizando no momento esperam por ela e são
+    copiados em seguida. Retorna os caminhos na ordem dos jobs.
+    """
+    if not render_cache.ativo:
+        return renderizar_sem_cache(jobs)
+    criativos = [None] * len(jobs)
+    chaves = [chave_criativo(job, render_cache.md5_arquivo(job["template_path"]), render_cache.md5_arquivo(job["logo_path"]))
+              for job in jobs]
+    pendentes = list(range(len(jobs)))
+    while pendentes:
+        proprios, alheios = [], []
+        for i in pendentes:
+            inicio = time.perf_counter()
+            caminho = render_cache.obter(chaves[i], jobs[i]["output_file"])
+            if caminho:
+                criativos[i] = caminho
+                metricas.observar("render_cache", time.perf_counter() - inicio, bytes=os.path.getsize(caminho))
+            elif render_cache.reservar(chaves[i]):
+                proprios.append(i)
+            else:
+                alheios.append(i)
+        if proprios:
+            renderizados = []
+            try:
+                renderizados = renderizar_sem_cache([jobs[i] for i in proprios])
+            finally:
+                for posicao, i in enumerate(proprios):
+                    if posicao < len(renderizados):
+                        criativos[i] = renderizados[posicao]
+                        render_cache.guardar(chaves[i], renderizados[posicao])
+                    else:
+                        render_cache.liberar(chaves[i])
+        for i in alheios:
+            render_cache.aguardar(chaves[i])
+        pendentes = alheios
+    return criativos
+
+@metricas.instrumentar("gerar_criativos")
+def gerar_criativos(nome_site, idioma, quantidade, logo_path, templates_especificos=None, tag=None, tamanhos=None):
+    """Gera criativos usando templates do Google Drive, um por template e tamanho (padrão: TAMANHOS)."""
+    jobs = preparar_jobs(nome_site, idioma, quantidade, logo_path, templates_especificos, tag, tamanhos=tamanhos)
+    return renderizar(jobs)
+
 def fazer_requisicao_liberada(func, *args, **kwargs):
-    """Gerencia o limite de requisições."""
-    global request_count
-    if request_count >= MAX_REQUESTS:
-        print(f"Limite de requisições ({MAX_REQUESTS}) atingido. Aguardando reinício...")
-        time.sleep(3600)
-        request_count = 0
+    """Executa uma requisição ao Google Ads respeitando o limite de requisições.
+    
+    Erros temporários (quota, 429, 5xx) são refeitos com backoff; erros definitivos
+    são exibidos e resultam em None.
+    """
+    conta = kwargs.get("customer_id") or getattr(kwargs.get("request"), "customer_id", None)
+    if not conta and kwargs.get("resource_name"):
+        conta = kwargs["resource_name"].split("/")[1]
+    with metricas.medir("fazer_requisicao_liberada") as medida:
+        try:
+            resposta = rate_limiter.executar(func, *args, api="ads", conta=conta, **kwargs)
+        except Exception as e:
+            print(f"Erro ao fazer a requisição: {e}")
+            medida["erro"] = True
+            return None
+        # Quota do Ads: cada operação de um mutate conta; consultas e demais chamadas contam como uma
+        operacoes = getattr(kwargs.get("request"), "operations", None) or kwargs.get("mutate_operations")
+        medida["quota"] = len(operacoes) if operacoes else 1
+        return resposta
+
+def escopo_grupo(account_id, ad_group_id):
+    return f"customers/{account_id}/adGroups/{ad_group_id}"
+
+def baixar_imagem(url):
+    """Baixa a imagem de um anúncio ativo para calcular o hash perceptual."""
+    import requests
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    return response.content
+
+resumos_grupos = {}  # (account_id, ad_group_id) -> resumo dos anúncios ativos, válido durante a execução
+_resumos_lock = threading.Lock()
+
+def prefetch_anuncios(client, pares):
+    """Carrega no cache da execução o resumo dos anúncios ativos dos grupos informados.
+
+    Faz um único search_stream por conta para todos os grupos dela, em vez de
+    uma busca por grupo de anúncios.
+    """
+    with _resumos_lock:
+        faltantes = [par for par in pares if par not in resumos_grupos]
+    if not faltantes:
+        return
     try:
-        response = func(*args, **kwargs)
-        request_count += 1
-        return response
-    except Exception as e:
-        print(f"Erro ao fazer a requisição: {e}")
-        return None
+        resumos = prefetch_grupos(client, faltantes, executar=fazer_requisicao_liberada)
+    except Exception as ex:
+        print(f"❌ Erro ao buscar os anúncios ativos: {ex}")
+        return
+    with _resumos_lock:
+        resumos_grupos.update(resumos)
 
+@metricas.instrumentar("get_existing_creatives")
 def get_existing_creatives(client, account_id, ad_group_id):
-    """Obtém os criativos existentes de um grupo de anúncios."""
-    google_ads_service = client.get_service("GoogleAdsService")
-    query = f"""
-        SELECT ad_group_ad.ad.final_urls 
-        FROM ad_group_ad 
-        WHERE ad_group_ad.ad_group = 'customers/{account_id}/adGroups/{ad_group_id}' 
-        AND ad_group_ad.status = 'ENABLED'
+    """Obtém os criativos existentes de um grupo de anúncios.
+
+    Lê o cache da execução (preenchido por `prefetch_anuncios`, que é chamado
+    aqui caso o grupo ainda não esteja nele), atualiza o índice de
+    deduplicação com as imagens ativas e retorna a URL final do primeiro
+    anúncio ativo.
     """
-    try:
-        response = fazer_requisicao_liberada(google_ads_service.search, customer_id=account_id, query=query)
-        for row in response:
-            final_urls = row.ad_group_ad.ad.final_urls
-            if final_urls:
-                return final_urls[0]
+    par = (account_id, ad_group_id)
+    prefetch_anuncios(client, [par])
+    with _resumos_lock:
+        resumo = resumos_grupos.get(par)
+    if resumo is None:
         return None
+    try:
+        obter_dedup().sincronizar_ativos(escopo_grupo(account_id, ad_group_id), resumo["imagens"], baixar_imagem)
     except Exception as ex:
-        print(f"❌ Erro ao buscar criativos existentes: {ex}")
-        return None
+        print(f"❌ Erro ao atualizar o índice de duplicados: {ex}")
+    return resumo["final_url"]
+
+def resumo_anuncios(account_id, ad_group_id):
+    """Resumo dos anúncios ativos do grupo já carregado nesta execução."""
+    with _resumos_lock:
+        return resumos_grupos.get((account_id, ad_group_id), resumo_vazio())
+
+@metricas.instrumentar("upload_creatives")
+def enviar_grupos(client, account_id, grupos):
+    """Faz upload dos criativos de vários grupos de anúncios de uma conta, pulando os quase duplicados.
+
+    `grupos` é uma lista de (ad_group_id, criativos, final_url). Os criativos
+    de todos os grupos vão juntos para `enviar_criativos`, que escolhe entre
+    mutates e o BatchJobService pelo total da conta. Retorna
+    {ad_group_id: {creative_path: resultado}}.
+    """
+    por_grupo, hashes, itens = {}, {}, []
+    for ad_group_id, criativos, final_url in grupos:
+        novos, duplicados = obter_dedup().filtrar(escopo_grupo(account_id, ad_group_id), criativos)
+        resultados = por_grupo.setdefault(ad_group_id, {})
+        for creative_path, parecido, dist in duplicados:
+            print(f"⚠️ Criativo {creative_path} pulado: parecido com {parecido} (distância {dist}).")
+            resultados[creative_path] = {"duplicado": parecido}
+        for creative_path, valor, dimensoes in novos:
+            hashes[creative_path] = (ad_group_id, valor, dimensoes)
+            itens.append((ad_group_id, creative_path, final_url))
+        metricas.contar("upload_creatives", bytes=sum(os.path.getsize(creative_path) for creative_path, _, _ in novos),
+                        grupo=f"{account_id}/{ad_group_id}")
+
+    print(f"Enviando {len(itens)} criativo(s) de {len(por_grupo)} grupo(s) da conta {account_id}...")
+    enviados = enviar_criativos(client, account_id, itens, executar=fazer_requisicao_liberada) if itens else {}
+    for creative_path, (ad_group_id, valor, dimensoes) in hashes.items():
+        resultado = enviados.get(creative_path, {"erro": "criativo não enviado"})
+        por_grupo[ad_group_id][creative_path] = resultado
+        if "resource_name" in resultado:
+            obter_dedup().registrar(escopo_grupo(account_id, ad_group_id), resultado["resource_name"], valor, "enviado", dimensoes)
+            print(f"✅ Criativo enviado com sucesso: {resultado['resource_name']}")
+        else:
+            print(f"❌ Erro ao enviar o criativo {creative_path}: {resultado['erro']}")
+    return por_grupo
 
 def upload_creatives(client, account_id, ad_group_id, criativos, final_url):
-    """Faz upload dos criativos para o Google Ads."""
-    ad_group_ad_service = client.get_service("AdGroupAdService")
-    for idx, creative_path in enumerate(criativos):
-        try:
-            print(f"Tentando enviar o criativo: {creative_path} (índice {idx})")
-            with open(creative_path, "rb") as f:
-                image_data = f.read()
-            ad_operation = client.get_type("AdGroupAdOperation")
-            ad = ad_operation.create
-            ad.ad_group = f"customers/{account_id}/adGroups/{ad_group_id}"
-            ad.status = client.enums.AdGroupAdStatusEnum.ENABLED
-            image_ad = ad.ad.image_ad
-            image_ad.data = image_data
-            ext = os.path.splitext(creative_path)[1].lower()
-            if ext == ".gif":
-                image_ad.mime_type = client.enums.MimeTypeEnum.IMAGE_GIF
-            else:
-                image_ad.mime_type = client.enums.MimeTypeEnum.IMAGE_PNG
-            ad.ad.final_urls.append(final_url)
-            ad.ad.display_url = final_url.split("://")[-1]
-            ad.ad.name = os.path.splitext(os.path.basename(creative_path))[0]
-            response = fazer_requisicao_liberada(ad_group_ad_service.mutate_ad_group_ads,
-                                                 customer_id=account_id,
-                                                 operations=[ad_operation])
-            if response:
-                for result in response.results:
-                    print(f"✅ Criativo enviado com sucesso: {result.resource_name}")
-        except Exception as ex:
-            print(f"❌ Erro ao enviar o criativo {creative_path}: {ex}")
+    """Faz upload dos criativos de um único grupo de anúncios (ver `enviar_grupos`)."""
+    return enviar_grupos(client, account_id, [(ad_group_id, criativos, final_url)])[ad_group_id]
 
 def main_interativo():
     """Função principal no modo interativo."""
-    df = ler_planilha()
-    if df is None or df.empty:
+    catalogo = carregar_catalogo()
+    if catalogo is None:
         print("Nenhuma campanha encontrada na planilha.")
         exit(1)
     
     pais_selecionado = input("Digite o(s) país(es) para subir os criativos (separados por vírgula, ou 'all' para todos os países): ").strip()
     
     if pais_selecionado.lower() == "all":
-        df_filtrado = df
+        linhas_paises = catalogo.todas()
     else:
         paises = [p.strip() for p in pais_selecionado.split(",") if p.strip()]
-        df_filtrado = pd.DataFrame()
+        conjuntos = []
         for pais in paises:
-            df_pais = df[df["País"].str.contains(pais, case=False, na=False)]
-            if df_pais.empty:
+            linhas = catalogo.linhas_pais(pais)
+            if not linhas.size:
                 print(f"⚠️ Nenhuma campanha encontrada para o país: {pais}")
-            else:
-                df_filtrado = pd.concat([df_filtrado, df_pais])
+            conjuntos.append(linhas)
+        linhas_paises = catalogo.unir(*conjuntos)
         
-        if df_filtrado.empty:
+        if not linhas_paises.size:
             print("❌ Nenhuma campanha encontrada para os países informados.")
             exit(1)
-        
-        df_filtrado = df_filtrado.drop_duplicates()
+    df_filtrado = catalogo.selecionar(linhas_paises)
     
     print("Campanhas encontradas:")
     campanhas_unicas = df_filtrado["Campanha"].unique()
@@ -443,18 +684,15 @@ def main_interativo():
         tag = None
     else:
         campanhas_escolhidas = [c.strip() for c in campanhas_input.split(",") if c.strip()]
-        df_final = pd.DataFrame()
+        conjuntos = []
         tag = None
         for item in campanhas_escolhidas:
             if item.lower().startswith("all "):
                 tag = item[4:].strip().upper()
-                pattern = re.escape(f"[ - {tag} - ]")
-                df_filtered = df_filtrado[df_filtrado["Campanha"].str.contains(pattern, case=False, na=False)]
-                df_final = pd.concat([df_final, df_filtered])
+                conjuntos.append(catalogo.linhas_tag(tag))
             else:
-                df_filtered = df_filtrado[df_filtrado["Campanha"] == item]
-                df_final = pd.concat([df_final, df_filtered])
-        df_final = df_final.drop_duplicates()
+                conjuntos.append(catalogo.linhas_campanha(item))
+        df_final = catalogo.selecionar(*conjuntos, dentro_de=linhas_paises)
         if df_final.empty:
             print("❌ Nenhuma campanha corresponde à seleção.")
             exit(1)
@@ -479,8 +717,9 @@ def main_interativo():
                 "quantidade": quantidade_global
             }
     
-    client = GoogleAdsClient.load_from_storage("google-ads.yaml")
+    client = carregar_cliente_ads()
     processados = set()
+    tarefas = []
     for idx, row in df_final.iterrows():
         try:
             account_id = str(int(row["ID da Conta"]))
@@ -518,19 +757,167 @@ def main_interativo():
             print(f"❌ Idioma não encontrado para o país {row['País']}. Pulando {site}.")
             continue
         
-        criativos = gerar_criativos(site, idioma, quantidade, logo_path, templates_especificos, tag)
-        if not criativos:
-            print(f"❌ Nenhum criativo gerado para o site {site}.")
-            continue
+        tarefas.append({
+            "account_id": account_id,
+            "ad_group_id": ad_group_id,
+            "site": site,
+            "idioma": idioma,
+            "quantidade": quantidade,
+            "logo_path": logo_path,
+            "templates_especificos": templates_especificos,
+            "tag": tag,
+            "tamanhos": TAMANHOS,
+        })
+    
+    processar_tarefas(client, tarefas)
+
+_input_lock = threading.Lock()
+
+def processar_tarefas(client, tarefas, run_id=None):
+    """Baixa, renderiza e envia os criativos dos grupos de anúncios em um pipeline sobreposto.
+
+    Cada etapa concluída é registrada no diário da execução `run_id` (criada
+    aqui se não for informada), de modo que a execução pode ser retomada com
+    `--resume <run_id>` sem refazer o que já foi feito.
+
+    O envio é feito por conta: cada grupo de anúncios que passa pela etapa de
+    upload fica aguardando, e o último grupo da conta (ou o laço principal,
+    quando um grupo falha antes) envia os criativos de todos juntos, para que
+    contas grandes cheguem ao BatchJobService.
+    """
+    journal = obter_journal()
+    if run_id is None:
+        run_id = journal.nova_execucao(tarefas)
+    metricas.rotulos["run_id"] = run_id
+    print(f"🧾 Execução {run_id} (use --resume {run_id} para retomá-la se for interrompida).")
+    prefetch_anuncios(client, [(tarefa["account_id"], tarefa["ad_group_id"]) for tarefa in tarefas])
+    grupos_pendentes = Counter(tarefa["account_id"] for tarefa in tarefas)
+    aguardando_envio = defaultdict(list)
+    envios_lock = threading.Lock()
+    
+    def liberar_grupo(tarefa, pronta):
+        """Marca o grupo como resolvido; se for o último da conta, retorna os grupos prontos para envio."""
+        account_id = tarefa["account_id"]
+        with envios_lock:
+            if tarefa.get("liberada"):
+                return []
+            tarefa["liberada"] = True
+            if pronta:
+                aguardando_envio[account_id].append(tarefa)
+            grupos_pendentes[account_id] -= 1
+            if grupos_pendentes[account_id] > 0:
+                return []
+            return aguardando_envio.pop(account_id, [])
+    
+    def enviar_conta(prontas):
+        if not prontas:
+            return
+        account_id = prontas[0]["account_id"]
+        resultados = enviar_grupos(client, account_id,
+                                   [(tarefa["ad_group_id"], tarefa["criativos"], tarefa["final_url"]) for tarefa in prontas])
+        for tarefa in prontas:
+            for criativo, resultado in resultados[tarefa["ad_group_id"]].items():
+                item = tarefa["prontos"].get(criativo)
+                if item is None:
+                    continue
+                if "resource_name" in resultado:
+                    journal.registrar(run_id, account_id, tarefa["ad_group_id"], item, ENVIADO,
+                                      resource_name=resultado["resource_name"])
+                elif "duplicado" in resultado:
+                    journal.registrar(run_id, account_id, tarefa["ad_group_id"], item, DUPLICADO)
+    
+    def etapa_download(tarefa):
+        itens = journal.itens(run_id, tarefa["account_id"], tarefa["ad_group_id"])
+        if itens:
+            tarefa["retomada"] = True
+            tarefa["jobs"], tarefa["prontos"] = retomar_jobs(tarefa, itens)
+            return tarefa
+        tarefa["jobs"] = preparar_jobs(
+            tarefa["site"], tarefa["idioma"], tarefa["quantidade"], tarefa["logo_path"],
+            tarefa["templates_especificos"], tarefa["tag"], subpasta=tarefa["ad_group_id"],
+            tamanhos=tarefa.get("tamanhos")
+        )
+        tarefa["prontos"] = {}
+        for job in tarefa["jobs"]:
+            journal.registrar(run_id, tarefa["account_id"], tarefa["ad_group_id"], job["item"], BAIXADO,
+                              template_path=job["template_path"], output_file=job["output_file"])
+        return tarefa
+    
+    def etapa_render(tarefa):
+        criativos = renderizar(tarefa["jobs"]) if tarefa["jobs"] else []
+        for job, criativo in zip(tarefa["jobs"], criativos):
+            journal.registrar(run_id, tarefa["account_id"], tarefa["ad_group_id"], job["item"], RENDERIZADO,
+                              output_file=criativo, hash=calcular_md5(criativo))
+            tarefa["prontos"][criativo] = job["item"]
+        tarefa["criativos"] = list(tarefa["prontos"])
+        return tarefa
+    
+    def etapa_upload(tarefa):
+        site = tarefa["site"]
+        if not tarefa["criativos"]:
+            if tarefa.get("retomada"):
+                print(f"✅ Nada pendente para o site {site} (grupo {tarefa['ad_group_id']}).")
+            else:
+                print(f"❌ Nenhum criativo gerado para o site {site}.")
+            enviar_conta(liberar_grupo(tarefa, False))
+            return tarefa
         
-        final_url = get_existing_creatives(client, account_id, ad_group_id)
+        final_url = get_existing_creatives(client, tarefa["account_id"], tarefa["ad_group_id"])
         if final_url:
-            print(f"✅ URL final encontrada: {final_url}")
+            ativos = resumo_anuncios(tarefa["account_id"], tarefa["ad_group_id"])["anuncios_imagem"]
+            print(f"✅ URL final encontrada: {final_url} ({ativos} anúncio(s) de imagem ativo(s))")
         else:
-            print(f"⚠️ Nenhum criativo ativo encontrado para o site {site}.")
-            final_url = input(f"Digite a URL final para o site {site}: ").strip()
+            with _input_lock:
+                print(f"⚠️ Nenhum criativo ativo encontrado para o site {site}.")
+                final_url = input(f"Digite a URL final para o site {site} (grupo {tarefa['ad_group_id']}): ").strip()
         
-        upload_creatives(client, account_id, ad_group_id, criativos, final_url)
+        tarefa["final_url"] = final_url
+        enviar_conta(liberar_grupo(tarefa, True))
+        return tarefa
+    
+    def por_grupo(etapa):
+        # Atribui ao grupo de anúncios da tarefa tudo o que a etapa medir
+        def envolvida(tarefa):
+            with metricas.grupo(f"{tarefa['account_id']}/{tarefa['ad_group_id']}"):
+                return etapa(tarefa)
+        return envolvida
+    
+    pipeline = Pipeline([
+        Estagio("download", por_grupo(etapa_download), PIPELINE_DOWNLOAD_WORKERS),
+        Estagio("render", por_grupo(etapa_render), PIPELINE_RENDER_WORKERS),
+        Estagio("upload", por_grupo(etapa_upload), PIPELINE_UPLOAD_WORKERS),
+    ], capacidade=PIPELINE_CAPACIDADE)
+    
+    falhas = 0
+    for _, tarefa, erro in pipeline.executar(tarefas):
+        if erro is None:
+            continue
+        falhas += 1
+        print(f"❌ Erro ao processar o site {tarefa['site']} (conta {tarefa['account_id']}, grupo {tarefa['ad_group_id']}): {erro}")
+        # Os demais grupos da conta não esperam mais por este
+        try:
+            enviar_conta(liberar_grupo(tarefa, False))
+        except Exception as ex:
+            print(f"❌ Erro ao enviar os criativos da conta {tarefa['account_id']}: {ex}")
+    for account_id in list(aguardando_envio):
+        falhas += 1  # Grupos que nunca chegaram ao pipeline deixaram a conta incompleta
+        try:
+            enviar_conta(aguardando_envio.pop(account_id))
+        except Exception as ex:
+            print(f"❌ Erro ao enviar os criativos da conta {account_id}: {ex}")
+    if not falhas:
+        journal.concluir(run_id)
+
+def emitir_relatorio():
+    """Grava o relatório JSON da execução e, se configurado, o textfile do Prometheus."""
+    nome = metricas.rotulos.get("run_id") or datetime.now().strftime("%Y%m%d-%H%M%S")
+    try:
+        caminho = metricas.gravar_json(os.path.join(RELATORIOS_DIR, f"{nome}.json"))
+        print(f"🧾 Relatório da execução salvo em {caminho}")
+        if PROMETHEUS_TEXTFILE:
+            metricas.gravar_prometheus(PROMETHEUS_TEXTFILE)
+    except OSError as ex:
+        print(f"⚠️ Não foi possível gravar o relatório da execução: {ex}")
 
 def main():
     """Função principal do programa."""
@@ -544,9 +931,43 @@ if __name__ == "__main__":
     parser.add_argument("--ad_group_id", type=str, help="ID do Grupo de Anúncios")
     parser.add_argument("--site", type=str, help="Nome do Site ou Campanha")
     parser.add_argument("--quantity", type=str, help="Quantidade de criativos a serem gerados (número ou 'all')")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS, help="Processos usados na renderização (1 = serial)")
+    parser.add_argument("--preset", choices=["rapido", "equilibrado", "compacto"], default=ENCODER_PRESET, help="Preset do encoder: velocidade x tamanho dos arquivos")
+    parser.add_argument("--tamanhos", help="Formatos gerados de cada template, separados por vírgula (ex.: 336x280,300x250,728x90,160x600; padrão: TAMANHOS)")
+    parser.add_argument("--sem-cache-render", action="store_true", help="Renderiza todos os criativos, sem reaproveitar os já renderizados")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Retoma uma execução interrompida do modo interativo")
+    parser.add_argument("--dedup-limiar", type=int, default=DEDUP_LIMIAR_HAMMING, help="Distância de Hamming máxima para considerar um criativo duplicado")
+    parser.add_argument("--prometheus", metavar="ARQUIVO", default=PROMETHEUS_TEXTFILE, help="Grava as métricas da execução neste textfile do Prometheus")
     args = parser.parse_args()
+    RENDER_WORKERS = max(1, args.workers)
+    ENCODER_PRESET = args.preset
+    if args.tamanhos is not None:
+        try:
+            TAMANHOS = [rotulo(tamanho["dimensoes"]) for tamanho in normalizar_tamanhos(args.tamanhos)]
+        except ValueError as ex:
+            parser.error(str(ex))
+        if not TAMANHOS:
+            parser.error("informe ao menos um tamanho em --tamanhos")
+    PROMETHEUS_TEXTFILE = args.prometheus
+    if args.sem_cache_render:
+        render_cache.max_bytes = 0
+    DEDUP_LIMIAR_HAMMING = args.dedup_limiar
+    if RENDER_WORKERS > 1:
+        # Os workers nascem agora, antes das threads do pipeline e do gRPC (ver render.obter_pool)
+        from render import obter_pool
+        obter_pool(RENDER_WORKERS)
+    atexit.register(emitir_relatorio)
+    # Os acertos do cache de templates só atualizam o índice em memória
+    atexit.register(template_cache.salvar)
 
-    if args.account_id and args.ad_group_id and args.site and args.quantity:
+    if args.resume:
+        tarefas = obter_journal().tarefas(args.resume)
+        if tarefas is None:
+            print(f"❌ Execução {args.resume} não encontrada em {RUN_JOURNAL_DB}.")
+            exit(1)
+        client = carregar_cliente_ads()
+        processar_tarefas(client, tarefas, args.resume)
+    elif args.account_id and args.ad_group_id and args.site and args.quantity:
         account_id = args.account_id
         ad_group_id = args.ad_group_id
         site = args.site
@@ -564,7 +985,8 @@ if __name__ == "__main__":
             print(f"❌ Nenhum criativo gerado para o site {site}. Abortando.")
             exit(1)
 
-        client = GoogleAdsClient.load_from_storage("google-ads.yaml")
+        client = carregar_cliente_ads()
+        prefetch_anuncios(client, [(account_id, ad_group_id)])
         final_url = get_existing_creatives(client, account_id, ad_group_id)
         if final_url:
             print(f"✅ URL final encontrada: {final_url}")
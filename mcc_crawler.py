@@ -0,0 +1,59 @@
+from pipeline import Pipeline, Estagio
+
+# ------------------------ CONFIGURAÇÕES DO CRAWLER ------------------------
+MCC_WORKERS = 8             # Contas filhas consultadas ao mesmo tempo
+MCC_CAPACIDADE = 16         # Contas aguardando entre a listagem e as consultas
+
+
+def _executar_direto(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def listar_contas_filhas(client, manager_id, executar=_executar_direto):
+    """Gera (customer_id, nome, status) de todas as contas finais abaixo do MCC.
+
+    Um único search_stream em `customer_client` devolve a hierarquia inteira
+    (todos os níveis); as contas gerenciadoras intermediárias ficam de fora.
+    O stream é lido por inteiro dentro de `executar`, para que uma falha no
+    meio dele também seja refeita. `status` é o nome do CustomerStatus
+    (ENABLED, SUSPENDED, CANCELED...).
+    """
+    google_ads_service = client.get_service("GoogleAdsService")
+    query = """
+        SELECT customer_client.id, customer_client.descriptive_name, customer_client.status
+        FROM customer_client
+        WHERE customer_client.manager = FALSE
+    """
+
+    def consultar(customer_id, query):
+        # Só os três campos de cada conta ficam em memória, não as linhas do stream
+        return [(str(row.customer_client.id), row.customer_client.descriptive_name, row.customer_client.status.name)
+                for batch in google_ads_service.search_stream(customer_id=customer_id, query=query)
+                for row in batch.results]
+
+    yield from executar(consultar, customer_id=str(manager_id), query=query) or []
+
+
+def percorrer_contas(contas, obter_linhas, workers=MCC_WORKERS, ao_falhar=None):
+    """Consulta as contas em paralelo e gera as linhas de cada uma assim que ficam prontas.
+
+    As contas saem na ordem em que terminam: uma conta lenta não segura as
+    demais (nem as acumula em memória).
+
+    `contas` pode ser qualquer iterável (inclusive um gerador que ainda está
+    sendo lido): as contas são consumidas aos poucos, com no máximo
+    MCC_CAPACIDADE aguardando, e nada além das linhas de uma conta fica em
+    memória. `obter_linhas(conta)` retorna as linhas da conta; se levantar
+    erro, `ao_falhar(conta, erro)` é chamado e as demais contas seguem.
+    """
+    pipeline = Pipeline(
+        [Estagio("conta", lambda conta: (conta, list(obter_linhas(conta))), workers)],
+        capacidade=MCC_CAPACIDADE,
+        ordenado=False
+    )
+    for _, resultado, erro in pipeline.executar(contas):
+        if erro is not None:
+            if ao_falhar is not None:
+                ao_falhar(resultado, erro)
+            continue
+        yield from resultado[1]
@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import bisect
+import threading
+import functools
+from contextlib import contextmanager
+
+# ------------------------ CONFIGURAÇÕES DAS MÉTRICAS ------------------------
+# Limites superiores (s) dos buckets do histograma de latência
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PREFIXO_PROMETHEUS = "criativos"
+
+
+class _Serie:
+    """Contadores de um estágio (opcionalmente de um grupo de anúncios)."""
+
+    def __init__(self, amostras=False):
+        self.contagem = 0
+        self.erros = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+        self.buckets = [0] * (len(BUCKETS_LATENCIA) + 1)  # último = acima do maior limite
+        self.bytes = 0
+        self.quota = 0
+        self.amostras = [] if amostras else None
+
+    def observar(self, segundos, erro):
+        if self.amostras is not None:
+            self.amostras.append(segundos)
+        self.contagem += 1
+        self.erros += bool(erro)
+        self.soma += segundos
+        self.maximo = max(self.maximo, segundos)
+        self.buckets[bisect.bisect_left(BUCKETS_LATENCIA, segundos)] += 1
+
+    def somar(self, outra):
+        self.contagem += outra.contagem
+        self.erros += outra.erros
+        self.soma += outra.soma
+        self.maximo = max(self.maximo, outra.maximo)
+        self.buckets = [a + b for a, b in zip(self.buckets, outra.buckets)]
+        self.bytes += outra.bytes
+        self.quota += outra.quota
+        if self.amostras is not None and outra.amostras is not None:
+            self.amostras.extend(outra.amostras)
+
+    def quantil(self, q):
+        """Quantil `q` da latência.
+
+        Com amostras guardadas o valor é exato; sem elas é o limite superior do
+        bucket que contém o quantil (estimativa do histograma, limitada ao máximo).
+        """
+        if not self.contagem:
+            return 0.0
+        if self.amostras:
+            ordenadas = sorted(self.amostras)
+            return round(ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))], 6)
+        alvo = q * self.contagem
+        acumulado = 0
+        for i, quantidade in enumerate(self.buckets):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                return min(BUCKETS_LATENCIA[i], self.maximo) if i < len(BUCKETS_LATENCIA) else self.maximo
+        return self.maximo
+
+    def resumo(self):
+        return {
+            "contagem": self.contagem,
+            "erros": self.erros,
+            "segundos": round(self.soma, 6),
+            "media": round(self.soma / self.contagem, 6) if self.contagem else 0.0,
+            "p50": self.quantil(0.5),
+            "p95": self.quantil(0.95),
+            "maximo": round(self.maximo, 6),
+            "bytes": self.bytes,
+            "quota": self.quota,
+        }
+
+
+class Metricas:
+    """Contagens, histogramas de latência, bytes e quota por estágio e por grupo de anúncios.
+
+    Os estágios são medidos com `medir` (bloco `with`) ou `instrumentar`
+    (decorador). O grupo de anúncios é o definido por `grupo` na thread atual,
+    o que permite atribuir ao grupo certo chamadas feitas bem abaixo no código
+    (download, requisições ao Ads) sem passar o grupo adiante. No fim da
+    execução, `gravar_json` e `gravar_prometheus` geram os relatórios. Com
+    `guardar_amostras` cada latência é guardada e os quantis ficam exatos
+    (útil em benchmarks; em produção o histograma basta).
+    """
+
+    def __init__(self, guardar_amostras=False):
+        self.inicio = time.time()
+        self.guardar_amostras = guardar_amostras
+        self.rotulos = {}  # Identificação da execução incluída no relatório (run_id, por exemplo)
+        self._series = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _serie(self, estagio, grupo):
+        chave = (estagio, grupo or "")
+        serie = self._series.get(chave)
+        if serie is None:
+            serie = self._series.setdefault(chave, _Serie(self.guardar_amostras))
+        return serie
+
+    # ------------------------ REGISTRO ------------------------
+    @contextmanager
+    def grupo(self, nome):
+        """Atribui ao grupo `nome` tudo o que for medido nesta thread dentro do bloco."""
+        anterior = getattr(self._local, "grupo", None)
+        self._local.grupo = nome
+        try:
+            yield
+        finally:
+            self._local.grupo = anterior
+
+    def grupo_atual(self):
+        return getattr(self._local, "grupo", None)
+
+    def observar(self, estagio, segundos, erro=False, bytes=0, quota=0, grupo=None):
+        with self._lock:
+            serie = self._serie(estagio, grupo or self.grupo_atual())
+            serie.observar(segundos, erro)
+            serie.bytes += bytes
+            serie.quota += quota
+
+    def contar(self, estagio, bytes=0, quota=0, grupo=None):
+        """Soma bytes/quota a um estágio sem registrar uma nova medição de latência."""
+        with self._lock:
+            serie = self._serie(estagio, grupo or self.grupo_atual())
+            serie.bytes += bytes
+            serie.quota += quota
+
+    @contextmanager
+    def medir(self, estagio):
+        """Mede o bloco como uma chamada de `estagio`.
+
+        O dicionário devolvido aceita "bytes" e "quota", somados à medição, e
+        "erro", para marcar como falha um erro que o próprio bloco tratou.
+        """
+        extra = {"bytes": 0, "quota": 0, "erro": False}
+        inicio = time.perf_counter()
+        erro = False
+        try:
+            yield extra
+        except BaseException:
+            erro = True
+            raise
+        finally:
+            self.observar(estagio, time.perf_counter() - inicio, erro or extra["erro"], extra["bytes"], extra["quota"])
+
+    def instrumentar(self, estagio):
+        """Decorador que mede cada chamada da função como `estagio`."""
+        def decorador(func):
+            @functools.wraps(func)
+            def envolvida(*args, **kwargs):
+                with self.medir(estagio):
+                    return func(*args, **kwargs)
+            return envolvida
+        return decorador
+
+    # ------------------------ RELATÓRIOS ------------------------
+    def relatorio(self, extras=None):
+        """Monta o relatório: totais por estágio e, para cada grupo, os estágios dele."""
+        with self._lock:
+            series = {chave: serie for chave, serie in self._series.items()}
+            estagios = {}
+            grupos = {}
+            for (estagio, grupo), serie in sorted(series.items()):
+                total = estagios.setdefault(estagio, _Serie(self.guardar_amostras))
+                total.somar(serie)
+                if grupo:
+                    grupos.setdefault(grupo, {})[estagio] = serie.resumo()
+            relatorio = {
+                **self.rotulos,
+                "inicio": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.inicio)),
+                "duracao_segundos": round(time.time() - self.inicio, 3),
+                "estagios": {estagio: serie.resumo() for estagio, serie in estagios.items()},
+                "grupos": grupos,
+            }
+        relatorio.update(extras or {})
+        return relatorio
+
+    def gravar_json(self, caminho, extras=None):
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.relatorio(extras), f, ensure_ascii=False, indent=2)
+        return caminho
+
+    def gravar_prometheus(self, caminho):
+        """Grava as métricas por estágio no formato textfile do node_exporter.
+
+        Só os totais por estágio são exportados (sem o grupo como label, para
+        não multiplicar as séries). O arquivo é trocado atomicamente.
+        """
+        nome = f"{PREFIXO_PROMETHEUS}_estagio"
+        linhas = [
+            f"# HELP {nome}_segundos Latência das chamadas por estágio.",
+            f"# TYPE {nome}_segundos histogram",
+        ]
+        estagios = {}
+        with self._lock:
+            for (estagio, _), serie in self._series.items():
+                estagios.setdefault(estagio, _Serie()).somar(serie)
+        for estagio, serie in sorted(estagios.items()):
+            acumulado = 0
+            for limite, quantidade in zip(BUCKETS_LATENCIA, serie.buckets):
+                acumulado += quantidade
+                linhas.append(f'{nome}_segundos_bucket{{estagio="{estagio}",le="{limite}"}} {acumulado}')
+            linhas.append(f'{nome}_segundos_bucket{{estagio="{estagio}",le="+Inf"}} {serie.contagem}')
+            linhas.append(f'{nome}_segundos_sum{{estagio="{estagio}"}} {serie.soma:.6f}')
+            linhas.append(f'{nome}_segundos_count{{estagio="{estagio}"}} {serie.contagem}')
+        for metrica, atributo, ajuda in (("erros_total", "erros", "Chamadas que terminaram em erro."),
+                                         ("bytes_total", "bytes", "Bytes transferidos ou gravados."),
+                                         ("quota_total", "quota", "Requisições/operações de API consumidas.")):
+            linhas.append(f"# HELP {nome}_{metrica} {ajuda}")
+            linhas.append(f"# TYPE {nome}_{metrica} counter")
+            for estagio, serie in sorted(estagios.items()):
+                linhas.append(f'{nome}_{metrica}{{estagio="{estagio}"}} {getattr(serie, atributo)}')
+        linhas.append(f"# HELP {PREFIXO_PROMETHEUS}_execucao_fim_timestamp_segundos Fim da última execução.")
+        linhas.append(f"# TYPE {PREFIXO_PROMETHEUS}_execucao_fim_timestamp_segundos gauge")
+        linhas.append(f"{PREFIXO_PROMETHEUS}_execucao_fim_timestamp_segundos {time.time():.0f}")
+
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write("\n".join(linhas) + "\n")
+        os.replace(temporario, caminho)
+        return caminho
+
+
+metricas = Metricas()  # Instância usada pela execução atual
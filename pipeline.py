@@ -0,0 +1,113 @@
+import queue
+import threading
+
+# ------------------------ CONFIGURAÇÕES DO PIPELINE ------------------------
+CAPACIDADE_FILA = 4         # Itens aguardando entre um estágio e o próximo
+
+_FIM = object()
+
+
+class Estagio:
+    """Um estágio do pipeline: uma função aplicada por `concorrencia` threads."""
+
+    def __init__(self, nome, funcao, concorrencia=1):
+        self.nome = nome
+        self.funcao = funcao
+        self.concorrencia = max(1, concorrencia)
+
+
+class Pipeline:
+    """Pipeline em estágios ligados por filas limitadas.
+
+    Cada item passa pelos estágios na ordem em que foram declarados, e cada
+    estágio processa vários itens ao mesmo tempo, de modo que itens diferentes
+    (grupos de anúncios) se sobrepõem: enquanto um é renderizado, outro está
+    sendo baixado e outro enviado. As filas limitadas fazem a contrapressão:
+    um estágio rápido fica bloqueado quando o seguinte não dá conta, o que
+    mantém a memória limitada. Os resultados saem na ordem de entrada ou, com
+    `ordenado=False`, na ordem em que terminam (um item lento não segura os
+    seguintes em um buffer de reordenação sem limite).
+    """
+
+    def __init__(self, estagios, capacidade=CAPACIDADE_FILA, ordenado=True):
+        self.estagios = estagios
+        self.capacidade = capacidade
+        self.ordenado = ordenado
+
+    def _alimentar(self, itens, fila, consumidores, falhas):
+        # `itens` pode ser um gerador lento (consulta ao banco, stream da API);
+        # se ele falhar, o pipeline termina o que já entrou e o erro é repassado
+        try:
+            for indice, item in enumerate(itens):
+                fila.put((indice, item, None))
+        except Exception as e:
+            falhas.append(e)
+        finally:
+            for _ in range(consumidores):
+                fila.put(_FIM)
+
+    def _trabalhar(self, estagio, entrada, saida, controle, consumidores):
+        while True:
+            mensagem = entrada.get()
+            if mensagem is _FIM:
+                break
+            indice, item, erro = mensagem
+            if erro is None:
+                try:
+                    item = estagio.funcao(item)
+                except Exception as e:
+                    erro = e
+            saida.put((indice, item, erro))
+        # A última thread do estágio avisa o estágio seguinte que não há mais itens
+        with controle["lock"]:
+            controle["ativas"] -= 1
+            ultima = controle["ativas"] == 0
+        if ultima:
+            for _ in range(consumidores):
+                saida.put(_FIM)
+
+    def executar(self, itens):
+        """Processa os itens e gera (indice, resultado, erro) na ordem de entrada (ou de conclusão).
+
+        Um item que falha em um estágio pula os seguintes e é entregue com o
+        erro preenchido; os demais itens continuam normalmente. Se o próprio
+        iterável de entrada falhar, o erro é levantado depois que os itens já
+        lidos forem entregues.
+        """
+        filas = [queue.Queue(maxsize=self.capacidade) for _ in range(len(self.estagios) + 1)]
+        falhas = []
+        threads = [threading.Thread(
+            target=self._alimentar,
+            args=(itens, filas[0], self.estagios[0].concorrencia, falhas),
+            daemon=True
+        )]
+        for i, estagio in enumerate(self.estagios):
+            consumidores = self.estagios[i + 1].concorrencia if i + 1 < len(self.estagios) else 1
+            controle = {"lock": threading.Lock(), "ativas": estagio.concorrencia}
+            for n in range(estagio.concorrencia):
+                threads.append(threading.Thread(
+                    target=self._trabalhar,
+                    args=(estagio, filas[i], filas[i + 1], controle, consumidores),
+                    name=f"{estagio.nome}-{n}",
+                    daemon=True
+                ))
+        for thread in threads:
+            thread.start()
+
+        pendentes = {}
+        proximo = 0
+        while True:
+            mensagem = filas[-1].get()
+            if mensagem is _FIM:
+                break
+            if not self.ordenado:
+                yield mensagem
+                continue
+            pendentes[mensagem[0]] = mensagem
+            while proximo in pendentes:
+                yield pendentes.pop(proximo)
+                proximo += 1
+        for thread in threads:
+            thread.join()
+        if falhas:
+            raise falhas[0]
@@ -0,0 +1,215 @@
+import time
+import random
+import threading
+
+# ------------------------ CONFIGURAÇÕES DE LIMITE ------------------------
+# api: (requisições por segundo, rajada máxima) para todas as chamadas da API
+LIMITES_GLOBAIS = {
+    "ads": (3000 / 3600, 3000),
+    "drive": (10, 20),
+    "sheets": (1, 5),
+}
+# api: (requisições por segundo, rajada máxima) para cada conta/cliente
+LIMITES_POR_CONTA = {
+    "ads": (5, 10),
+}
+
+MAX_TENTATIVAS = 6          # Tentativas por requisição antes de desistir
+BACKOFF_BASE = 1.0          # Espera (s) da primeira retentativa
+BACKOFF_MAXIMO = 120.0      # Espera máxima (s) entre retentativas
+
+STATUS_HTTP_RETENTAVEIS = {429, 500, 502, 503, 504}
+MOTIVOS_HTTP_RETENTAVEIS = {"rateLimitExceeded", "userRateLimitExceeded", "backendError"}
+STATUS_GRPC_RETENTAVEIS = {"RESOURCE_EXHAUSTED", "UNAVAILABLE", "INTERNAL", "DEADLINE_EXCEEDED", "ABORTED"}
+# Escritas (mutates) só são refeitas quando o servidor certamente não as aplicou: após um
+# DEADLINE_EXCEEDED, INTERNAL ou ABORTED o mutate pode ter entrado e a retentativa duplicaria os anúncios
+STATUS_GRPC_RETENTAVEIS_ESCRITA = {"RESOURCE_EXHAUSTED", "UNAVAILABLE"}
+ERROS_QUOTA_RETENTAVEIS = {"RESOURCE_EXHAUSTED", "RESOURCE_TEMPORARILY_EXHAUSTED"}
+
+# Callback opcional ao_esperar(api, motivo, segundos), chamado antes de cada espera;
+# motivo é "limite" (token bucket) ou "retentativa" (backoff após erro temporário)
+ao_esperar = None
+
+
+class TokenBucket:
+    """Token bucket seguro para threads e asyncio.
+
+    `reservar` desconta o token imediatamente (o saldo pode ficar negativo) e
+    devolve quanto tempo o chamador deve esperar; assim o lock nunca é
+    mantido durante a espera e a mesma instância atende threads e corrotinas.
+    """
+
+    def __init__(self, taxa, rajada):
+        self.taxa = float(taxa)
+        self.rajada = float(rajada)
+        self._tokens = float(rajada)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reservar(self, quantidade=1):
+        """Reserva tokens e retorna o tempo (s) de espera até poder usá-los."""
+        with self._lock:
+            agora = time.monotonic()
+            self._tokens = min(self.rajada, self._tokens + (agora - self._ultimo) * self.taxa)
+            self._ultimo = agora
+            self._tokens -= quantidade
+            return max(0.0, -self._tokens / self.taxa)
+
+    def adquirir(self, quantidade=1):
+        espera = self.reservar(quantidade)
+        if espera:
+            time.sleep(espera)
+        return espera
+
+    async def adquirir_async(self, quantidade=1):
+        import asyncio  # Só quem usa a versão assíncrona paga o import
+        espera = self.reservar(quantidade)
+        if espera:
+            await asyncio.sleep(espera)
+        return espera
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def configurar(api, taxa, rajada, por_conta=False):
+    """Altera o limite de uma API (global ou por conta); vale para os próximos buckets criados."""
+    limites = LIMITES_POR_CONTA if por_conta else LIMITES_GLOBAIS
+    limites[api] = (taxa, rajada)
+    with _buckets_lock:
+        for chave in [k for k in _buckets if k[0] == api and (k[1] is not None) == por_conta]:
+            del _buckets[chave]
+
+
+def _bucket(api, conta=None):
+    limites = LIMITES_POR_CONTA if conta is not None else LIMITES_GLOBAIS
+    if api not in limites:
+        return None
+    chave = (api, conta)
+    with _buckets_lock:
+        if chave not in _buckets:
+            _buckets[chave] = TokenBucket(*limites[api])
+        return _buckets[chave]
+
+
+def _reservar(api, conta):
+    espera = 0.0
+    for bucket in (_bucket(api), _bucket(api, conta) if conta is not None else None):
+        if bucket is not None:
+            espera = max(espera, bucket.reservar())
+    return espera
+
+
+# ------------------------ CLASSIFICAÇÃO DE ERROS ------------------------
+def _segundos(duracao):
+    # proto-plus converte Duration em timedelta; o protobuf puro expõe seconds/nanos
+    if hasattr(duracao, "total_seconds"):
+        return duracao.total_seconds()
+    return duracao.seconds + duracao.nanos / 1e9
+
+
+def analisar_erro(ex, idempotente=True):
+    """Retorna (retentavel, retry_after) para um erro do Ads, Drive ou Sheets.
+
+    Com `idempotente=False` (escritas), só os status de STATUS_GRPC_RETENTAVEIS_ESCRITA
+    e os erros de quota são retentáveis.
+    """
+    status_grpc = STATUS_GRPC_RETENTAVEIS if idempotente else STATUS_GRPC_RETENTAVEIS_ESCRITA
+    # Google Ads (GoogleAdsException): código gRPC e erros de quota com retry_delay
+    falha = getattr(ex, "failure", None)
+    if falha is not None:
+        retry_after = None
+        retentavel = False
+        for erro in falha.errors:
+            if erro.error_code.quota_error.name in ERROS_QUOTA_RETENTAVEIS:
+                retentavel = True
+            atraso = _segundos(erro.details.quota_error_details.retry_delay)
+            if atraso > 0:
+                retry_after = max(retry_after or 0, atraso)
+        erro_grpc = getattr(ex, "error", None)
+        if erro_grpc is not None and hasattr(erro_grpc, "code"):
+            retentavel = retentavel or erro_grpc.code().name in status_grpc
+        return retentavel, retry_after
+
+    # googleapiclient (Drive/Sheets): HttpError com status e cabeçalho Retry-After
+    resp = getattr(ex, "resp", None)
+    if resp is not None and hasattr(resp, "status"):
+        retry_after = resp.get("retry-after")
+        try:
+            retry_after = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            retry_after = None
+        motivos = {d.get("reason") for d in (getattr(ex, "error_details", None) or []) if isinstance(d, dict)}
+        retentavel = resp.status in STATUS_HTTP_RETENTAVEIS or (
+            resp.status == 403 and bool(motivos & MOTIVOS_HTTP_RETENTAVEIS)
+        )
+        return retentavel, retry_after
+
+    # Erros gRPC sem GoogleAdsFailure
+    if hasattr(ex, "code") and callable(ex.code):
+        try:
+            return ex.code().name in status_grpc, None
+        except Exception:
+            pass
+
+    # Um timeout não diz se a escrita foi aplicada
+    return isinstance(ex, (ConnectionError, TimeoutError) if idempotente else ConnectionError), None
+
+
+def calcular_espera(tentativa, retry_after=None):
+    """Backoff exponencial com jitter completo, respeitando o retry-after do servidor."""
+    espera = random.uniform(0, min(BACKOFF_MAXIMO, BACKOFF_BASE * 2 ** tentativa))
+    if retry_after is not None:
+        espera = max(espera, retry_after)
+    return espera
+
+
+# ------------------------ EXECUÇÃO ------------------------
+def _avisar_espera(api, motivo, segundos):
+    if ao_esperar is not None:
+        ao_esperar(api, motivo, segundos)
+
+
+def executar(func, *args, api="ads", conta=None, tentativas=MAX_TENTATIVAS, idempotente=True, **kwargs):
+    """Executa `func` respeitando o limite da API e refazendo erros temporários.
+
+    Escritas que não podem ser repetidas com segurança (mutates) passam
+    `idempotente=False` (ver `analisar_erro`). Erros não retentáveis, ou que
+    persistem após `tentativas`, são relançados.
+    """
+    for tentativa in range(tentativas):
+        espera = _reservar(api, conta)
+        if espera:
+            _avisar_espera(api, "limite", espera)
+            time.sleep(espera)
+        try:
+            return func(*args, **kwargs)
+        except Exception as ex:
+            retentavel, retry_after = analisar_erro(ex, idempotente)
+            if not retentavel or tentativa == tentativas - 1:
+                raise
+            espera = calcular_espera(tentativa, retry_after)
+            print(f"⚠️ Erro temporário na API {api} ({type(ex).__name__}); nova tentativa em {espera:.1f}s...")
+            _avisar_espera(api, "retentativa", espera)
+            time.sleep(espera)
+
+
+async def executar_async(func, *args, api="ads", conta=None, tentativas=MAX_TENTATIVAS, idempotente=True, **kwargs):
+    """Versão asyncio de `executar`; `func` deve retornar um awaitable."""
+    import asyncio
+    for tentativa in range(tentativas):
+        espera = _reservar(api, conta)
+        if espera:
+            _avisar_espera(api, "limite", espera)
+            await asyncio.sleep(espera)
+        try:
+            return await func(*args, **kwargs)
+        except Exception as ex:
+            retentavel, retry_after = analisar_erro(ex, idempotente)
+            if not retentavel or tentativa == tentativas - 1:
+                raise
+            espera = calcular_espera(tentativa, retry_after)
+            print(f"⚠️ Erro temporário na API {api} ({type(ex).__name__}); nova tentativa em {espera:.1f}s...")
+            _avisar_espera(api, "retentativa", espera)
+            await asyncio.sleep(espera)
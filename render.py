@@ -0,0 +1,228 @@
+import os
+import mmap
+import time
+import atexit
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+from logo_registry import bitmap_para_imagem, carregar_bitmap
+from gif_engine import renderizar_gif_tamanhos
+from ad_sizes import ANCORAS, redimensionar_tamanhos
+from encoder import ADS_LIMITE_BYTES, PRESET_PADRAO, gravar
+
+# ------------------------ CONFIGURAÇÕES DE RENDERIZAÇÃO ------------------------
+DIMENSOES = (336, 280)      # Dimensões compatíveis com Google Ads
+LOGO_SIZE = (45, 14)        # Tamanho da logo
+MARGEM_LOGO = 10            # Distância (px) da logo até as bordas do criativo
+ANCORA_LOGO = "inferior_direito"  # Onde a logo fica quando o job não define (ver ad_sizes.ANCORAS)
+RENDER_MMAP = True          # Abre os templates via mmap (páginas do cache do SO, sem copiar o arquivo para o processo)
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def posicao_logo(dimensoes, logo_size, margem=MARGEM_LOGO, ancora=ANCORA_LOGO):
+    """Calcula a posição da logo no criativo, no canto ou borda indicado por `ancora`."""
+    fracao_x, fracao_y = ANCORAS[ancora]
+    return (margem + round(fracao_x * (dimensoes[0] - logo_size[0] - 2 * margem)),
+            margem + round(fracao_y * (dimensoes[1] - logo_size[1] - 2 * margem)))
+
+
+@contextmanager
+def abrir_template(caminho):
+    """Abre o template para leitura, mapeado em memória quando RENDER_MMAP está ligado.
+
+    Com o mmap, o decodificador lê direto das páginas do arquivo já no cache
+    do sistema (compartilhadas entre os workers), sem ler o arquivo para um
+    buffer antes. A imagem só pode ser usada dentro do bloco.
+    """
+    if not RENDER_MMAP or not os.path.getsize(caminho):
+        with Image.open(caminho) as imagem:
+            yield imagem
+        return
+    with open(caminho, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+        with Image.open(mapa) as imagem:
+            yield imagem
+
+
+def salvar_sem_metadados(image, output_path, file_format="PNG", dimensoes=DIMENSOES,
+                         orcamento=ADS_LIMITE_BYTES, preset=PRESET_PADRAO):
+    """Salva a imagem sem metadados para otimização.
+
+    Imagens estáticas passam pelo encoder com orçamento de bytes, que pode
+    trocar a extensão (por exemplo, para .jpg); retorna o caminho gravado.
+    """
+    if image.size != tuple(dimensoes):
+        image = image.resize(dimensoes)
+    if file_format.upper() == "GIF":
+        image.save(output_path, format="GIF", optimize=True)
+        return output_path
+    return gravar(image, output_path, orcamento, preset)[0]
+
+
+def _logo_do_job(job):
+    """Retorna (dimensoes, logo, posicao) do tamanho do job."""
+    dimensoes = tuple(job.get("dimensoes", DIMENSOES))
+    logo_size = tuple(job.get("logo_size", LOGO_SIZE))
+    bitmap = job.get("logo")
+    if bitmap is None or tuple(bitmap.size) != logo_size:
+        bitmap = carregar_bitmap(job["logo_path"], logo_size)
+    posicao = posicao_logo(dimensoes, logo_size, job.get("margem", MARGEM_LOGO), job.get("ancora", ANCORA_LOGO))
+    return dimensoes, bitmap_para_imagem(bitmap), posicao
+
+
+def renderizar_criativos(jobs, tempos=None):
+    """Renderiza os criativos de um mesmo template, em um ou mais tamanhos, com uma única decodificação.
+
+    Cada job é um dicionário com template_path (o mesmo em todos), logo_path,
+    output_file e, opcionalmente, dimensoes, logo_size, ancora, margem, logo
+    (LogoBitmap já redimensionado, que evita decodificar a logo a cada
+    template), orcamento e preset do encoder. O template (ou cada quadro do
+    GIF) é lido uma vez e redimensionado para todos os tamanhos com
+    `redimensionar_tamanhos`. Roda tanto no processo principal quanto nos
+    workers do pool, por isso não depende de estado global. Retorna os
+    caminhos gravados na ordem dos jobs; se `tempos` for uma lista de
+    dicionários (um por job), cada um recebe em "codificacao" os segundos
+    gastos gravando o PNG/JPEG.
+    """
+    template_path = jobs[0]["template_path"]
+    saidas = [_logo_do_job(job) for job in jobs]
+
+    if os.path.splitext(jobs[0]["output_file"])[1].lower() == ".gif":
+        with abrir_template(template_path) as template:
+            renderizar_gif_tamanhos(template, [(job["output_file"], logo, posicao, dimensoes)
+                                               for job, (dimensoes, logo, posicao) in zip(jobs, saidas)])
+        for job in jobs:
+            orcamento = job.get("orcamento", ADS_LIMITE_BYTES)
+            tamanho = os.path.getsize(job["output_file"])
+            if orcamento is not None and tamanho > orcamento:
+                print(f"⚠️ {os.path.basename(job['output_file'])} ficou com {tamanho} bytes, acima do limite de {orcamento}.")
+        return [job["output_file"] for job in jobs]
+
+    caminhos = []
+    with abrir_template(template_path) as template:
+        bases = redimensionar_tamanhos(template, [dimensoes for dimensoes, _, _ in saidas])
+        usadas = set()
+        for i, (job, (dimensoes, logo, posicao)) in enumerate(zip(jobs, saidas)):
+            imagem = bases[dimensoes]
+            if dimensoes in usadas:
+                imagem = imagem.copy()
+            usadas.add(dimensoes)
+            imagem.paste(logo, posicao, logo)
+            inicio = time.perf_counter()
+            caminhos.append(salvar_sem_metadados(
+                imagem, job["output_file"], "PNG", dimensoes,
+                job.get("orcamento", ADS_LIMITE_BYTES), job.get("preset", PRESET_PADRAO)
+            ))
+            if tempos is not None:
+                tempos[i]["codificacao"] = time.perf_counter() - inicio
+    return caminhos
+
+
+def renderizar_criativo(job, tempos=None):
+    """Aplica a logo sobre um template e grava o criativo (um único tamanho).
+
+    Retorna o caminho gravado; se `tempos` for um dicionário, recebe em
+    "codificacao" os segundos gastos gravando o PNG/JPEG.
+    """
+    return renderizar_criativos([job], None if tempos is None else [tempos])[0]
+
+
+def renderizar_medido(jobs):
+    """Renderiza os criativos de um template e retorna [(caminho, tempos)] na ordem dos jobs.
+
+    `tempos` tem "total" (segundos; o tempo do template dividido entre os
+    tamanhos gerados dele), "bytes" do arquivo gravado e, para criativos
+    estáticos, "codificacao". Os workers não compartilham as métricas do
+    processo principal, então os tempos voltam junto com os caminhos.
+    """
+    tempos = [{} for _ in jobs]
+    inicio = time.perf_counter()
+    caminhos = renderizar_criativos(jobs, tempos)
+    total = (time.perf_counter() - inicio) / len(jobs)
+    for caminho, tempo in zip(caminhos, tempos):
+        tempo["total"] = total
+        tempo["bytes"] = os.path.getsize(caminho)
+    return list(zip(caminhos, tempos))
+
+
+def _contexto_pool():
+    """Escolhe como os workers nascem: fork só enquanto a thread atual é a única viva.
+
+    Um fork com outras threads rodando (pipeline, gRPC) copia para os workers
+    os locks que elas estiverem segurando, como o do stdout ou o do SQLite, e
+    o worker trava ao usá-los. Nesse caso os workers saem do forkserver (ou do
+    spawn), que é seguro, mas leva ~0,5 s para subir o pool.
+    """
+    metodos = multiprocessing.get_all_start_methods()
+    if threading.active_count() == 1 and "fork" in metodos:
+        return multiprocessing.get_context("fork")
+    if "forkserver" in metodos:
+        contexto = multiprocessing.get_context("forkserver")
+        # O servidor carrega só este módulo (e o Pillow), não o main.py
+        contexto.set_forkserver_preload([__name__])
+        return contexto
+    return multiprocessing.get_context("spawn")
+
+
+def obter_pool(workers):
+    """Retorna o pool de processos da execução, recriando-o se o tamanho mudar.
+
+    Chamada antes de qualquer outra thread existir (como faz o main.py), cria os
+    workers por fork, na hora; ver `_contexto_pool`.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown()
+            contexto = _contexto_pool()
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=contexto)
+            _pool_workers = workers
+            if contexto.get_start_method() == "fork":
+                # Com fork, todos os workers nascem no primeiro envio: já, enquanto não há outras threads
+                _pool.submit(int).result()
+        return _pool
+
+
+def encerrar_pool():
+    """Encerra o pool de processos, se existir."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+atexit.register(encerrar_pool)
+
+
+def renderizar_lote(jobs, workers=1, tempos=None):
+    """Renderiza vários criativos e retorna os caminhos na mesma ordem dos jobs.
+
+    Jobs do mesmo template (tamanhos diferentes) formam uma única unidade de
+    trabalho, renderizada a partir de uma só decodificação. Com `workers` <= 1
+    (ou uma única unidade) tudo roda em série no processo atual; caso
+    contrário as unidades são distribuídas por um pool de processos
+    reaproveitado entre chamadas. Se `tempos` for uma lista, recebe os tempos
+    de cada criativo (ver `renderizar_medido`), na mesma ordem.
+    """
+    jobs = list(jobs)
+    grupos = {}
+    for i, job in enumerate(jobs):
+        grupos.setdefault(job["template_path"], []).append(i)
+    unidades = [[jobs[i] for i in indices] for indices in grupos.values()]
+    if workers <= 1 or len(unidades) <= 1:
+        resultados = [renderizar_medido(unidade) for unidade in unidades]
+    else:
+        resultados = list(obter_pool(workers).map(renderizar_medido, unidades))
+    por_job = [None] * len(jobs)
+    for indices, resultado in zip(grupos.values(), resultados):
+        for i, item in zip(indices, resultado):
+            por_job[i] = item
+    if tempos is not None:
+        tempos.extend(tempo for _, tempo in por_job)
+    return [caminho for caminho, _ in por_job]
@@ -0,0 +1,193 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from template_cache import calcular_md5
+
+# ------------------------ CONFIGURAÇÕES DO CACHE DE RENDERIZAÇÃO ------------------------
+VERSAO_RENDER = 3           # Mude quando a renderização mudar: invalida os criativos já guardados
+EXTENSOES = (".png", ".jpg", ".gif")
+SUFIXO_REGISTRO = ".codificacao.json"  # Registro do encoder guardado ao lado de cada criativo
+# O mesmo arquivo de encoder.REGISTRO_ARQUIVO (o encoder importa o PIL, que fica fora do import do main)
+REGISTRO_CODIFICACAO = "codificacao.jsonl"
+
+
+def chave_criativo(job, template_md5, logo_md5):
+    """Chave de um criativo: tudo o que determina os bytes gerados para o job.
+
+    Entram o id e o MD5 do template, o MD5 da logo, o tamanho (dimensões,
+    logo, âncora e margem) e a configuração do encoder. O nome do arquivo e o
+    grupo de anúncios ficam de fora, então grupos do mesmo site e idioma
+    compartilham os criativos.
+    """
+    partes = {
+        "versao": VERSAO_RENDER,
+        "template": [job["template_id"], template_md5],
+        "logo": logo_md5,
+        "dimensoes": list(job.get("dimensoes") or ()),
+        "logo_size": list(job.get("logo_size") or ()),
+        "ancora": job.get("ancora"),
+        "margem": job.get("margem"),
+        "orcamento": job.get("orcamento"),
+        "preset": job.get("preset"),
+    }
+    return hashlib.sha1(json.dumps(partes, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _ler_registro(caminho):
+    """Último registro do encoder para `caminho` no REGISTRO_CODIFICACAO da pasta dele (ou None)."""
+    nome = os.path.basename(caminho)
+    registro = None
+    try:
+        with open(os.path.join(os.path.dirname(caminho) or ".", REGISTRO_CODIFICACAO), encoding="utf-8") as f:
+            for linha in f:
+                dados = json.loads(linha)
+                if dados.get("arquivo") == nome:
+                    registro = dados
+    except FileNotFoundError:
+        pass
+    return registro
+
+
+class RenderCache:
+    """Cache local e persistente de criativos já renderizados.
+
+    Cada criativo fica em `{chave}{extensão}` no diretório (a extensão é a
+    escolhida pelo encoder), e o próprio diretório é o índice, de modo que o
+    cache é compartilhado pelas execuções do modo de linha de comando, uma por
+    grupo de anúncios. A data de modificação marca o último uso, e os menos
+    usados são apagados quando o total passa de `max_bytes`. O registro do
+    encoder de cada criativo fica em `{chave}.codificacao.json` e é repetido no
+    REGISTRO_CODIFICACAO da pasta de destino a cada acerto, como se o criativo
+    tivesse sido codificado ali.
+
+    Dentro do processo, uma chave sendo renderizada fica reservada: quem pedir
+    a mesma chave espera a renderização terminar em vez de repeti-la.
+    """
+
+    def __init__(self, diretorio, max_bytes):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._em_andamento = {}  # chave -> Event, liberado quando a renderização termina
+        self._total = None
+        self._md5 = {}
+
+    @property
+    def ativo(self):
+        return self.max_bytes > 0
+
+    def md5_arquivo(self, caminho):
+        """MD5 de um template ou logo, calculado uma vez por versão do arquivo."""
+        estado = os.stat(caminho)
+        chave = (os.path.abspath(caminho), estado.st_mtime_ns, estado.st_size)
+        with self._lock:
+            md5 = self._md5.get(chave)
+        if md5 is None:
+            md5 = calcular_md5(caminho)
+            with self._lock:
+                self._md5[chave] = md5
+        return md5
+
+    def _caminho_registro(self, chave):
+        return os.path.join(self.diretorio, chave + SUFIXO_REGISTRO)
+
+    def _caminho(self, chave):
+        for extensao in EXTENSOES:
+            caminho = os.path.join(self.diretorio, chave + extensao)
+            if os.path.exists(caminho):
+                return caminho
+        return None
+
+    # ------------------------ API ------------------------
+    def obter(self, chave, destino):
+        """Copia o criativo guardado para `destino` e retorna o caminho gravado (ou None).
+
+        A extensão de `destino` é trocada pela do criativo guardado (o encoder
+        pode ter escolhido JPEG para um template PNG).
+        """
+        origem = self._caminho(chave)
+        if origem is None:
+            return None
+        destino = os.path.splitext(destino)[0] + os.path.splitext(origem)[1]
+        try:
+            shutil.copyfile(origem, destino)
+            os.utime(origem)
+        except FileNotFoundError:
+            # Apagado por outro processo entre a busca e a cópia
+            return None
+        try:
+            with open(self._caminho_registro(chave), encoding="utf-8") as f:
+                registro = json.load(f)
+        except FileNotFoundError:
+            # GIFs não passam pelo encoder e não têm registro
+            return destino
+        registro["arquivo"] = os.path.basename(destino)
+        with open(os.path.join(os.path.dirname(destino) or ".", REGISTRO_CODIFICACAO), "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro) + "\n")
+        return destino
+
+    def reservar(self, chave):
+        """Reserva a chave para esta renderização; False se outra thread já a está renderizando."""
+        with self._lock:
+            if chave in self._em_andamento:
+                return False
+            self._em_andamento[chave] = threading.Event()
+            return True
+
+    def aguardar(self, chave, timeout=None):
+        """Espera a renderização de outra thread terminar (com ou sem sucesso)."""
+        with self._lock:
+            evento = self._em_andamento.get(chave)
+        if evento is not None:
+            evento.wait(timeout)
+
+    def liberar(self, chave):
+        """Libera a reserva de uma chave que não chegou a ser guardada."""
+        with self._lock:
+            evento = self._em_andamento.pop(chave, None)
+        if evento is not None:
+            evento.set()
+
+    def guardar(self, chave, caminho):
+        """Guarda uma cópia do criativo renderizado e libera a reserva da chave."""
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            destino = os.path.join(self.diretorio, chave + os.path.splitext(caminho)[1].lower())
+            tmp_path = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+            registro = _ler_registro(caminho)
+            if registro is not None:
+                # Gravado antes do criativo: quem encontrar o criativo encontra o registro
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(registro, f)
+                os.replace(tmp_path, self._caminho_registro(chave))
+            shutil.copyfile(caminho, tmp_path)
+            os.replace(tmp_path, destino)
+            with self._lock:
+                if self._total is not None:
+                    self._total += os.path.getsize(destino)
+            self._despejar()
+        finally:
+            self.liberar(chave)
+
+    def _despejar(self):
+        """Apaga os criativos usados há mais tempo até o cache caber em `max_bytes`."""
+        with self._lock:
+            if self._total is not None and self._total <= self.max_bytes:
+                return
+            arquivos = []
+            for entrada in os.scandir(self.diretorio):
+                if entrada.is_file() and entrada.name.endswith(EXTENSOES):
+                    estado = entrada.stat()
+                    arquivos.append((estado.st_mtime, estado.st_size, entrada.path))
+            self._total = sum(tamanho for _, tamanho, _ in arquivos)
+            for _, tamanho, caminho in sorted(arquivos):
+                if self._total <= self.max_bytes:
+                    break
+                for arquivo in (caminho, os.path.splitext(caminho)[0] + SUFIXO_REGISTRO):
+                    try:
+                        os.remove(arquivo)
+                    except FileNotFoundError:
+                        pass
+                self._total -= tamanho
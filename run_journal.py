@@ -0,0 +1,100 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# ------------------------ CONFIGURAÇÕES DO DIÁRIO ------------------------
+BAIXADO = "baixado"         # Template sorteado e disponível no cache local
+RENDERIZADO = "renderizado" # Criativo gravado em disco (com hash do arquivo)
+ENVIADO = "enviado"         # Criativo criado no Google Ads (com resource name)
+DUPLICADO = "duplicado"     # Criativo pulado por ser parecido com um anúncio existente
+ETAPAS_CONCLUIDAS = (ENVIADO, DUPLICADO)
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS execucoes (
+    run_id TEXT PRIMARY KEY,
+    criada REAL NOT NULL,
+    tarefas TEXT NOT NULL,
+    concluida INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS itens (
+    run_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    ad_group_id TEXT NOT NULL,
+    template_id TEXT NOT NULL,
+    etapa TEXT NOT NULL,
+    template_path TEXT,
+    output_file TEXT,
+    hash TEXT,
+    resource_name TEXT,
+    atualizado REAL NOT NULL,
+    PRIMARY KEY (run_id, account_id, ad_group_id, template_id)
+);
+"""
+
+CAMPOS_ITEM = ("template_id", "etapa", "template_path", "output_file", "hash", "resource_name")
+
+
+class RunJournal:
+    """Diário (SQLite) de uma execução, usado para retomá-la depois de uma falha.
+
+    Guarda as tarefas escolhidas no modo interativo e, para cada (conta, grupo
+    de anúncios, template), a última etapa concluída. Com `--resume <run_id>`
+    as tarefas são lidas daqui em vez de perguntadas de novo, criativos já
+    renderizados são reaproveitados e os já enviados são pulados.
+    """
+
+    def __init__(self, caminho_db):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(caminho_db, check_same_thread=False)
+        self._db.executescript(ESQUEMA)
+
+    def nova_execucao(self, tarefas):
+        """Registra uma execução com as tarefas informadas e retorna o run_id."""
+        run_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO execucoes (run_id, criada, tarefas) VALUES (?, ?, ?)",
+                (run_id, time.time(), json.dumps(tarefas, ensure_ascii=False))
+            )
+        return run_id
+
+    def tarefas(self, run_id):
+        """Retorna as tarefas da execução, ou None se ela não existir."""
+        with self._lock:
+            row = self._db.execute("SELECT tarefas FROM execucoes WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def concluir(self, run_id):
+        with self._lock, self._db:
+            self._db.execute("UPDATE execucoes SET concluida = 1 WHERE run_id = ?", (run_id,))
+
+    def itens(self, run_id, account_id, ad_group_id):
+        """Retorna {template_id: item} do grupo de anúncios, na ordem em que foram registrados."""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(CAMPOS_ITEM)} FROM itens "
+                "WHERE run_id = ? AND account_id = ? AND ad_group_id = ? ORDER BY rowid",
+                (run_id, account_id, ad_group_id)
+            ).fetchall()
+        return {row[0]: dict(zip(CAMPOS_ITEM, row)) for row in rows}
+
+    def registrar(self, run_id, account_id, ad_group_id, template_id, etapa, **campos):
+        """Avança o item para `etapa`, mantendo os campos gravados em etapas anteriores."""
+        valores = {campo: campos.get(campo) for campo in CAMPOS_ITEM[2:]}
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO itens (run_id, account_id, ad_group_id, template_id, etapa, template_path, "
+                "output_file, hash, resource_name, atualizado) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (run_id, account_id, ad_group_id, template_id) DO UPDATE SET "
+                "etapa = excluded.etapa, "
+                "template_path = COALESCE(excluded.template_path, template_path), "
+                "output_file = COALESCE(excluded.output_file, output_file), "
+                "hash = COALESCE(excluded.hash, hash), "
+                "resource_name = COALESCE(excluded.resource_name, resource_name), "
+                "atualizado = excluded.atualizado",
+                (run_id, account_id, ad_group_id, template_id, etapa, valores["template_path"],
+                 valores["output_file"], valores["hash"], valores["resource_name"], time.time())
+            )
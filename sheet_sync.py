@@ -0,0 +1,185 @@
+import json
+import math
+import rate_limiter
+
+# ------------------------ CONFIGURAÇÕES DA SINCRONIZAÇÃO ------------------------
+SYNC_LOTE_INTERVALOS = 500   # Intervalos por chamada values().batchUpdate
+SYNC_LOTE_REQUISICOES = 500  # Requisições (exclusão de linhas) por chamada spreadsheets().batchUpdate
+
+
+def _normalizar(valor):
+    """Converte um valor da planilha ou do DataFrame para a forma usada na comparação."""
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def _valor(valor):
+    """Valor pronto para ser enviado à API (tipos do NumPy viram tipos do Python, NaN vira vazio)."""
+    if hasattr(valor, "item"):
+        valor = valor.item()
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return ""
+    return valor
+
+
+def _linha(valores, tamanho):
+    linha = [_normalizar(v) for v in valores[:tamanho]]
+    return linha + [""] * (tamanho - len(linha))
+
+
+def _coluna(numero):
+    """Letra da coluna (1 = A)."""
+    letras = ""
+    while numero:
+        numero, resto = divmod(numero - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _blocos(numeros):
+    """Agrupa números de linha em sequências contíguas [(inicio, fim)]."""
+    blocos = []
+    for numero in sorted(numeros):
+        if blocos and numero == blocos[-1][1] + 1:
+            blocos[-1][1] = numero
+        else:
+            blocos.append([numero, numero])
+    return blocos
+
+
+def calcular_diferencas(atuais, novas, indices_chave):
+    """Compara as linhas atuais da planilha com as novas pela chave.
+
+    `atuais` e `novas` são listas de linhas já normalizadas, sem o cabeçalho.
+    Retorna (escritas, removidas, inseridas): `escritas` é {posição: índice
+    em `novas`} com as linhas alteradas e as inseridas (estas ocupam primeiro as posições
+    de linhas removidas e depois o fim da planilha); `removidas` são as
+    posições que sobraram vazias; `inseridas` é quantas linhas são novas.
+    As posições contam a partir de 0, sem o cabeçalho.
+    """
+    def chave(linha):
+        return tuple(linha[i] for i in indices_chave)
+
+    posicoes = {}
+    removidas = []
+    for posicao, linha in enumerate(atuais):
+        if chave(linha) in posicoes:
+            removidas.append(posicao)  # chave repetida na planilha: mantém só a primeira
+        else:
+            posicoes[chave(linha)] = posicao
+
+    escritas = {}
+    inseridas = []
+    vistas = set()
+    for indice, linha in enumerate(novas):
+        k = chave(linha)
+        if k in vistas:
+            continue
+        vistas.add(k)
+        posicao = posicoes.get(k)
+        if posicao is None:
+            inseridas.append(indice)
+        elif atuais[posicao] != linha:
+            escritas[posicao] = indice
+    removidas += [posicao for k, posicao in posicoes.items() if k not in vistas]
+    removidas.sort()
+
+    livres = removidas[:len(inseridas)]
+    fim = len(atuais)
+    for i, indice in enumerate(inseridas):
+        if i < len(livres):
+            escritas[livres[i]] = indice
+        else:
+            escritas[fim] = indice
+            fim += 1
+    return escritas, removidas[len(livres):], len(inseridas)
+
+
+def _id_aba(service, spreadsheet_id, aba):
+    planilha = rate_limiter.executar(
+        service.spreadsheets().get(spreadsheetId=spreadsheet_id, fields="sheets.properties").execute,
+        api="sheets"
+    )
+    for sheet in planilha.get("sheets", []):
+        if sheet["properties"]["title"] == aba:
+            return sheet["properties"]["sheetId"]
+    raise ValueError(f"Aba {aba} não encontrada na planilha")
+
+
+def sincronizar_planilha(service, spreadsheet_id, aba, df, colunas_chave):
+    """Aplica na aba apenas as diferenças entre ela e o DataFrame.
+
+    As linhas são identificadas por `colunas_chave`. Linhas alteradas ou
+    inseridas são gravadas com values().batchUpdate (linhas vizinhas viram
+    um único intervalo) e as que sumiram são excluídas com
+    spreadsheets().batchUpdate, de baixo para cima, sem nunca limpar a aba.
+    Retorna um resumo com as contagens e os bytes enviados.
+    """
+    cabecalho = [str(c) for c in df.columns]
+    largura = len(cabecalho)
+    ultima_coluna = _coluna(largura)
+    result = rate_limiter.executar(
+        service.spreadsheets().values().get(
+            spreadsheetId=spreadsheet_id, range=f"'{aba}'!A:{ultima_coluna}",
+            valueRenderOption="UNFORMATTED_VALUE"
+        ).execute,
+        api="sheets"
+    )
+    valores = result.get("values", [])
+    # Compara pelos textos normalizados, mas grava os valores originais (números continuam números)
+    brutas = [[_valor(v) for v in linha] for linha in df.values.tolist()]
+    novas = [_linha(linha, largura) for linha in brutas]
+    resumo = {"inseridas": 0, "alteradas": 0, "removidas": 0, "linhas_enviadas": 0, "bytes_enviados": 0}
+
+    if valores and _linha(valores[0], largura) == cabecalho:
+        atuais = [_linha(linha, largura) for linha in valores[1:]]
+        escritas, removidas, inseridas = calcular_diferencas(
+            atuais, novas, [cabecalho.index(c) for c in colunas_chave]
+        )
+        resumo["inseridas"] = inseridas
+        resumo["alteradas"] = len(escritas) - inseridas
+        # Posições na aba: +1 do cabeçalho, +1 porque a planilha começa na linha 1
+        escritas = {posicao + 2: brutas[indice] for posicao, indice in escritas.items()}
+        removidas = [posicao + 2 for posicao in removidas]
+    else:
+        # Aba vazia ou com outro cabeçalho: regrava tudo por cima, sem limpar antes
+        escritas = {numero + 1: linha for numero, linha in enumerate([cabecalho] + brutas)}
+        removidas = list(range(len(escritas) + 1, len(valores) + 1))
+        resumo["inseridas"] = len(novas)
+
+    intervalos = []
+    for inicio, fim in _blocos(escritas):
+        intervalos.append({
+            "range": f"'{aba}'!A{inicio}:{ultima_coluna}{fim}",
+            "values": [escritas[numero] for numero in range(inicio, fim + 1)],
+        })
+    for i in range(0, len(intervalos), SYNC_LOTE_INTERVALOS):
+        body = {"valueInputOption": "RAW", "data": intervalos[i:i + SYNC_LOTE_INTERVALOS]}
+        resumo["bytes_enviados"] += len(json.dumps(body, ensure_ascii=False).encode("utf-8"))
+        rate_limiter.executar(
+            service.spreadsheets().values().batchUpdate(spreadsheetId=spreadsheet_id, body=body).execute,
+            api="sheets"
+        )
+    resumo["linhas_enviadas"] = len(escritas)
+
+    if removidas:
+        sheet_id = _id_aba(service, spreadsheet_id, aba)
+        # De baixo para cima, para que as exclusões não desloquem as seguintes
+        requisicoes = [
+            {"deleteDimension": {"range": {
+                "sheetId": sheet_id, "dimension": "ROWS", "startIndex": inicio - 1, "endIndex": fim
+            }}}
+            for inicio, fim in reversed(_blocos(removidas))
+        ]
+        for i in range(0, len(requisicoes), SYNC_LOTE_REQUISICOES):
+            body = {"requests": requisicoes[i:i + SYNC_LOTE_REQUISICOES]}
+            resumo["bytes_enviados"] += len(json.dumps(body).encode("utf-8"))
+            rate_limiter.executar(
+                service.spreadsheets().batchUpdate(spreadsheetId=spreadsheet_id, body=body).execute,
+                api="sheets"
+            )
+        resumo["removidas"] = len(removidas)
+    return resumo
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+# ------------------------ CONFIGURAÇÕES DO CACHE ------------------------
+INDICE_ARQUIVO = "index.json"
+EXTENSOES_POR_MIME = {
+    "image/png": ".png",
+    "image/gif": ".gif",
+}
+
+
+def calcular_md5(caminho, tamanho_bloco=1024 * 1024):
+    """Calcula o MD5 de um arquivo em disco."""
+    md5 = hashlib.md5()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            md5.update(bloco)
+    return md5.hexdigest()
+
+
+class TemplateCache:
+    """Cache local e persistente de templates do Google Drive.
+
+    As entradas são indexadas pelo ID do arquivo no Drive e gravadas em disco
+    pelo conteúdo (md5Checksum), de modo que dois IDs com o mesmo conteúdo
+    compartilham o mesmo arquivo. Uma entrada é considerada válida quando o
+    md5Checksum/modifiedTime informados batem com os do índice, ou, na falta de
+    metadados, quando foi validada há menos de `ttl` segundos.
+
+    Um acerto só atualiza o índice em memória; o index.json é regravado quando
+    uma entrada entra ou sai e em `salvar`, chamado uma vez ao fim da execução.
+    """
+
+    def __init__(self, diretorio, max_bytes, ttl):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._indice_path = os.path.join(diretorio, INDICE_ARQUIVO)
+        self._entradas = None
+        self._sujo = False  # Acessos/validações ainda não gravados no index.json
+        self._downloads = {}  # file_id -> lock; um único download por template de cada vez
+
+    # ------------------------ ÍNDICE ------------------------
+    def _carregar(self):
+        if self._entradas is not None:
+            return
+        os.makedirs(self.diretorio, exist_ok=True)
+        try:
+            with open(self._indice_path, "r", encoding="utf-8") as f:
+                self._entradas = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._entradas = {}
+        # Descarta entradas cujo arquivo foi apagado manualmente
+        for file_id in [k for k, v in self._entradas.items() if not os.path.exists(self._caminho(v))]:
+            del self._entradas[file_id]
+
+    def _salvar(self):
+        self._sujo = False
+        tmp_path = f"{self._indice_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entradas, f)
+        os.replace(tmp_path, self._indice_path)
+
+    def _caminho(self, entrada):
+        return os.path.join(self.diretorio, entrada["arquivo"])
+
+    # ------------------------ VALIDAÇÃO ------------------------
+    @staticmethod
+    def _confere(entrada, metadados):
+        """Verifica se os metadados do Drive correspondem à entrada do cache."""
+        md5 = metadados.get("md5Checksum")
+        if md5:
+            return entrada.get("md5") == md5
+        modificado = metadados.get("modifiedTime")
+        return bool(modificado) and entrada.get("modifiedTime") == modificado
+
+    def _entrada_valida(self, file_id, metadados, buscar_metadados):
+        entrada = self._entradas.get(file_id)
+        if not entrada:
+            return None
+        agora = time.time()
+        if metadados is None and agora - entrada["validado_em"] > self.ttl and buscar_metadados:
+            metadados = buscar_metadados(file_id)
+        if metadados is not None:
+            if not self._confere(entrada, metadados):
+                return None
+            entrada["validado_em"] = agora
+        elif agora - entrada["validado_em"] > self.ttl:
+            return None
+        return entrada
+
+    # ------------------------ API ------------------------
+    def obter(self, file_id, baixar, metadados=None, buscar_metadados=None):
+        """Retorna o caminho local do template, baixando-o apenas se necessário.
+
+        `baixar(file_id, caminho, md5)` grava o arquivo do Drive em `caminho`
+        (conferindo o `md5`, quando informado) e retorna o MD5 dele, se já o
+        calculou. `metadados` é o dicionário retornado pela listagem do Drive
+        (com md5Checksum, modifiedTime e mimeType), quando disponível;
+        `buscar_metadados(file_id)` é usado para revalidar entradas vencidas e,
+        sem mimeType, antes do download, para gravar o arquivo com a extensão certa.
+        """
+        with self._lock:
+            self._carregar()
+            entrada = self._entrada_valida(file_id, metadados, buscar_metadados)
+            if entrada:
+                entrada["ultimo_acesso"] = time.time()
+                self._sujo = True
+                return self._caminho(entrada)
+            download = self._downloads.setdefault(file_id, threading.Lock())
+
+        with download:
+            with self._lock:
+                # Outra thread pode ter baixado o template enquanto esta esperava
+                entrada = self._entrada_valida(file_id, metadados, None)
+                if entrada:
+                    return self._caminho(entrada)
+            metadados = metadados or {}
+            if not metadados.get("mimeType") and buscar_metadados:
+                # Ex.: template retomado pelo --resume, do qual o diário só guarda o id
+                metadados = buscar_metadados(file_id) or metadados
+            arquivo, md5 = self._baixar(file_id, baixar, metadados)
+
+            with self._lock:
+                agora = time.time()
+                anterior = self._entradas.get(file_id)
+                if anterior and anterior["arquivo"] != arquivo:
+                    self._remover(file_id)
+                self._entradas[file_id] = {
+                    "arquivo": arquivo,
+                    "md5": md5,
+                    "modifiedTime": metadados.get("modifiedTime"),
+                    "tamanho": os.path.getsize(os.path.join(self.diretorio, arquivo)),
+                    "validado_em": agora,
+                    "ultimo_acesso": agora,
+                }
+                self._despejar(manter=file_id)
+                self._salvar()
+                return os.path.join(self.diretorio, arquivo)
+
+    def salvar(self):
+        """Grava no index.json os acessos e validações feitos desde a última gravação."""
+        with self._lock:
+            if self._sujo:
+                self._salvar()
+
+    def _baixar(self, file_id, baixar, metadados):
+        """Baixa o template e o grava no cache pelo conteúdo; retorna (arquivo, md5)."""
+        extensao = EXTENSOES_POR_MIME.get(metadados.get("mimeType"), ".png")
+        # Nome fixo por template: um download interrompido é retomado na próxima execução
+        tmp_path = os.path.join(self.diretorio, f".{file_id}.download")
+        os.makedirs(self.diretorio, exist_ok=True)
+        try:
+            md5 = baixar(file_id, tmp_path, metadados.get("md5Checksum")) or calcular_md5(tmp_path)
+            if metadados.get("md5Checksum") and metadados["md5Checksum"] != md5:
+                raise IOError(f"Checksum divergente para o template {file_id}")
+            arquivo = f"{md5}{extensao}"
+            os.replace(tmp_path, os.path.join(self.diretorio, arquivo))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return arquivo, md5
+
+    def revalidar(self, file_ids, buscar_metadados_lote):
+        """Revalida de uma só vez as entradas vencidas dentre `file_ids`.
+
+        `buscar_metadados_lote(ids)` retorna {file_id: metadados}. Entradas cujo
+        conteúdo mudou no Drive são descartadas e serão baixadas novamente.
+        """
+        with self._lock:
+            self._carregar()
+            agora = time.time()
+            vencidos = [
+                file_id for file_id in dict.fromkeys(file_ids)
+                if file_id in self._entradas and agora - self._entradas[file_id]["validado_em"] > self.ttl
+            ]
+        if not vencidos:
+            return
+        metadados = buscar_metadados_lote(vencidos)
+        with self._lock:
+            for file_id in vencidos:
+                entrada = self._entradas.get(file_id)
+                if not entrada:
+                    continue
+                if file_id in metadados and self._confere(entrada, metadados[file_id]):
+                    entrada["validado_em"] = agora
+                else:
+                    self._remover(file_id)
+            self._salvar()
+
+    def _remover(self, file_id):
+        """Remove uma entrada; o arquivo só é apagado se nenhuma outra entrada apontar para ele."""
+        entrada = self._entradas.pop(file_id)
+        if any(e["arquivo"] == entrada["arquivo"] for e in self._entradas.values()):
+            return 0
+        try:
+            os.remove(self._caminho(entrada))
+        except FileNotFoundError:
+            pass
+        return entrada["tamanho"]
+
+    def _despejar(self, manter=None):
+        """Remove as entradas menos usadas até o cache caber em `max_bytes`."""
+        arquivos = {}
+        for entrada in self._entradas.values():
+            arquivos[entrada["arquivo"]] = entrada["tamanho"]
+        total = sum(arquivos.values())
+        for file_id, _ in sorted(self._entradas.items(), key=lambda item: item[1]["ultimo_acesso"]):
+            if total <= self.max_bytes:
+                break
+            if file_id != manter:
+                total -= self._remover(file_id)
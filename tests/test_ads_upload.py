@@ -0,0 +1,89 @@
+import random
+import pytest
+from PIL import Image
+import ads_upload
+from fake_services import FakeGoogleAds
+
+pytest.importorskip("google.ads.googleads")
+
+
+def criar_criativos(diretorio, quantidade, vazios=()):
+    """Grava PNGs com ruído diferente (nenhum é quase duplicado de outro); os de `vazios` ficam sem bytes."""
+    rng = random.Random(quantidade)
+    caminhos = []
+    for i in range(quantidade):
+        caminho = diretorio / f"criativo_{i}.png"
+        if i in vazios:
+            caminho.write_bytes(b"")
+        else:
+            Image.frombytes("L", (32, 32), bytes(rng.randrange(256) for _ in range(32 * 32))).save(caminho)
+        caminhos.append(str(caminho))
+    return caminhos
+
+
+@pytest.fixture
+def ads():
+    return FakeGoogleAds()
+
+
+def test_poucos_criativos_vao_por_mutate(tmp_path, ads):
+    caminhos = criar_criativos(tmp_path, 3)
+    itens = [("1", caminho, "https://exemplo.com") for caminho in caminhos]
+
+    resultados = ads_upload.enviar_criativos(ads, "123", itens)
+
+    assert not ads.batch_jobs
+    assert all("resource_name" in resultados[caminho] for caminho in caminhos)
+
+
+def test_batch_job_encadeia_tokens_e_mapeia_falhas_parciais(tmp_path, ads, monkeypatch):
+    monkeypatch.setattr(ads_upload, "ADS_BATCH_JOB_LIMIAR", 2)
+    monkeypatch.setattr(ads_upload, "ADS_MAX_OPERACOES_POR_MUTATE", 2)
+    caminhos = criar_criativos(tmp_path, 5, vazios={3})
+    itens = [("1" if i < 3 else "2", caminho, "https://exemplo.com") for i, caminho in enumerate(caminhos)]
+
+    resultados = ads_upload.enviar_criativos(ads, "123", itens)
+
+    (job,) = ads.batch_jobs.values()
+    assert job["executado"] and len(job["operacoes"]) == 5  # Três envios de operações, com os tokens encadeados
+    assert resultados[caminhos[3]] == {"erro": "A imagem está vazia."}
+    for i in (0, 1, 2, 4):
+        assert resultados[caminhos[i]]["resource_name"].startswith(f"customers/123/adGroupAds/{'1' if i < 3 else '2'}~")
+
+
+def test_batch_job_incompleto_nao_e_executado(tmp_path, ads, monkeypatch):
+    monkeypatch.setattr(ads_upload, "ADS_BATCH_JOB_LIMIAR", 2)
+    monkeypatch.setattr(ads_upload, "ADS_MAX_OPERACOES_POR_MUTATE", 2)
+    caminhos = criar_criativos(tmp_path, 4)
+    chamadas = []
+
+    def executar(func, *args, idempotente=True, **kwargs):
+        chamadas.append(func.__name__)
+        if func.__name__ == "add_batch_job_operations" and kwargs.get("sequence_token"):
+            return None  # O segundo envio de operações falha de vez
+        return func(*args, **kwargs)
+
+    resultados = ads_upload.enviar_criativos(ads, "123", [("1", c, "https://exemplo.com") for c in caminhos], executar)
+
+    assert "run_batch_job" not in chamadas
+    assert not any(job["executado"] for job in ads.batch_jobs.values())
+    assert all(resultado == {"erro": "falha ao adicionar as operações ao batch job"} for resultado in resultados.values())
+    assert set(resultados) == set(caminhos)
+
+
+def test_grupos_da_mesma_conta_formam_um_unico_batch_job(tmp_path, ads, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import main
+    from dedup_index import DedupIndex
+    monkeypatch.setattr(ads_upload, "ADS_BATCH_JOB_LIMIAR", 3)
+    monkeypatch.setattr(main, "dedup", DedupIndex(str(tmp_path / "dedup.sqlite3")))
+    monkeypatch.setattr(main, "fazer_requisicao_liberada", ads_upload._executar_direto)
+    caminhos = criar_criativos(tmp_path, 4)
+
+    resultados = main.enviar_grupos(ads, "123", [("1", caminhos[:2], "https://exemplo.com/1"),
+                                                 ("2", caminhos[2:], "https://exemplo.com/2")])
+
+    # Dois criativos por grupo ficam abaixo do limiar, mas os quatro da conta passam dele
+    assert len(ads.batch_jobs) == 1
+    assert set(resultados) == {"1", "2"}
+    assert all("resource_name" in resultado for grupo in resultados.values() for resultado in grupo.values())
@@ -0,0 +1,29 @@
+import pytest
+from fake_services import FakeDrive
+
+
+@pytest.fixture
+def main(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import main
+    return main
+
+
+def test_revisao_vem_da_conta_que_le_a_planilha(main, monkeypatch):
+    planilha = FakeDrive()
+    sheet_id = planilha.criar_arquivo("catalogo", b"", "application/vnd.google-apps.spreadsheet", version="42")
+    # A conta dos templates não enxerga a planilha
+    monkeypatch.setattr(main, "drive", FakeDrive())
+    monkeypatch.setattr(main, "drive_planilha", planilha)
+    monkeypatch.setattr(main, "SPREADSHEET_ID", sheet_id)
+
+    assert main.revisao_planilha() == "42"
+
+
+def test_sem_acesso_a_revisao_o_cache_e_ignorado(main, monkeypatch):
+    class SemAcesso:
+        def obter_metadados(self, file_ids, fields=None):
+            raise PermissionError("403: arquivo não encontrado")
+
+    monkeypatch.setattr(main, "drive_planilha", SemAcesso())
+    assert main.revisao_planilha() is None
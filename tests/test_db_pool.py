@@ -0,0 +1,104 @@
+import pytest
+
+pymysql = pytest.importorskip("pymysql")
+from db_pool import ConnectionPool, ler_em_lotes
+
+
+class CursorFalso:
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.executado = None
+        self.lidos = []
+        self.fechado = False
+
+    def execute(self, sql, params=None):
+        self.executado = (sql, params)
+
+    def fetchmany(self, tamanho):
+        lote, self.linhas = self.linhas[:tamanho], self.linhas[tamanho:]
+        self.lidos.append(len(lote))
+        return lote
+
+    def close(self):
+        self.fechado = True
+
+
+class ConexaoFalsa:
+    """Conexão pymysql falsa: registra pings, cursores abertos e o fechamento."""
+
+    def __init__(self, linhas=()):
+        self.linhas = list(linhas)
+        self.pings = 0
+        self.cursores = []
+        self.fechada = False
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+
+    def cursor(self, classe=None):
+        cursor = CursorFalso(self.linhas)
+        self.cursores.append((classe, cursor))
+        return cursor
+
+    def close(self):
+        self.fechada = True
+
+
+def montar_pool(tamanho=2, linhas=()):
+    criadas = []
+
+    def fabrica():
+        criadas.append(ConexaoFalsa(linhas))
+        return criadas[-1]
+
+    return ConnectionPool(tamanho, fabrica), criadas
+
+
+def test_conexao_devolvida_e_reaproveitada_com_ping():
+    pool, criadas = montar_pool()
+    with pool.conexao() as primeira:
+        pass
+    with pool.conexao() as segunda:
+        pass
+
+    assert segunda is primeira and len(criadas) == 1
+    assert primeira.pings == 1  # Só a conexão reaproveitada é testada
+
+
+def test_conexao_com_erro_e_descartada():
+    pool, criadas = montar_pool(tamanho=1)
+    with pytest.raises(RuntimeError):
+        with pool.conexao():
+            raise RuntimeError("transação pela metade")
+
+    # Com tamanho 1, só dá para abrir outra se a quebrada saiu da conta do pool
+    with pool.conexao() as nova:
+        pass
+    assert criadas[0].fechada
+    assert nova is criadas[1] and not nova.fechada
+
+
+def test_ler_em_lotes_usa_cursor_do_servidor():
+    pool, criadas = montar_pool(linhas=[(i,) for i in range(2500)])
+
+    lotes = list(ler_em_lotes(pool, "SELECT id FROM contas WHERE ativo = %s", (1,), tamanho_lote=1000))
+
+    assert [len(lote) for lote in lotes] == [1000, 1000, 500]
+    (classe, cursor), = criadas[0].cursores
+    assert classe is pymysql.cursors.SSCursor
+    assert cursor.executado == ("SELECT id FROM contas WHERE ativo = %s", (1,))
+    assert cursor.lidos == [1000, 1000, 500, 0] and cursor.fechado
+    with pool.conexao() as conexao:
+        assert conexao is criadas[0]  # Devolvida ao pool depois do último lote
+
+
+def test_leitura_interrompida_fecha_o_cursor_e_descarta_a_conexao():
+    pool, criadas = montar_pool(linhas=[(i,) for i in range(2500)])
+    lotes = ler_em_lotes(pool, "SELECT id FROM contas", tamanho_lote=1000)
+    next(lotes)
+    lotes.close()
+
+    (_, cursor), = criadas[0].cursores
+    assert cursor.fechado and criadas[0].fechada
+    with pool.conexao() as conexao:
+        assert conexao is criadas[1]
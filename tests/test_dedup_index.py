@@ -0,0 +1,26 @@
+import gc
+import warnings
+from PIL import Image
+from dedup_index import assinatura, hash_perceptual
+
+
+def test_imagens_abertas_por_caminho_sao_fechadas(tmp_path):
+    caminho = tmp_path / "criativo.gif"
+    Image.new("RGB", (30, 20), (200, 10, 10)).save(caminho)
+
+    with warnings.catch_warnings(record=True) as avisos:
+        warnings.simplefilter("always", ResourceWarning)
+        for _ in range(3):
+            assert assinatura(str(caminho))[1] == "30x20"
+            hash_perceptual(str(caminho))
+        gc.collect()
+
+    assert not [aviso for aviso in avisos if issubclass(aviso.category, ResourceWarning)]
+
+
+def test_imagem_do_chamador_continua_aberta(tmp_path):
+    caminho = tmp_path / "criativo.png"
+    Image.new("RGB", (30, 20)).save(caminho)
+    with Image.open(caminho) as imagem:
+        assinatura(imagem)
+        imagem.load()  # Ainda legível: quem abriu é quem fecha
@@ -0,0 +1,125 @@
+import threading
+from drive_manifest import DriveManifest
+from fake_services import FakeDrive
+
+
+class DriveContado(FakeDrive):
+    """FakeDrive que registra as pastas listadas (varreduras completas ou parciais)."""
+
+    def __init__(self):
+        super().__init__()
+        self.pastas_listadas = []
+
+    def listar_filhos(self, folder_id, fields=None):
+        self.pastas_listadas.append(folder_id)
+        return super().listar_filhos(folder_id, fields)
+
+
+def montar_drive():
+    drive = DriveContado()
+    raiz = drive.criar_pasta("templates")
+    portugues = drive.criar_pasta("portuguese", raiz)
+    drive.criar_arquivo("a.png", b"a", "image/png", portugues)
+    drive.criar_arquivo("b.gif", b"b", "image/gif", portugues)
+    return drive, raiz, portugues
+
+
+def nomes(manifesto, pasta):
+    return [arquivo["name"] for arquivo in manifesto.listar_arquivos(pasta)]
+
+
+def test_primeira_sincronizacao_constroi_o_manifesto(tmp_path):
+    drive, raiz, portugues = montar_drive()
+    manifesto = DriveManifest(str(tmp_path / "manifesto.sqlite3"), drive, [raiz])
+
+    assert manifesto.sincronizar() is None
+    assert manifesto.buscar_pasta(raiz, "portuguese") == portugues
+    assert nomes(manifesto, portugues) == ["a.png", "b.gif"]
+    assert manifesto.listar_arquivos(portugues, mime_types=["image/gif"])[0]["md5Checksum"]
+
+
+def test_sincronizacao_incremental_aplica_o_feed_sem_varrer(tmp_path):
+    drive, raiz, portugues = montar_drive()
+    fora = drive.criar_pasta("fora_da_arvore")
+    espanhol = drive.criar_pasta("spanish", fora)
+    drive.criar_arquivo("c.png", b"c", "image/png", espanhol)
+    manifesto = DriveManifest(str(tmp_path / "manifesto.sqlite3"), drive, [raiz])
+    manifesto.sincronizar()
+    a, b = [arquivo["id"] for arquivo in manifesto.listar_arquivos(portugues)]
+
+    drive.criar_arquivo("d.png", b"d", "image/png", portugues)
+    drive.excluir(a)
+    drive.mover(b, fora)
+    drive.mover(espanhol, raiz)
+    drive.pastas_listadas.clear()
+
+    assert manifesto.sincronizar() == 4
+    assert nomes(manifesto, portugues) == ["d.png"]
+    # A pasta que entrou na árvore é a única listada, porque o feed não traz o conteúdo dela
+    assert drive.pastas_listadas == [espanhol]
+    assert manifesto.buscar_pasta(raiz, "spanish") == espanhol
+    assert nomes(manifesto, espanhol) == ["c.png"]
+
+    drive.excluir(espanhol)
+    assert manifesto.sincronizar() == 1
+    assert manifesto.buscar_pasta(raiz, "spanish") is None
+    assert manifesto.listar_arquivos(espanhol) == []
+    assert manifesto.sincronizar() == 0
+
+
+def test_token_persiste_entre_execucoes(tmp_path):
+    drive, raiz, portugues = montar_drive()
+    caminho = str(tmp_path / "manifesto.sqlite3")
+    DriveManifest(caminho, drive, [raiz]).sincronizar()
+    drive.criar_arquivo("d.png", b"d", "image/png", portugues)
+    drive.pastas_listadas.clear()
+
+    manifesto = DriveManifest(caminho, drive, [raiz])
+    assert manifesto.sincronizar() == 1
+    assert drive.pastas_listadas == []
+    assert nomes(manifesto, portugues) == ["a.png", "b.gif", "d.png"]
+
+
+def test_raizes_diferentes_forcam_varredura_completa(tmp_path):
+    drive, raiz, portugues = montar_drive()
+    logos = drive.criar_pasta("logos")
+    drive.criar_arquivo("site.png", b"logo", "image/png", logos)
+    caminho = str(tmp_path / "manifesto.sqlite3")
+    DriveManifest(caminho, drive, [raiz]).sincronizar()
+    drive.pastas_listadas.clear()
+
+    manifesto = DriveManifest(caminho, drive, [raiz, logos])
+    assert manifesto.sincronizar() is None
+    assert set(drive.pastas_listadas) == {raiz, portugues, logos}
+    assert nomes(manifesto, logos) == ["site.png"]
+    assert nomes(manifesto, portugues) == ["a.png", "b.gif"]
+
+
+def test_obter_manifesto_sincroniza_uma_vez_entre_threads(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import main
+    drive, raiz, _ = montar_drive()
+    logos = drive.criar_pasta("logos")
+    drive.latencia = 0.01  # Abre a janela em que as threads disputariam a construção
+    monkeypatch.setattr(main, "drive", drive)
+    monkeypatch.setattr(main, "manifesto", None)
+    monkeypatch.setattr(main, "DRIVE_MANIFEST_DB", str(tmp_path / "manifesto.sqlite3"))
+    monkeypatch.setattr(main, "TEMPLATES_DRIVE_FOLDER_ID", raiz)
+    monkeypatch.setattr(main, "LOGOS_DRIVE_FOLDER_ID", logos)
+    barreira = threading.Barrier(8)
+    resultados = []
+
+    def chamar():
+        barreira.wait()
+        resultados.append(main.obter_manifesto())
+
+    threads = [threading.Thread(target=chamar) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(resultados) == 8
+    assert all(resultado is resultados[0] for resultado in resultados)
+    assert drive.pastas_listadas.count(raiz) == 1
+    assert resultados[0].buscar_pasta(raiz, "portuguese") is not None
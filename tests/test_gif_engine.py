@@ -0,0 +1,73 @@
+from PIL import Image, ImageSequence
+from gif_engine import renderizar_gif
+
+FUNDOS = [(80, 50, 100), (160, 50, 100), (30, 200, 40)]
+
+
+def quadro_com_paleta_propria(fundo):
+    """Quadro P cuja paleta tem só o fundo e o branco da faixa: cada um vira uma tabela de cores local."""
+    quadro = Image.new("P", (60, 40), 0)
+    quadro.putpalette(list(fundo) + [255, 255, 255])
+    quadro.paste(1, (0, 30, 60, 40))
+    return quadro
+
+
+def test_gif_com_tabelas_de_cores_locais_mantem_cores_e_quadros(tmp_path):
+    template = tmp_path / "template.gif"
+    quadros = [quadro_com_paleta_propria(fundo) for fundo in FUNDOS]
+    quadros[0].save(template, save_all=True, append_images=quadros[1:], duration=100, loop=0, optimize=False)
+    logo = Image.new("RGBA", (10, 10), (250, 0, 0, 255))
+    saida = tmp_path / "saida.gif"
+
+    renderizar_gif(str(template), str(saida), logo, (2, 2), (60, 40))
+
+    with Image.open(saida) as gif:
+        resultado = [quadro.convert("RGB") for quadro in ImageSequence.Iterator(gif)]
+    assert len(resultado) == len(FUNDOS)
+    for quadro, fundo in zip(resultado, FUNDOS):
+        assert quadro.getpixel((40, 10)) == fundo
+        assert quadro.getpixel((40, 35)) == (255, 255, 255)
+        assert quadro.getpixel((5, 5)) == (250, 0, 0)
+
+
+def test_composicao_em_lote_gera_o_mesmo_gif_que_o_pillow(tmp_path, monkeypatch):
+    import gif_engine
+    template = tmp_path / "template.gif"
+    quadros = [quadro_com_paleta_propria(FUNDOS[0]) for _ in range(20)]
+    for i, quadro in enumerate(quadros):
+        quadro.paste(1, (i, 0, i + 8, 20))  # A faixa passa por baixo da logo em parte dos quadros
+    quadros[0].save(template, save_all=True, append_images=quadros[1:], duration=100, loop=0)
+    logo = Image.new("RGBA", (10, 10), (250, 0, 0, 128))
+
+    saidas = {}
+    for em_lote in (False, True):
+        monkeypatch.setattr(gif_engine, "COMPOSICAO_EM_LOTE", em_lote)
+        saidas[em_lote] = tmp_path / f"saida_{em_lote}.gif"
+        renderizar_gif(str(template), str(saidas[em_lote]), logo, (2, 2), (60, 40))
+
+    assert saidas[False].read_bytes() == saidas[True].read_bytes()
+
+
+def test_logo_opaca_com_a_cor_do_indice_transparente_continua_visivel(tmp_path):
+    template = tmp_path / "template.gif"
+    quadros = []
+    for fundo in FUNDOS[:2]:
+        # Índice 0 (preto) é o transparente: só a faixa da direita o usa
+        quadro = Image.new("P", (60, 40), 1)
+        quadro.putpalette([0, 0, 0] + list(fundo) + [255, 255, 255])
+        quadro.paste(0, (50, 0, 60, 40))
+        quadros.append(quadro)
+    quadros[0].save(template, save_all=True, append_images=quadros[1:], transparency=0,
+                    duration=100, loop=0, optimize=False)
+    logo = Image.new("RGBA", (10, 10), (0, 0, 0, 255))
+    saida = tmp_path / "saida.gif"
+
+    renderizar_gif(str(template), str(saida), logo, (2, 2), (60, 40))
+
+    with Image.open(saida) as gif:
+        resultado = [quadro.convert("RGBA") for quadro in ImageSequence.Iterator(gif)]
+    assert len(resultado) == 2
+    for quadro, fundo in zip(resultado, FUNDOS):
+        assert quadro.getpixel((5, 5)) == (0, 0, 0, 255)
+        assert quadro.getpixel((55, 5))[3] == 0
+        assert quadro.getpixel((30, 10)) == fundo + (255,)
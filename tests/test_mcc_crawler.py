@@ -0,0 +1,51 @@
+import threading
+from types import SimpleNamespace
+from mcc_crawler import listar_contas_filhas, percorrer_contas
+
+
+def test_conta_lenta_nao_segura_as_demais():
+    liberar = threading.Event()
+    vistas = []
+
+    def obter_linhas(conta):
+        if conta == "lenta":
+            liberar.wait(2)  # Num pipeline ordenado, nada sairia antes do tempo esgotar
+        return [conta]
+
+    for linha in percorrer_contas(["lenta", "a", "b", "c"], obter_linhas, workers=2):
+        vistas.append(linha)
+        if len(vistas) == 3:
+            liberar.set()  # Só depois que as rápidas saíram
+    assert vistas == ["a", "b", "c", "lenta"]
+
+
+class StreamQueCai:
+    """GoogleAdsService falso cujo primeiro search_stream cai depois do primeiro lote."""
+
+    def __init__(self):
+        self.chamadas = 0
+
+    def search_stream(self, customer_id, query):
+        self.chamadas += 1
+        for i in range(3):
+            if i == 1 and self.chamadas == 1:
+                raise ConnectionError("stream interrompido")
+            conta = SimpleNamespace(id=i, descriptive_name=f"conta {i}", status=SimpleNamespace(name="ENABLED"))
+            yield SimpleNamespace(results=[SimpleNamespace(customer_client=conta)])
+
+
+def test_falha_no_meio_do_stream_e_refeita():
+    servico = StreamQueCai()
+    client = SimpleNamespace(get_service=lambda nome: servico)
+
+    def executar(func, **kwargs):
+        # Retry simples, como o do rate_limiter: só funciona se o stream for lido dentro de `func`
+        try:
+            return func(**kwargs)
+        except ConnectionError:
+            return func(**kwargs)
+
+    contas = list(listar_contas_filhas(client, "999", executar))
+
+    assert servico.chamadas == 2
+    assert contas == [(str(i), f"conta {i}", "ENABLED") for i in range(3)]
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+import pytest
+import rate_limiter
+
+
+class ErroGrpc(Exception):
+    """Erro gRPC falso: só o code() que o analisar_erro consulta."""
+
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+    def code(self):
+        return SimpleNamespace(name=self.status)
+
+
+@pytest.fixture(autouse=True)
+def sem_esperas(monkeypatch):
+    monkeypatch.setattr(rate_limiter.time, "sleep", lambda segundos: None)
+
+
+def chamada_que_falha(status, falhas=1):
+    chamadas = []
+
+    def func():
+        chamadas.append(1)
+        if len(chamadas) <= falhas:
+            raise ErroGrpc(status)
+        return "ok"
+    return func, chamadas
+
+
+@pytest.mark.parametrize("status", ["DEADLINE_EXCEEDED", "INTERNAL", "ABORTED"])
+def test_escrita_nao_e_refeita_quando_pode_ter_sido_aplicada(status):
+    func, chamadas = chamada_que_falha(status)
+    with pytest.raises(ErroGrpc):
+        rate_limiter.executar(func, api="drive", idempotente=False)
+    assert len(chamadas) == 1
+
+    func, chamadas = chamada_que_falha(status)
+    assert rate_limiter.executar(func, api="drive") == "ok"
+    assert len(chamadas) == 2
+
+
+@pytest.mark.parametrize("status", ["RESOURCE_EXHAUSTED", "UNAVAILABLE"])
+def test_escrita_e_refeita_quando_nao_foi_aplicada(status):
+    func, chamadas = chamada_que_falha(status)
+    assert rate_limiter.executar(func, api="drive", idempotente=False) == "ok"
+    assert len(chamadas) == 2
@@ -0,0 +1,53 @@
+import json
+import os
+from render_cache import REGISTRO_CODIFICACAO, RenderCache
+
+
+def registros(pasta):
+    with open(pasta / REGISTRO_CODIFICACAO, encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f]
+
+
+def renderizar_em(pasta, nome, conteudo, configuracao):
+    """Imita o encoder: grava o criativo e acrescenta o registro dele na pasta."""
+    pasta.mkdir(parents=True, exist_ok=True)
+    (pasta / nome).write_bytes(conteudo)
+    with open(pasta / REGISTRO_CODIFICACAO, "a", encoding="utf-8") as f:
+        f.write(json.dumps(dict(configuracao, arquivo=nome)) + "\n")
+    return str(pasta / nome)
+
+
+def test_acerto_grava_o_registro_de_codificacao_no_destino(tmp_path):
+    cache = RenderCache(str(tmp_path / "renders"), 10 ** 6)
+    configuracao = {"formato": "JPEG", "qualidade": 80, "bytes": 5, "dentro_do_orcamento": True}
+    renderizar_em(tmp_path / "grupo1", "outro.png", b"png!", {"formato": "PNG", "compress_level": 6})
+    criativo = renderizar_em(tmp_path / "grupo1", "a.jpg", b"jpeg!", configuracao)
+    cache.reservar("chave")
+    cache.guardar("chave", criativo)
+    (tmp_path / "grupo2").mkdir()
+
+    destino = cache.obter("chave", str(tmp_path / "grupo2" / "b.png"))
+
+    assert destino == str(tmp_path / "grupo2" / "b.jpg")
+    assert registros(tmp_path / "grupo2") == [dict(configuracao, arquivo="b.jpg")]
+
+
+def test_gif_sem_registro_nao_grava_nada_e_despejo_apaga_o_registro(tmp_path):
+    cache = RenderCache(str(tmp_path / "renders"), 10)
+    (tmp_path / "grupo1").mkdir()
+    (tmp_path / "grupo1" / "a.gif").write_bytes(b"GIF89a")
+    cache.reservar("gif")
+    cache.guardar("gif", str(tmp_path / "grupo1" / "a.gif"))
+    (tmp_path / "grupo2").mkdir()
+
+    assert cache.obter("gif", str(tmp_path / "grupo2" / "b.gif"))
+    assert not (tmp_path / "grupo2" / REGISTRO_CODIFICACAO).exists()
+
+    criativo = renderizar_em(tmp_path / "grupo1", "c.png", b"x" * 8, {"formato": "PNG"})
+    cache.reservar("png")
+    cache.guardar("png", criativo)
+    cache.reservar("outro")
+    cache.guardar("outro", renderizar_em(tmp_path / "grupo1", "d.png", b"y" * 8, {"formato": "PNG"}))
+
+    # O limite de 10 bytes só comporta um criativo: os mais antigos saem com os seus registros
+    assert sorted(os.listdir(tmp_path / "renders")) == ["outro.codificacao.json", "outro.png"]
@@ -0,0 +1,33 @@
+import multiprocessing
+import threading
+import pytest
+import render
+
+pytestmark = pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(),
+                                reason="fork indisponível nesta plataforma")
+
+
+def test_fork_apenas_sem_outras_threads():
+    assert threading.active_count() == 1
+    assert render._contexto_pool().get_start_method() == "fork"
+
+    liberar = threading.Event()
+    thread = threading.Thread(target=liberar.wait)
+    thread.start()
+    try:
+        assert render._contexto_pool().get_start_method() in ("forkserver", "spawn")
+    finally:
+        liberar.set()
+        thread.join()
+
+
+def test_pool_criado_em_thread_do_pipeline_renderiza():
+    render.encerrar_pool()
+    resultado = []
+    thread = threading.Thread(target=lambda: resultado.extend(render.obter_pool(2).map(abs, [-1, -2, -3])))
+    thread.start()
+    thread.join()
+    try:
+        assert resultado == [1, 2, 3]
+    finally:
+        render.encerrar_pool()
@@ -0,0 +1,26 @@
+from template_cache import TemplateCache
+
+
+def baixar(conteudo):
+    def gravar(file_id, caminho, md5):
+        with open(caminho, "wb") as f:
+            f.write(conteudo)
+    return gravar
+
+
+def test_download_sem_mime_type_busca_os_metadados(tmp_path):
+    """Templates retomados pelo --resume chegam só com o id e não podem virar .png."""
+    cache = TemplateCache(str(tmp_path), 10 ** 6, 3600)
+    buscas = []
+
+    def buscar_metadados(file_id):
+        buscas.append(file_id)
+        return {"id": file_id, "mimeType": "image/gif", "modifiedTime": "2026-01-01T00:00:00Z"}
+
+    caminho = cache.obter("gif1", baixar(b"GIF89a"), buscar_metadados=buscar_metadados)
+
+    assert caminho.endswith(".gif")
+    assert buscas == ["gif1"]
+    # A entrada ainda é válida: o acerto seguinte não busca metadados nem baixa de novo
+    assert cache.obter("gif1", baixar(b"outro"), buscar_metadados=buscar_metadados) == caminho
+    assert buscas == ["gif1"]
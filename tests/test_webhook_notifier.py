@@ -0,0 +1,66 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from webhook_notifier import WebhookNotifier
+
+
+class Webhook(BaseHTTPRequestHandler):
+    """Webhook local: registra cada POST e responde com as respostas programadas em `server.respostas`."""
+
+    def do_POST(self):
+        corpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.recebidas.append((time.monotonic(), corpo["content"]))
+        status, cabecalhos = self.server.respostas.pop(0) if self.server.respostas else (204, {})
+        self.send_response(status)
+        for nome, valor in cabecalhos.items():
+            self.send_header(nome, valor)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor():
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Webhook)
+    servidor.recebidas = []
+    servidor.respostas = []
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def url(servidor):
+    return f"http://127.0.0.1:{servidor.server_address[1]}/webhook"
+
+
+def test_rajada_vira_uma_mensagem_e_429_respeita_retry_after(servidor):
+    servidor.respostas = [(429, {"Retry-After": "0.3"})]
+    notificador = WebhookNotifier(url(servidor), janela=0.2)
+
+    for i in range(20):
+        notificador.enviar(f"evento {i}")
+    notificador.encerrar()
+
+    # Uma única mensagem com os 20 eventos, enviada de novo depois do 429
+    assert [conteudo for _, conteudo in servidor.recebidas] == ["\n".join(f"evento {i}" for i in range(20))] * 2
+    assert servidor.recebidas[1][0] - servidor.recebidas[0][0] >= 0.3
+    assert notificador.enviadas == 1
+
+
+def test_encerrar_envia_o_pendente_sem_esperar_a_janela(servidor):
+    notificador = WebhookNotifier(url(servidor), janela=30)
+    notificador.enviar("primeiro")
+    notificador.enviar("segundo")
+
+    inicio = time.monotonic()
+    notificador.encerrar()
+
+    assert time.monotonic() - inicio < 5
+    assert [conteudo for _, conteudo in servidor.recebidas] == ["primeiro\nsegundo"]
+    assert notificador.enviadas == 1
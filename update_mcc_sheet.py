@@ -3,14 +3,18 @@ import re
 import time
 from datetime import datetime
 import pandas as pd
-import requests
-import pymysql
 from googleapiclient.discovery import build
 from google.oauth2 import service_account
 from google.ads.googleads.client import GoogleAdsClient
 from google.ads.googleads.errors import GoogleAdsException
 from tqdm import tqdm
 import difflib
+import threading
+from sheet_sync import sincronizar_planilha
+from mcc_crawler import listar_contas_filhas, percorrer_contas
+from webhook_notifier import WebhookNotifier
+from db_pool import ConnectionPool, ler_em_lotes
+import rate_limiter
 
 # ------------------------ CONFIGURAÇÕES ------------------------
 PASTA_OUTPUT = "output"
@@ -23,9 +27,32 @@ DEFAULT_CRIATIVOS_QUANTIDADE = 3  # Quantidade padrão para geração de criativ
 # Configurações da planilha
 SHEET_ID = ""  # Adicione o ID da sua planilha aqui
 SHEET_RANGE = "Página1!A:F"  # Intervalo definido para as 6 colunas
+COLUNAS = ["Site", "ID da Conta", "Nome da Conta", "ID do Grupo de Anúncios", "Campanha", "País"]
+COLUNAS_CHAVE = ["ID da Conta", "ID do Grupo de Anúncios"]  # Identificam cada linha na sincronização
+
+# ------------------------ CONFIGURAÇÕES DO MCC ------------------------
+MCC_CUSTOMER_ID = ""  # ID da conta gerenciadora; vazio usa o login_customer_id do google-ads.yaml
+MCC_WORKERS = 8       # Contas filhas consultadas ao mesmo tempo
+MCC_REQUISICOES_POR_SEGUNDO = 10  # Limite global de consultas ao Google Ads durante a varredura
+MOTIVOS_BLOQUEIO = {"CUSTOMER_NOT_ENABLED", "ACTION_NOT_PERMITTED_FOR_SUSPENDED_ACCOUNT"}
+
+rate_limiter.configurar("ads", MCC_REQUISICOES_POR_SEGUNDO, MCC_REQUISICOES_POR_SEGUNDO * 2)
+
+# ------------------------ CONFIGURAÇÕES DO BANCO DE DADOS ------------------------
+DB_HOST = ""  # Vazio: as contas vêm da hierarquia do MCC em vez do banco
+DB_PORT = 3306
+DB_USER = ""
+DB_PASSWORD = ""
+DB_NAME = ""
+DB_QUERY_IDS = "SELECT account_id FROM contas WHERE ativo = %s"  # Ajuste à sua tabela de contas
+DB_QUERY_PARAMS = (1,)
+
+pool_db = ConnectionPool(host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASSWORD,
+                         database=DB_NAME, charset="utf8mb4", connect_timeout=10)
 
 # ------------------------ CONFIGURAÇÕES DO WEBHOOK ------------------------
 WEBHOOK_URL = ""  # Adicione a URL do seu webhook do Discord aqui
+notificador = WebhookNotifier(WEBHOOK_URL)  # Agrupa e envia as notificações em segundo plano
 
 # Arquivo de log para contas com erros de acesso
 ERROR_LOG_FILE = "erro_de_acesso_contas.txt"
@@ -41,20 +68,18 @@ def load_blocked_accounts():
         accounts = {line.strip().split(",")[0] for line in f if line.strip()}
     return accounts
 
-def add_blocked_account(account_id, reason):
-    """Adiciona uma conta à lista de bloqueados."""
+def add_blocked_account(account_id, reason, message=""):
+    """Adiciona uma conta à lista de bloqueados e notifica o webhook."""
     with open(BLOCKED_ACCOUNTS_FILE, "a") as f:
         f.write(f"{account_id},{reason}\n")
+    send_webhook(account_id, reason, message)
 
 def send_webhook(account_id, reason, message=""):
-    """Envia notificação para o webhook do Discord."""
-    payload = {
-        "content": f"Conta {account_id} bloqueada: {reason}\n{message}"
-    }
-    try:
-        requests.post(WEBHOOK_URL, json=payload)
-    except Exception as e:
-        print(f"Erro ao enviar webhook: {e}")
+    """Enfileira a notificação para o webhook do Discord (não bloqueia).
+
+    Bloqueios em rajada são agrupados em poucas mensagens pelo notificador.
+    """
+    notificador.enviar(f"Conta {account_id} bloqueada: {reason}" + (f"\n{message}" if message else ""))
 
 def extrair_pais(nome_campanha):
     """Extrai o país do nome da campanha."""
@@ -72,6 +97,13 @@ def parar_antes_de_1630():
     hora_limite = datetime.strptime("16:30", "%H:%M").time()
     return hora_atual < hora_limite
 
+def get_sheets_service():
+    """Inicializa e retorna o serviço do Google Sheets."""
+    SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+    creds = service_account.Credentials.from_service_account_file(
+        'sheets_credentials.json', scopes=SCOPES)
+    return build('sheets', 'v4', credentials=creds, static_discovery=True, cache_discovery=False)
+
 def limpar_planilha():
     """Limpa a planilha mantendo apenas o cabeçalho."""
     service = get_sheets_service()
@@ -89,39 +121,127 @@ def ler_planilha():
     ).execute()
     values = result.get('values', [])
     if not values:
-        return pd.DataFrame(columns=["Site", "ID da Conta", "Nome da Conta", "ID do Grupo de Anúncios", "Campanha", "País"])
+        return pd.DataFrame(columns=COLUNAS)
     return pd.DataFrame(values[1:], columns=values[0])
 
 def atualizar_planilha(df):
-    """Atualiza a planilha com os dados do DataFrame."""
-    service = get_sheets_service()
-    values = [df.columns.tolist()] + df.values.tolist()
-    service.spreadsheets().values().update(
-        spreadsheetId=SHEET_ID,
-        range=SHEET_RANGE,
-        valueInputOption="RAW",
-        body={"values": values}
-    ).execute()
-
-def obter_ids_contas_db():
-    """Obtém os IDs das contas do banco de dados."""
-    # Implementação da obtenção de IDs
-    pass
+    """Atualiza a planilha com os dados do DataFrame.
 
-def obter_dados_de_contas(client):
-    """Obtém dados das contas do Google Ads."""
-    # Implementação da obtenção de dados
-    pass
+    Só as linhas inseridas, alteradas ou removidas (pela conta e grupo de
+    anúncios) são enviadas; a planilha nunca fica vazia durante a atualização.
+    """
+    service = get_sheets_service()
+    resumo = sincronizar_planilha(service, SHEET_ID, SHEET_RANGE.split("!")[0], df, COLUNAS_CHAVE)
+    print(f"✅ Planilha sincronizada: {resumo['inseridas']} inseridas, {resumo['alteradas']} alteradas, "
+          f"{resumo['removidas']} removidas ({resumo['linhas_enviadas']} linhas, {resumo['bytes_enviados']} bytes enviados).")
+    return resumo
+
+def obter_ids_contas_db(pool=None):
+    """Obtém os IDs das contas do banco de dados.
+
+    É um gerador: os IDs são lidos em lotes por um cursor do lado do servidor,
+    então o crawler começa pelas primeiras contas enquanto o resto ainda está
+    sendo lido.
+    """
+    for lote in ler_em_lotes(pool or pool_db, DB_QUERY_IDS, DB_QUERY_PARAMS):
+        for (account_id,) in lote:
+            yield str(account_id).replace("-", "").strip()
+
+_log_lock = threading.Lock()
+
+def registrar_erro_acesso(customer_id, erro):
+    """Registra em ERROR_LOG_FILE uma conta que não pôde ser consultada."""
+    if isinstance(erro, GoogleAdsException):
+        mensagem = "; ".join(e.message for e in erro.failure.errors)
+    else:
+        mensagem = " ".join(str(erro).split()) or type(erro).__name__
+    with _log_lock, open(ERROR_LOG_FILE, "a", encoding="utf-8") as f:
+        f.write(f"{datetime.now():%Y-%m-%d %H:%M:%S},{customer_id},{mensagem}\n")
+
+def motivo_bloqueio(erro):
+    """Retorna o motivo se o erro indica conta suspensa/desativada, senão None."""
+    if not isinstance(erro, GoogleAdsException):
+        return None
+    for e in erro.failure.errors:
+        motivo = e.error_code.authorization_error.name
+        if motivo in MOTIVOS_BLOQUEIO:
+            return motivo
+    return None
+
+def obter_dados_de_contas(client, contas=None):
+    """Obtém dados das contas do Google Ads.
+
+    Percorre as contas filhas do MCC (ou os IDs em `contas`) em paralelo e
+    gera as linhas da planilha à medida que cada conta termina. Contas
+    bloqueadas são puladas; contas suspensas são bloqueadas e notificadas;
+    erros de acesso vão para ERROR_LOG_FILE sem interromper as demais.
+    """
+    bloqueadas = load_blocked_accounts()
+    if contas is None:
+        manager_id = MCC_CUSTOMER_ID or client.login_customer_id
+        contas = listar_contas_filhas(client, manager_id, executar=lambda f, **kw: rate_limiter.executar(
+            f, api="ads", conta=kw.get("customer_id"), **kw))
+    
+    def selecionar(contas):
+        for conta in contas:
+            customer_id, _, status = conta if isinstance(conta, tuple) else (str(conta), None, "ENABLED")
+            if customer_id in bloqueadas:
+                continue
+            if status == "SUSPENDED":
+                bloqueadas.add(customer_id)
+                add_blocked_account(customer_id, status)
+                continue
+            if status == "ENABLED":
+                yield customer_id
+    
+    def ao_falhar(customer_id, erro):
+        registrar_erro_acesso(customer_id, erro)
+        motivo = motivo_bloqueio(erro)
+        if motivo:
+            add_blocked_account(customer_id, motivo, str(erro))
+    
+    return percorrer_contas(
+        selecionar(contas), lambda customer_id: get_data_from_child_account(client, customer_id),
+        MCC_WORKERS, ao_falhar
+    )
 
 def get_data_from_child_account(client, customer_id):
-    """Obtém dados de uma conta filha específica."""
-    # Implementação da obtenção de dados da conta filha
-    pass
+    """Obtém dados de uma conta filha específica: uma linha por grupo de anúncios ativo."""
+    google_ads_service = client.get_service("GoogleAdsService")
+    query = """
+        SELECT customer.id, customer.descriptive_name, campaign.name, ad_group.id
+        FROM ad_group
+        WHERE campaign.status = 'ENABLED' AND ad_group.status = 'ENABLED'
+    """
+    
+    def consultar(customer_id, query):
+        # O stream é consumido aqui dentro para que falhas no meio dele também sejam refeitas
+        return [row for batch in google_ads_service.search_stream(customer_id=customer_id, query=query)
+                for row in batch.results]
+    
+    linhas = []
+    for row in rate_limiter.executar(consultar, api="ads", conta=str(customer_id), customer_id=str(customer_id), query=query):
+        nome_conta = row.customer.descriptive_name
+        linhas.append({
+            "Site": extrair_site(nome_conta),
+            "ID da Conta": str(row.customer.id),
+            "Nome da Conta": nome_conta,
+            "ID do Grupo de Anúncios": str(row.ad_group.id),
+            "Campanha": row.campaign.name,
+            "País": extrair_pais(row.campaign.name),
+        })
+    return linhas
 
 def atualizar_planilha_com_dados():
     """Atualiza a planilha com dados das contas."""
-    # Implementação da atualização
-    pass
+    client = GoogleAdsClient.load_from_storage("google-ads.yaml")
+    # As linhas chegam conta a conta e são guardadas já no formato da planilha
+    linhas = {}
+    contas = obter_ids_contas_db() if DB_HOST else None
+    for linha in tqdm(obter_dados_de_contas(client, contas), desc="Grupos de anúncios", unit=" grupos"):
+        linhas[(linha["ID da Conta"], linha["ID do Grupo de Anúncios"])] = [linha[c] for c in COLUNAS]
+    atualizar_planilha(pd.DataFrame(list(linhas.values()), columns=COLUNAS))
+    notificador.encerrar()
 
 if __name__ == "__main__":
     atualizar_planilha_com_dados() 
\ No newline at end of file
@@ -0,0 +1,116 @@
+import atexit
+import queue
+import threading
+import time
+import requests
+from rate_limiter import calcular_espera
+
+# ------------------------ CONFIGURAÇÕES DO NOTIFICADOR ------------------------
+DISCORD_LIMITE_CARACTERES = 2000  # Tamanho máximo de "content" em uma mensagem do Discord
+JANELA_AGRUPAMENTO = 2.0          # Segundos esperando mais eventos antes de enviar uma mensagem
+WEBHOOK_TIMEOUT = 10              # Timeout (s) de cada POST
+WEBHOOK_MAX_TENTATIVAS = 5        # Tentativas por mensagem em erros 429/5xx/rede
+
+_FIM = object()
+
+
+class WebhookNotifier:
+    """Fila de notificações enviadas ao webhook por uma thread em segundo plano.
+
+    `enviar` só enfileira, então quem notifica nunca espera pela rede. A thread
+    junta os eventos que chegam em rajada (até JANELA_AGRUPAMENTO segundos ou
+    o limite de caracteres do Discord) em uma única mensagem, respeita os
+    cabeçalhos de rate limit (Retry-After, X-RateLimit-Remaining/Reset-After)
+    e refaz erros temporários. `encerrar` envia o que estiver pendente; ele é
+    registrado no atexit.
+    """
+
+    def __init__(self, url, janela=JANELA_AGRUPAMENTO, timeout=WEBHOOK_TIMEOUT, sessao=None):
+        self.url = url
+        self.janela = janela
+        self.timeout = timeout
+        self.sessao = sessao or requests.Session()
+        self.enviadas = 0
+        self._fila = queue.Queue()
+        self._liberado_em = 0.0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def enviar(self, texto):
+        """Enfileira um evento para envio (não bloqueia)."""
+        if not self.url:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._trabalhar, name="webhook", daemon=True)
+                self._thread.start()
+                atexit.register(self.encerrar)
+        self._fila.put(texto[:DISCORD_LIMITE_CARACTERES])
+
+    def encerrar(self, timeout=60):
+        """Envia os eventos pendentes e encerra a thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._fila.put(_FIM)
+        thread.join(timeout)
+
+    # ------------------------ THREAD DE ENVIO ------------------------
+    def _trabalhar(self):
+        pendente = None
+        while True:
+            evento = pendente if pendente is not None else self._fila.get()
+            pendente = None
+            if evento is _FIM:
+                return
+            partes = [evento]
+            tamanho = len(evento)
+            limite = time.monotonic() + self.janela
+            while True:
+                try:
+                    proximo = self._fila.get(timeout=max(0.0, limite - time.monotonic()))
+                except queue.Empty:
+                    break
+                if proximo is _FIM or tamanho + 1 + len(proximo) > DISCORD_LIMITE_CARACTERES:
+                    # Não cabe (ou é o fim): vai na próxima mensagem
+                    pendente = proximo
+                    break
+                partes.append(proximo)
+                tamanho += 1 + len(proximo)
+            self._postar("\n".join(partes))
+
+    def _esperar_liberacao(self):
+        espera = self._liberado_em - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+
+    def _postar(self, conteudo):
+        for tentativa in range(WEBHOOK_MAX_TENTATIVAS):
+            self._esperar_liberacao()
+            retry_after = None
+            try:
+                resposta = self.sessao.post(self.url, json={"content": conteudo}, timeout=self.timeout)
+            except requests.RequestException as e:
+                print(f"⚠️ Erro ao enviar webhook (tentativa {tentativa + 1}): {e}")
+            else:
+                if resposta.headers.get("X-RateLimit-Remaining") == "0":
+                    reset = float(resposta.headers.get("X-RateLimit-Reset-After", 0) or 0)
+                    self._liberado_em = time.monotonic() + reset
+                if resposta.status_code < 300:
+                    self.enviadas += 1
+                    return True
+                if resposta.status_code != 429 and resposta.status_code < 500:
+                    print(f"❌ Webhook recusado ({resposta.status_code}): {resposta.text[:200]}")
+                    return False
+                retry_after = resposta.headers.get("Retry-After")
+                if retry_after is None and resposta.status_code == 429:
+                    try:
+                        retry_after = resposta.json().get("retry_after")
+                    except ValueError:
+                        pass
+                retry_after = float(retry_after) if retry_after is not None else None
+            if tentativa + 1 < WEBHOOK_MAX_TENTATIVAS:
+                time.sleep(calcular_espera(tentativa, retry_after))
+        print(f"❌ Webhook não enviado após {WEBHOOK_MAX_TENTATIVAS} tentativas.")
+        return False